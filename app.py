@@ -1,47 +1,62 @@
+import json
+from pathlib import Path
+
+import joblib
+import numpy as np
 import streamlit as st
 import pandas as pd
-import numpy as np
-import joblib
-from autogluon.tabular import TabularPredictor
 
-st.set_page_config(page_title="Car Price Predictor", layout="wide")
-
-raw = pd.read_csv("data/01_raw/Car_Prices_Poland_Kaggle.csv", encoding="utf-8")
-raw.drop(
-    columns=[c for c in raw.columns if c.lower().startswith("unnamed")] + ["province"],
-    errors="ignore",
-    inplace=True
+from carprices.serving.cache import CachedPredictor
+from carprices.serving.comparables import ComparablesIndex
+from carprices.serving.service import (
+    COMPARABLES_PATH,
+    COMPILED_PATH,
+    PREPROCESSORS_PATH,
+    default_predictor_path,
+    load_predict_fn,
 )
+from carprices.serving.whatif import price_curves
 
-all_marks = sorted(raw["mark"].dropna().unique())
-model_map = raw.groupby("mark")["model"].apply(lambda s: sorted(s.dropna().unique())).to_dict()
-gen_map = raw.groupby("model")["generation_name"] \
-    .apply(lambda s: sorted(s.dropna().str.replace(r"^gen-", "", regex=True).unique())) \
-    .to_dict()
-all_cities = sorted(raw["city"].dropna().unique())
+st.set_page_config(page_title="Car Price Predictor", layout="wide")
 
 
 @st.cache_resource
-def load_preprocessors(path="data/06_models/preprocessors.pkl"):
-    return joblib.load(path)
+def load_lookups(path="data/06_models/app_lookups.json"):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
 
 
-preproc = load_preprocessors()
-scaler = preproc["scaler"]
-gen_le = preproc["gen_le"]
-model_te_map = preproc["model_te_map"]
-top_marks = preproc["top_marks"]
-top_cities = preproc["top_cities"]
+lookups = load_lookups()
+all_marks = lookups["marks"]
+model_map = lookups["model_map"]
+gen_map = lookups["gen_map"]
+all_cities = lookups["cities"]
 
 
 @st.cache_resource
-def load_predictor(path="data/07_model_output/car_price_predictor_final"):
-    return TabularPredictor.load(path)
+def load_predictor(cache_db=None):
+    # preprocessory + model (skompilowany ensemble albo AutoGluon) za cache
+    # predykcji, przeładowywane po zmianie artefaktów na dysku
+    predictor_path = default_predictor_path()
+    return CachedPredictor(
+        lambda: load_predict_fn(predictor_path),
+        [predictor_path, PREPROCESSORS_PATH, COMPILED_PATH],
+        max_entries=10000, disk_path=cache_db)
+
 
+predict = load_predictor()
 
-predictor = load_predictor()
 
-template_cols = list(pd.read_csv("data/02_intermediate/features.csv", nrows=0).columns)
+@st.cache_resource
+def load_comparables(path=COMPARABLES_PATH):
+    # tablice otwierane przez mmap, więc start nie wczytuje całego indeksu
+    if not Path(path).exists():
+        return None
+    transformer = joblib.load(PREPROCESSORS_PATH)["transformer"]
+    return ComparablesIndex.load(path, transformer)
+
+
+comparables = load_comparables()
 
 st.title("🛻 Car Price Predictor")
 
@@ -59,6 +74,8 @@ with c3:
     gen = st.selectbox("Generacja", gen_map.get(model, ["unknown"]))
     city = st.selectbox("Miasto", all_cities)
 
+compare_cities = st.multiselect("Porównaj z miastami", all_cities, max_selections=20)
+
 if st.button("Oblicz cenę"):
     df = pd.DataFrame([{
         "mark": mark,
@@ -71,32 +88,23 @@ if st.button("Oblicz cenę"):
         "city": city
     }])
 
-    df["fuel_encoded"] = df["fuel"].map({"Gasoline": 0, "Diesel": 1})
-    df["generation_name"] = df["generation_name"].fillna("unknown")
-    df["age"] = 2025 - df["year"]
-    df["mileage_per_year"] = df["mileage"] / df["age"].replace(0, np.nan)
-    df["log_mileage"] = np.log1p(df["mileage"])
-
-    num_cols = ["age", "mileage", "mileage_per_year", "vol_engine", "log_mileage"]
-    df[num_cols] = scaler.transform(df[num_cols])
-
-    df["model_te"] = df["model"].map(model_te_map) \
-        .fillna(np.mean(list(model_te_map.values())))
-
-    df["mark_group"] = df["mark"].where(df["mark"].isin(top_marks), "other_mark")
-    df = pd.get_dummies(df, columns=["mark_group"], prefix="mark")
-
-    df["city_group"] = df["city"].where(df["city"].isin(top_cities), "other_city")
-    df = pd.get_dummies(df, columns=["city_group"], prefix="city")
-
-    raw_gen = df["generation_name"].str.replace(r"^gen-", "", regex=True).fillna("unknown")
-    gen_grouped = raw_gen.where(raw_gen.isin(gen_le.classes_), "other")
-    df["generation_name_encoded"] = gen_le.transform(gen_grouped)
-    df = pd.get_dummies(df, columns=["generation_name_encoded"], prefix="gen")
-
-    drop = ["mark", "model", "year", "mileage", "fuel", "city", "generation_name", "fuel_encoded"]
-    X_inf = df.drop(columns=drop, errors="ignore") \
-        .reindex(columns=template_cols, fill_value=0)
-
-    price = predictor.predict(X_inf).iloc[0]
+    price = predict(df)[0]
     st.success(f"Przewidywana cena: {price:,.0f} PLN")
+
+    # wszystkie warianty w jednym wywołaniu predict: 50 przebiegów × 10 roczników + miasta
+    years = np.arange(max(1990, year - 5), min(2025, year + 4) + 1)
+    mileages = np.linspace(2000, 300000, 50).round(-3).astype(int)
+    by_mileage, by_city = price_curves(predict, df.iloc[0].to_dict(), [
+        {"year": years, "mileage": mileages},
+        {"city": list(dict.fromkeys([city] + compare_cities))},
+    ])
+    st.subheader("Cena w zależności od przebiegu i rocznika")
+    st.line_chart(by_mileage.pivot(index="mileage", columns="year", values="price"))
+    if compare_cities:
+        st.subheader("Cena w wybranych miastach")
+        st.bar_chart(by_city.set_index("city")["price"])
+
+    if comparables is not None:
+        st.subheader("Podobne ogłoszenia")
+        similar = comparables.query(df.iloc[0].to_dict(), k=5)
+        st.dataframe(similar.drop(columns="distance"), hide_index=True)
@@ -0,0 +1,138 @@
+"""Koszt startu `kedro run` z sesją Spark i bez niej.
+
+Mierzy w osobnych procesach:
+
+* ``context`` -- utworzenie KedroSession i kontekstu (hooki), a potem
+  dodatkowy czas i RSS (z JVM) pierwszego ``get_spark()`` (to, co dawny hook
+  płacił w każdym przebiegu),
+* ``kedro_run`` -- czas i szczytowy RSS drzewa procesów (z JVM) dla
+  ``kedro run`` na małym syntetycznym pliku: pipeline pandas vs Spark.
+
+Wszystko działa w tymczasowej kopii projektu (``conf``, ``pyproject.toml``,
+``src`` i puste katalogi ``data``), więc przebiegi nie
+nadpisują artefaktów w ``data/``::
+
+    python scripts/bench_startup.py --rows 2000 --repeat 3
+"""
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import psutil
+
+from carprices.synthetic import synthetic_listings
+
+PROJECT_PATH = Path(__file__).resolve().parents[1]
+
+CONTEXT_SNIPPET = """
+import json, time
+t0 = time.perf_counter()
+import psutil
+from kedro.framework.session import KedroSession
+from kedro.framework.startup import bootstrap_project
+from carprices import spark
+proc = psutil.Process()
+rss_mb = lambda: sum(p.memory_info().rss for p in [proc] + proc.children(True)) / 2**20
+bootstrap_project({path!r})
+with KedroSession.create(project_path={path!r}) as session:
+    session.load_context()
+    t1 = time.perf_counter(); rss_context = rss_mb()
+    spark.get_spark()
+    t2 = time.perf_counter()
+    print(json.dumps({{"context_s": t1 - t0, "context_rss_mb": rss_context,
+                       "spark_s": t2 - t1, "spark_rss_mb": rss_mb()}}))
+    spark.stop()
+"""
+
+
+def copy_project(target: Path) -> Path:
+    """Minimalna kopia projektu kedro z pustym drzewem ``data``."""
+    shutil.copytree(PROJECT_PATH / "conf", target / "conf")
+    shutil.copy2(PROJECT_PATH / "pyproject.toml", target)
+    shutil.copytree(PROJECT_PATH / "src", target / "src",
+                    ignore=shutil.ignore_patterns("__pycache__"))
+    for layer in (PROJECT_PATH / "data").iterdir():
+        if layer.is_dir():
+            (target / "data" / layer.name).mkdir(parents=True)
+    return target
+
+
+def _tree_rss_mb(process: psutil.Process) -> float:
+    total = 0
+    for p in [process] + process.children(recursive=True):
+        try:
+            total += p.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total / 1024 ** 2
+
+
+def run_measured(cmd: list, cwd: Path) -> dict:
+    # wyjście do pliku: logi kedro zapełniłyby bufor potoku i zablokowały proces
+    with tempfile.TemporaryFile("w+") as out:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=cwd, stdout=out,
+                                stderr=subprocess.STDOUT, text=True)
+        ps = psutil.Process(proc.pid)
+        peak = 0.0
+        while proc.poll() is None:
+            try:
+                peak = max(peak, _tree_rss_mb(ps))
+            except psutil.NoSuchProcess:
+                break
+            time.sleep(0.02)
+        seconds = time.perf_counter() - start
+        out.seek(0)
+        stdout = out.read()
+    if proc.returncode:
+        raise RuntimeError(f"{' '.join(cmd)} failed with code {proc.returncode}:\n"
+                           f"{stdout[-2000:]}")
+    return {"seconds": seconds, "peak_tree_rss_mb": peak, "stdout": stdout}
+
+
+def _median(values: list) -> float:
+    return round(sorted(values)[len(values) // 2], 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    context, runs = [], {}
+    with tempfile.TemporaryDirectory() as tmp:
+        project = copy_project(Path(tmp) / "project")
+        for _ in range(args.repeat):
+            out = run_measured([sys.executable, "-c",
+                                CONTEXT_SNIPPET.format(path=str(project))], project)
+            context.append(json.loads(out["stdout"].strip().splitlines()[-1]))
+
+        csv_path = Path(tmp) / "raw.csv"
+        synthetic_listings(args.rows).to_csv(csv_path, index=False)
+        for pipeline in ["data_preparation", "data_preparation_spark"]:
+            cmd = ["kedro", "run", "--pipeline", pipeline,
+                   "--params", f"csv_path={csv_path}"]
+            runs[pipeline] = [run_measured(cmd, project) for _ in range(args.repeat)]
+
+    result = {
+        "context": {key: _median([c[key] for c in context]) for key in context[0]},
+        "kedro_run": {
+            pipeline: {
+                "seconds": _median([r["seconds"] for r in measured]),
+                "peak_tree_rss_mb": _median([r["peak_tree_rss_mb"] for r in measured]),
+            }
+            for pipeline, measured in runs.items()
+        },
+    }
+    print(json.dumps({"rows": args.rows, "repeat": args.repeat, **result},  # noqa: T201
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Porównanie CSV i typowanego Parquet dla `clean_df` i `features_df`.
+
+Generuje syntetyczne ogłoszenia, przepuszcza je przez węzły data_preparation
+i mierzy rozmiar na dysku oraz czas wczytania obu formatów::
+
+    python scripts/bench_storage.py --rows 1000000
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from carprices.pipelines.data_preparation.nodes import (
+    build_feature_transformer,
+    clean_data,
+    compute_feature_stats,
+    extract_target,
+    load_data,
+)
+from carprices.synthetic import write_synthetic_csv
+
+
+def _timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(name: str, df: pd.DataFrame, legacy: pd.DataFrame, tmp: Path) -> dict:
+    csv_path = tmp / f"{name}.csv"
+    parquet_path = tmp / f"{name}.parquet"
+    legacy.to_csv(csv_path, index=False)
+    df.to_parquet(parquet_path, index=False)
+    return {
+        "dataset": name,
+        "csv_mb": round(csv_path.stat().st_size / 2**20, 2),
+        "parquet_mb": round(parquet_path.stat().st_size / 2**20, 2),
+        "csv_load_s": round(_timed(lambda: pd.read_csv(csv_path)), 3),
+        "parquet_load_s": round(_timed(lambda: pd.read_parquet(parquet_path)), 3),
+        "parquet_mmap_load_s": round(_timed(
+            lambda: pd.read_parquet(parquet_path, memory_map=True)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = load_data(str(write_synthetic_csv(f"{tmp}/raw.csv", args.rows)))
+    clean_df = clean_data(raw)
+    transformer = build_feature_transformer(compute_feature_stats(clean_df, 2025))
+    features_df, _ = extract_target(clean_df, transformer)
+
+    # dawny format: kolumny tekstowe (object) i float64
+    legacy_clean = clean_df.astype({c: object for c in clean_df.columns
+                                    if isinstance(clean_df[c].dtype, pd.CategoricalDtype)})
+    legacy_features = features_df.astype("float64")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [
+            bench("clean_df", clean_df, legacy_clean, Path(tmp)),
+            bench("features_df", features_df, legacy_features, Path(tmp)),
+        ]
+    print(json.dumps({"rows": len(clean_df), "results": results}, indent=2))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
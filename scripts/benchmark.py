@@ -0,0 +1,252 @@
+"""Benchmarki wydajności na syntetycznych ogłoszeniach.
+
+Dla każdego rozmiaru danych generuje plik CSV w schemacie
+``Car_Prices_Poland_Kaggle.csv`` (``carprices.synthetic``) i uruchamia po
+kolei węzły pipeline'u ``data_preparation``, mierząc czas i szczytowy RSS
+każdego z nich oraz czas wczytania zapisanych preprocessorów. Potem mierzy
+latencję ``predict`` (pojedynczy wiersz i batch) dla skompilowanego
+ensemble'u, pełnego predictora AutoGluon i predictora spakowanego do
+wdrożenia z ``data/``. Wyniki trafiają do pliku JSON; ``--baseline``
+porównuje je z wcześniejszym przebiegiem::
+
+    python scripts/benchmark.py --rows 10k 1m --output bench.json
+    python scripts/benchmark.py --rows 10k --baseline bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+from kedro.config import OmegaConfigLoader
+
+from carprices.pipelines.data_preparation.pipeline import create_pipeline
+from carprices.profiling import PeakMemorySampler
+from carprices.serving.service import (
+    COMPILED_PATH,
+    DEPLOY_PATH,
+    PREDICTOR_PATH,
+    PREPROCESSORS_PATH,
+    load_predict_fn,
+)
+from carprices.synthetic import synthetic_listings, write_synthetic_csv
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SUFFIXES = {"k": 10 ** 3, "m": 10 ** 6}
+
+
+def parse_rows(value: str) -> int:
+    value = value.lower().replace("_", "")
+    if value[-1] in SUFFIXES:
+        return int(float(value[:-1]) * SUFFIXES[value[-1]])
+    return int(value)
+
+
+@contextmanager
+def _working_dir(path: Path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _measure(fn):
+    sampler = PeakMemorySampler().start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = sampler.stop()
+    return result, {
+        "seconds": round(seconds, 4),
+        "peak_rss_mb": round(peak, 1),
+        "peak_delta_mb": round(peak - sampler.start_mb, 1),
+    }
+
+
+def _param_inputs(params: dict, prefix: str = "params:") -> dict:
+    """
+    Wejścia ``params:*`` jak w ``KedroContext``: każdy słownik jest dostępny
+    w całości i pod kluczami z kropką (``params:comparables.path``).
+    """
+    data = {}
+    for key, value in params.items():
+        data[f"{prefix}{key}"] = value
+        if isinstance(value, dict):
+            data.update(_param_inputs(value, f"{prefix}{key}."))
+    return data
+
+
+def bench_data_preparation(rows: int, params: dict, tmp: Path) -> dict:
+    """
+    Węzły ``data_preparation`` w kolejności topologicznej, uruchamiane
+    w ``tmp``: ``save_preprocessors`` zapisuje wtedy do katalogu
+    tymczasowego zamiast nadpisywać artefakty projektu.
+    """
+    csv_path = tmp / "data/01_raw/Car_Prices_Poland_Kaggle.csv"
+    start = time.perf_counter()
+    write_synthetic_csv(str(csv_path), rows)
+    generate_s = time.perf_counter() - start
+    (tmp / "data/06_models").mkdir(parents=True, exist_ok=True)
+
+    data = _param_inputs(params)
+    data["params:csv_path"] = str(csv_path)
+    nodes = []
+    with _working_dir(tmp):
+        for node in create_pipeline().nodes:
+            outputs, stats = _measure(
+                lambda: node.run({name: data[name] for name in node.inputs}))
+            data.update(outputs)
+            nodes.append({"node": node.name, **stats})
+        _, load_stats = _measure(lambda: joblib.load("data/06_models/preprocessors.pkl"))
+
+    return {
+        "rows": rows,
+        "clean_rows": len(data["clean_df"]),
+        "csv_mb": round(csv_path.stat().st_size / 2 ** 20, 1),
+        "generate_s": round(generate_s, 3),
+        "nodes": nodes,
+        "total_s": round(sum(n["seconds"] for n in nodes), 3),
+        "preprocessor_load_s": load_stats["seconds"],
+    }
+
+
+def bench_predict(backend: str, single_rows: int, batch_rows: int) -> dict:
+    compiled_path = str(PROJECT_ROOT / COMPILED_PATH) if backend == "compiled" else ""
+    predictor_path = str(PROJECT_ROOT / (DEPLOY_PATH if backend == "deploy" else PREDICTOR_PATH))
+    _, load_stats = _measure(lambda: load_predict_fn(
+        predictor_path, str(PROJECT_ROOT / PREPROCESSORS_PATH), compiled_path))
+    predict_fn = load_predict_fn(
+        predictor_path, str(PROJECT_ROOT / PREPROCESSORS_PATH), compiled_path)
+
+    listings = synthetic_listings(batch_rows, seed=1).drop(
+        columns=["Unnamed: 0", "province", "price"])
+    predict_fn(listings.head(1))  # rozgrzewka
+    latencies = []
+    for i in range(single_rows):
+        row = listings.iloc[[i % len(listings)]]
+        start = time.perf_counter()
+        predict_fn(row)
+        latencies.append(time.perf_counter() - start)
+    _, batch_stats = _measure(lambda: predict_fn(listings))
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "backend": backend,
+        "load_s": load_stats["seconds"],
+        "single_row_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "single_row_p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "batch_rows": batch_rows,
+        "batch_s": batch_stats["seconds"],
+        "batch_rows_per_s": round(batch_rows / batch_stats["seconds"]),
+        "batch_peak_delta_mb": batch_stats["peak_delta_mb"],
+    }
+
+
+def environment() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=PROJECT_ROOT, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity")
+        else os.cpu_count(),
+    }
+
+
+def timings(results: dict) -> dict:
+    """Płaskie ``{nazwa: czas}`` do porównań między przebiegami."""
+    flat = {}
+    for prep in results.get("data_preparation", []):
+        for node in prep["nodes"]:
+            flat[f"data_preparation[{prep['rows']}].{node['node']}"] = node["seconds"]
+        flat[f"data_preparation[{prep['rows']}].preprocessor_load_s"] = \
+            prep["preprocessor_load_s"]
+    for pred in results.get("predict", []):
+        for key in ("load_s", "single_row_p50_ms", "batch_s"):
+            flat[f"predict[{pred['backend']}].{key}"] = pred[key]
+    return flat
+
+
+def compare(results: dict, baseline: dict, threshold: float,
+            min_seconds: float = 0.01) -> list:
+    """
+    Metryki wolniejsze od ``baseline`` o więcej niż ``threshold`` (ułamek).
+    Czasy poniżej ``min_seconds`` pomijamy, bo dominuje w nich szum.
+    """
+    current, previous = timings(results), timings(baseline)
+    regressions = []
+    for key, value in current.items():
+        old = previous.get(key)
+        floor = min_seconds * (1000 if key.endswith("_ms") else 1)
+        if old is None or max(old, value) < floor:
+            continue
+        if value > old * (1 + threshold):
+            regressions.append({"metric": key, "baseline": old, "current": value,
+                                "ratio": round(value / old, 2)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", nargs="+", type=parse_rows, default=[10 ** 4],
+                        help="rozmiary danych, np. 10k 1m 10m")
+    parser.add_argument("--backends", nargs="*", default=["compiled", "autogluon", "deploy"],
+                        help="backendy predict; pusta lista pomija pomiar")
+    parser.add_argument("--single-rows", type=int, default=200)
+    parser.add_argument("--batch-rows", type=int, default=10000)
+    parser.add_argument("--output", default=None, help="plik JSON z wynikami")
+    parser.add_argument("--baseline", default=None,
+                        help="wcześniejszy plik JSON; regresje kończą z kodem 1")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    params = OmegaConfigLoader(str(PROJECT_ROOT / "conf"),
+                               base_env="base", default_run_env="base")["parameters"]
+    results = {"environment": environment(), "data_preparation": [], "predict": []}
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            results["data_preparation"].append(bench_data_preparation(rows, params, Path(tmp)))
+
+    available = {"compiled": PROJECT_ROOT / COMPILED_PATH,
+                 "autogluon": PROJECT_ROOT / PREDICTOR_PATH,
+                 "deploy": PROJECT_ROOT / DEPLOY_PATH}
+    for backend in args.backends:
+        if available[backend].exists():
+            results["predict"].append(bench_predict(backend, args.single_rows,
+                                                    args.batch_rows))
+        else:
+            print(f"skipping {backend}: {available[backend]} not found",  # noqa: T201
+                  file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            results["regressions"] = compare(results, json.load(f), args.threshold)
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(report + "\n")
+    print(report)  # noqa: T201
+    return 1 if results.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Generator obciążenia dla usługi predykcji (`python -m carprices.serving`).
+
+Wysyła współbieżne żądania ``POST /predict`` i raportuje p50/p99 latencji
+oraz przepustowość w formacie JSON::
+
+    python scripts/load_test.py --url http://localhost:8000 --concurrency 32 --requests 5000
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+SAMPLE = {
+    "mark": "audi", "model": "a4", "year": 2015, "mileage": 120000,
+    "vol_engine": 1968, "fuel": "Diesel", "generation_name": "gen-b8",
+    "city": "Warszawa",
+}
+
+
+def _record() -> dict:
+    record = dict(SAMPLE)
+    record["year"] = random.randint(1995, 2024)
+    record["mileage"] = random.randint(2000, 300000)
+    return record
+
+
+def run(url: str, concurrency: int, requests: int) -> dict:
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    per_worker = requests // concurrency
+
+    def worker():
+        nonlocal errors
+        local, failed = [], 0
+        for _ in range(per_worker):
+            body = json.dumps(_record()).encode("utf-8")
+            req = urllib.request.Request(f"{url}/predict", data=body,
+                                         headers={"Content-Type": "application/json"})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req) as resp:
+                    resp.read()
+            except OSError:
+                failed += 1
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    lat_ms = np.asarray(latencies) * 1000
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(lat_ms, 50)), 2) if len(lat_ms) else None,
+        "p99_ms": round(float(np.percentile(lat_ms, 99)), 2) if len(lat_ms) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = [run(args.url, c, args.requests) for c in args.concurrency]
+    print(json.dumps(results, indent=2))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""Cache artefaktów węzłów adresowany treścią.
+
+``cached(func, artifacts=[...])`` opakowuje funkcję węzła. Klucz to skrót
+wartości wejść (w tym parametrów ``params:*``, które węzeł dostaje) i kodu
+całego pakietu ``carprices`` (węzły korzystają ze wspólnych modułów, np.
+``features.py`` czy ``serving``). Przy trafieniu węzeł nie jest
+uruchamiany: zapisane wyniki są wczytywane z magazynu, a katalogi/pliki
+wskazane w ``artifacts`` (np. ``save_path`` predictora) są odtwarzane na
+swoje miejsce. Magazyn ma limit rozmiaru i usuwa najdawniej używane wpisy.
+
+Hook ``ArtifactCacheHooks`` konfiguruje magazyn z parametru
+``artifact_cache`` (domyślnie wyłączony). Konfiguracja trafia też do
+zmiennej środowiskowej, więc procesy workerów ``ParallelRunner`` (także
+uruchamiane przez spawn) używają tego samego magazynu. Bez konfiguracji
+opakowane funkcje działają bez cache.
+"""
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# zmiana formatu wpisów unieważnia stare klucze
+_FORMAT = 1
+_FINGERPRINT_ATTR = "_artifact_fingerprint"
+CONFIG_ENV = "CARPRICES_ARTIFACT_CACHE"
+_PACKAGE_ROOT = Path(__file__).resolve().parent
+
+_lock = threading.Lock()
+_store: Optional["ArtifactStore"] = None
+_configured = False
+
+
+def configure(path: str = "data/09_cache/artifacts", max_size_gb: float = 20.0,
+              enabled: bool = True) -> None:
+    """
+    Ustawia magazyn cache; ``enabled=False`` wyłącza cache. Ustawienia są
+    zapisywane w ``CONFIG_ENV`` dla procesów potomnych.
+    """
+    global _store, _configured
+    with _lock:
+        _store = ArtifactStore(path, int(max_size_gb * 2 ** 30)) if enabled else None
+        _configured = True
+        os.environ[CONFIG_ENV] = json.dumps(
+            {"path": str(path), "max_size_gb": max_size_gb, "enabled": enabled})
+
+
+def get_store() -> Optional["ArtifactStore"]:
+    # worker ParallelRunner nie wywołuje hooków after_context_created
+    if not _configured and os.environ.get(CONFIG_ENV):
+        configure(**json.loads(os.environ[CONFIG_ENV]))
+    return _store
+
+
+class ArtifactStore:
+    """
+    Katalog wpisów ``<root>/<klucz>/`` z plikiem ``meta.json`` (węzeł,
+    rozmiar, czas ostatniego użycia). Wpis powstaje w katalogu tymczasowym
+    i jest przenoszony atomowo, więc równoległe procesy nie widzą
+    niepełnych wpisów.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def get(self, key: str) -> Optional[Path]:
+        entry = self.root / key
+        meta_path = entry / "meta.json"
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        meta["last_used"] = time.time()
+        _write_json(meta_path, meta)
+        return entry
+
+    def put(self, key: str, write: Callable[[Path], None], meta: Dict) -> Path:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".tmp-{uuid.uuid4().hex}"
+        tmp.mkdir()
+        try:
+            write(tmp)
+            size = sum(f.stat().st_size for f in tmp.rglob("*") if f.is_file())
+            _write_json(tmp / "meta.json", {**meta, "key": key, "size": size,
+                                            "created": time.time(),
+                                            "last_used": time.time()})
+            entry = self.root / key
+            if entry.exists():
+                shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict(keep=key)
+        return entry
+
+    def entries(self) -> List[Dict]:
+        entries = []
+        for meta_path in self.root.glob("*/meta.json"):
+            try:
+                entries.append(json.loads(meta_path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+    def evict(self, keep: str = None) -> List[str]:
+        """Usuwa najdawniej używane wpisy, aż rozmiar zmieści się w limicie."""
+        entries = sorted(self.entries(), key=lambda e: e["last_used"])
+        total = sum(e["size"] for e in entries)
+        evicted = []
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry["key"] == keep:
+                continue
+            shutil.rmtree(self.root / entry["key"], ignore_errors=True)
+            total -= entry["size"]
+            evicted.append(entry["key"])
+            logger.info("Evicted artifact cache entry %s (%s)", entry["key"][:12],
+                        entry.get("node"))
+        return evicted
+
+
+def fingerprint(value: Any) -> Optional[str]:
+    """
+    Skrót wartości wejścia węzła; None, gdy wartości nie da się skrócić
+    (węzeł jest wtedy uruchamiany bez cache). Wyniki węzłów z cache niosą
+    klucz wpisu, więc np. predictor nie jest serializowany do skrótu.
+    """
+    tag = getattr(value, _FINGERPRINT_ATTR, None)
+    if isinstance(tag, str):
+        return tag
+    digest = hashlib.sha256()
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(repr(value.dtypes.to_dict() if isinstance(value, pd.DataFrame)
+                           else value.dtype).encode())
+        digest.update(repr(list(value.columns) if isinstance(value, pd.DataFrame)
+                           else value.name).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        return digest.hexdigest()
+    if isinstance(value, np.ndarray):
+        digest.update(f"{value.dtype}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+        return digest.hexdigest()
+    try:
+        return joblib.hash(value, hash_name="sha1")
+    except Exception:  # noqa: BLE001
+        return None
+
+
+def code_fingerprint(func: Callable) -> str:
+    """
+    Skrót kodu: wszystkie pliki ``.py`` pakietu ``carprices`` (węzeł i moduły
+    współdzielone, z których korzysta) oraz katalogu modułu funkcji, jeśli
+    leży poza pakietem.
+    """
+    digest = hashlib.sha256(func.__qualname__.encode())
+    module_file = getattr(inspect.getmodule(func), "__file__", None)
+    if module_file is None:
+        digest.update(inspect.getsource(func).encode())
+        module_dir = None
+    else:
+        module_dir = Path(module_file).resolve().parent
+    roots = [_PACKAGE_ROOT]
+    if module_dir is not None and module_dir != _PACKAGE_ROOT \
+            and _PACKAGE_ROOT not in module_dir.parents:
+        roots.append(module_dir)
+    for root in roots:
+        for path in sorted(root.rglob("*.py")):
+            digest.update(str(path.relative_to(root)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+class _PredictorRef:
+    """Zapisany zamiast ``TabularPredictor``; predictor leży w ``artifacts``."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self):
+        from autogluon.tabular import TabularPredictor
+        return TabularPredictor.load(self.path)
+
+
+def _freeze(value):
+    if isinstance(value, tuple):
+        return tuple(_freeze(v) for v in value)
+    if type(value).__name__ == "TabularPredictor":
+        return _PredictorRef(value.path)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, tuple):
+        return tuple(_thaw(v) for v in value)
+    if isinstance(value, _PredictorRef):
+        return value.load()
+    return value
+
+
+def _tag(value, key: str):
+    values = value if isinstance(value, tuple) else (value,)
+    for i, item in enumerate(values):
+        if isinstance(item, (pd.DataFrame, pd.Series, np.ndarray)) or item is None:
+            continue  # ramki są skracane po treści
+        try:
+            setattr(item, _FINGERPRINT_ATTR, f"{key}:{i}")
+        except (AttributeError, TypeError):
+            pass
+    return value
+
+
+def _copy(src: Path, dst: Path) -> None:
+    if dst.is_dir():
+        shutil.rmtree(dst)
+    elif dst.exists():
+        dst.unlink()
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if src.is_dir():
+        shutil.copytree(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+
+def _write_json(path: Path, data: Dict) -> None:
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+class cached:  # noqa: N801 - używane jak dekorator
+    """
+    Opakowanie funkcji węzła cache'em artefaktów. ``artifacts`` to nazwy
+    argumentów ze ścieżkami, które funkcja zapisuje poza katalogiem danych
+    Kedro (np. ``save_path`` AutoGluon). Obiekt jest picklowalny, więc działa
+    z ``ParallelRunner``.
+    """
+
+    def __init__(self, func: Callable, artifacts: Sequence[str] = ()):
+        self.func = func
+        self.artifacts = list(artifacts)
+        self.__name__ = func.__name__
+        self.__qualname__ = func.__qualname__
+        self.__module__ = func.__module__
+        self.__doc__ = func.__doc__
+        self.__wrapped__ = func
+
+    def key(self, *args, **kwargs) -> Optional[str]:
+        bound = inspect.signature(self.func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        parts = {"format": _FORMAT, "code": code_fingerprint(self.func)}
+        for name, value in bound.arguments.items():
+            parts[name] = fingerprint(value)
+            if parts[name] is None:
+                logger.info("Artifact cache skipped for %s: cannot fingerprint %s",
+                            self.__name__, name)
+                return None
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+    def __call__(self, *args, **kwargs):
+        store = get_store()
+        key = self.key(*args, **kwargs) if store is not None else None
+        if key is None:
+            return self.func(*args, **kwargs)
+
+        bound = inspect.signature(self.func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        paths = {name: Path(bound.arguments[name]) for name in self.artifacts}
+
+        entry = store.get(key)
+        if entry is not None:
+            start = time.perf_counter()
+            for name, path in paths.items():
+                _copy(entry / "artifacts" / name, path)
+            outputs = _thaw(joblib.load(entry / "outputs.pkl"))
+            logger.info("Artifact cache hit for %s (%s), restored in %.1fs",
+                        self.__name__, key[:12], time.perf_counter() - start)
+            return _tag(outputs, key)
+
+        outputs = self.func(*args, **kwargs)
+
+        def write(tmp: Path) -> None:
+            for name, path in paths.items():
+                if path.exists():
+                    _copy(path, tmp / "artifacts" / name)
+            joblib.dump(_freeze(outputs), tmp / "outputs.pkl")
+
+        store.put(key, write, {"node": self.__qualname__})
+        logger.info("Artifact cache stored %s (%s)", self.__name__, key[:12])
+        return _tag(outputs, key)
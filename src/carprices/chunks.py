@@ -0,0 +1,82 @@
+"""Strumieniowy odczyt i zapis dużych plików CSV/Parquet porcjami"""
+from pathlib import Path
+from typing import Dict, Iterator
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+def iter_chunks(path: str, chunksize: int, **read_args) -> Iterator[pd.DataFrame]:
+    """
+    Czyta plik CSV lub Parquet porcjami po ``chunksize`` wierszy.
+    """
+    if Path(path).suffix == ".parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, encoding="utf-8", chunksize=chunksize,
+                               **read_args)
+
+
+def arrow_schema(dtypes: Dict[str, str]) -> pa.Schema:
+    """
+    Schemat Arrow z typów pandas (np. ``CarFeatureTransformer.feature_dtypes_``):
+    ``category`` jako słownik napisów, ``str``/``object`` jako napisy.
+    """
+    fields = []
+    for column, dtype in dtypes.items():
+        if dtype == "category":
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        elif dtype in ("str", "object", "string"):
+            arrow_type = pa.string()
+        else:
+            arrow_type = pa.from_numpy_dtype(np.dtype(dtype))
+        fields.append(pa.field(column, arrow_type))
+    return pa.schema(fields)
+
+
+class ChunkWriter:
+    """
+    Dopisuje kolejne porcje do pliku CSV lub Parquet. Kolumny z ``schema``
+    mają w Parquet stały typ; pozostałe biorą typ z pierwszej porcji, więc
+    np. kolumna pusta w pierwszej porcji nie psuje zapisu kolejnych.
+    """
+
+    def __init__(self, path: str, schema: pa.Schema = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._parquet = self.path.suffix == ".parquet"
+        self._schema = schema
+        self._writer = None
+        self._first = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._parquet:
+            if self._writer is None:
+                schema = pa.Schema.from_pandas(df, preserve_index=False).remove_metadata()
+                if self._schema is not None:
+                    schema = pa.schema([
+                        self._schema.field(f.name) if f.name in self._schema.names else f
+                        for f in schema])
+                table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                table = pa.Table.from_pandas(df, schema=self._writer.schema,
+                                             preserve_index=False)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self._first else "a",
+                      header=self._first, index=False, encoding="utf-8")
+        self._first = False
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
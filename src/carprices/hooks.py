@@ -1,24 +1,268 @@
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
 from kedro.framework.hooks import hook_impl
-from pyspark import SparkConf
-from pyspark.sql import SparkSession
+
+from carprices import artifact_cache, spark
+from carprices.profiling import PeakMemorySampler, StackSampler, cpu_seconds
+
+logger = logging.getLogger(__name__)
 
 
 class SparkHooks:
+    """Registers the Spark config from ``conf/base/spark.yml`` with the lazy
+    session provider in ``carprices.spark``. The JVM only starts when a node
+    or dataset calls ``get_spark()``, and only pipelines listed in
+    ``spark_pipelines`` may start it; any other pipeline (including new
+    pandas ones) fails fast instead of starting a JVM. With
+    ``data_preparation.engine: spark`` the ``engine_pipelines`` are built
+    from the Spark variant (see ``pipeline_registry``) and may start it too.
+    """
+
+    def __init__(self, spark_pipelines: Iterable[str] = (),
+                 engine_pipelines: Iterable[str] = ("__default__", "data_preparation",
+                                                    "all")):
+        self.spark_pipelines = set(spark_pipelines)
+        self.engine_pipelines = set(engine_pipelines)
+        self._allowed = set(self.spark_pipelines)
+
+    @hook_impl
+    def after_context_created(self, context) -> None:
+        spark.configure(context.project_path.name, context.config_loader["spark"])
+        engine = (context.params.get("data_preparation") or {}).get("engine", "pandas")
+        self._allowed = set(self.spark_pipelines)
+        if engine == "spark":
+            self._allowed |= self.engine_pipelines
+
+    @hook_impl
+    def before_pipeline_run(self, run_params) -> None:
+        pipeline_name = run_params.get("pipeline_name") or "__default__"
+        if pipeline_name in self._allowed:
+            spark.enable()
+        else:
+            logger.info("Spark disabled for pipeline %s", pipeline_name)
+            spark.disable(f"pipeline {pipeline_name} is not in spark_pipelines")
+
+
+class ArtifactCacheHooks:
+    """Configures the content-addressed artifact cache (``carprices.artifact_cache``)
+    from the ``artifact_cache`` parameter. The cache is opt-in: nodes wrapped
+    with ``cached`` skip training and evaluation when their inputs, params
+    and code are unchanged only with ``artifact_cache.enabled: true``
+    (``kedro run --params artifact_cache.enabled=true``).
+    """
+
     @hook_impl
     def after_context_created(self, context) -> None:
-        """Initialises a SparkSession using the config
-        defined in project's conf folder.
-        """
-
-        # Load the spark configuration in spark.yaml using the config loader
-        parameters = context.config_loader["spark"]
-        spark_conf = SparkConf().setAll(parameters.items())
-
-        # Initialise the spark session
-        spark_session_conf = (
-            SparkSession.builder.appName(context.project_path.name)
-            .enableHiveSupport()
-            .config(conf=spark_conf)
-        )
-        _spark_session = spark_session_conf.getOrCreate()
-        _spark_session.sparkContext.setLogLevel("WARN")
+        options = context.params.get("artifact_cache") or {}
+        artifact_cache.configure(**{"enabled": False, **options})
+
+
+class NodeProfilingHooks:
+    """Profiles every node and writes a per-run report to
+    ``<report_dir>/<session_id>/``. Profiling is opt-in: set the
+    ``profiling.enabled`` parameter (``kedro run --params profiling.enabled=true``)
+    or the ``CARPRICES_PROFILE=1`` environment variable. The report contains:
+
+    * ``nodes.csv``: wall and CPU time, start/peak RSS, rows and columns of
+      the largest tabular input and output, dataset load/save time;
+    * ``datasets.csv``: every catalog load/save with its duration;
+    * ``<node>.folded``: collapsed call stacks of the ``top_nodes`` slowest
+      nodes, only when sampling is enabled with the ``profiling.sample``
+      parameter (``kedro run --params profiling.sample=true``).
+
+    CPU time is process-wide, so with ``ThreadRunner`` concurrent nodes share
+    it. With ``ParallelRunner`` the workers append records to a spool file
+    and the parent process merges them after the run.
+    """
+
+    ENABLE_ENV = "CARPRICES_PROFILE"
+    SPOOL_ENV = "CARPRICES_PROFILE_SPOOL"
+
+    def __init__(self, report_dir: str = "data/08_reporting/profiles"):
+        self.report_dir = Path(report_dir)
+        self.enabled = os.environ.get(self.ENABLE_ENV, "") not in ("", "0", "false")
+        self.sample, self.interval_ms, self.top_nodes = False, 5.0, 3
+        self._pid = None
+        self._run_dir = None
+        self._active = {}
+        self._loads = {}
+        self._records = []
+
+    @hook_impl
+    def after_context_created(self, context) -> None:
+        options = context.params.get("profiling") or {}
+        self.enabled = bool(options.get("enabled", self.enabled))
+        self.sample = bool(options.get("sample", self.sample))
+        self.interval_ms = float(options.get("interval_ms", self.interval_ms))
+        self.top_nodes = int(options.get("top_nodes", self.top_nodes))
+
+    @hook_impl
+    def before_pipeline_run(self, run_params) -> None:
+        if not self.enabled:
+            return
+        self._pid = os.getpid()
+        self._records = []
+        self._run_dir = self.report_dir / (run_params.get("session_id") or
+                                           time.strftime("%Y%m%dT%H%M%S"))
+        os.environ[self.SPOOL_ENV] = str(self._run_dir / ".spool")
+
+    @hook_impl
+    def before_dataset_loaded(self, dataset_name, node) -> None:
+        if not self._profiling:
+            return
+        self._loads[(node.name, dataset_name)] = time.perf_counter()
+
+    @hook_impl
+    def after_dataset_loaded(self, dataset_name, data, node) -> None:
+        self._dataset_record(node, dataset_name, "load", data)
+
+    @hook_impl
+    def before_dataset_saved(self, dataset_name, data, node) -> None:
+        if not self._profiling:
+            return
+        self._loads[(node.name, dataset_name)] = time.perf_counter()
+
+    @hook_impl
+    def after_dataset_saved(self, dataset_name, data, node) -> None:
+        self._dataset_record(node, dataset_name, "save", data)
+
+    @hook_impl
+    def before_node_run(self, node) -> None:
+        if not self._profiling:
+            return
+        sampler = None
+        if self.sample:
+            sampler = StackSampler(interval=self.interval_ms / 1000).start()
+        self._active[node.name] = (time.perf_counter(), cpu_seconds(),
+                                   PeakMemorySampler().start(), sampler)
+
+    @hook_impl
+    def after_node_run(self, node, inputs, outputs) -> None:
+        if node.name not in self._active:
+            return
+        wall_start, cpu_start, memory, sampler = self._active.pop(node.name)
+        wall, cpu = time.perf_counter() - wall_start, cpu_seconds() - cpu_start
+        peak = memory.stop()
+        in_rows, in_cols = _largest_table(inputs)
+        out_rows, out_cols = _largest_table(outputs)
+        record = {
+            "kind": "node",
+            "node": node.name,
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "start_rss_mb": round(memory.start_mb, 1),
+            "peak_rss_mb": round(peak, 1),
+            "peak_delta_mb": round(peak - memory.start_mb, 1),
+            "input_rows": in_rows,
+            "input_cols": in_cols,
+            "output_rows": out_rows,
+            "output_cols": out_cols,
+            "pid": os.getpid(),
+        }
+        if sampler is not None:
+            sampler.stop()
+            record["stacks"] = sampler.folded()
+        self._emit(record)
+        logger.info("Node %s: %.2fs wall, %.2fs CPU, peak RSS %.0f MB (+%.0f MB)",
+                    node.name, wall, cpu, peak, peak - memory.start_mb)
+
+    @hook_impl
+    def on_node_error(self, node) -> None:
+        active = self._active.pop(node.name, None)
+        if active is not None:
+            active[2].stop()
+            if active[3] is not None:
+                active[3].stop()
+
+    @hook_impl
+    def after_pipeline_run(self) -> None:
+        self._write_report()
+
+    @hook_impl
+    def on_pipeline_error(self) -> None:
+        self._write_report()
+
+    @property
+    def _profiling(self) -> bool:
+        # ParallelRunner workers do not get after_context_created; the spool
+        # variable set by the parent marks a profiled run
+        return self.enabled or self.SPOOL_ENV in os.environ
+
+    def _dataset_record(self, node, dataset_name: str, operation: str, data) -> None:
+        start = self._loads.pop((node.name, dataset_name), None)
+        if start is None:
+            return
+        rows, cols = _largest_table({dataset_name: data})
+        self._emit({"kind": "dataset", "node": node.name, "dataset": dataset_name,
+                    "operation": operation,
+                    "seconds": round(time.perf_counter() - start, 4),
+                    "rows": rows, "cols": cols})
+
+    def _emit(self, record: dict) -> None:
+        if os.getpid() == self._pid:
+            self._records.append(record)
+            return
+        # ParallelRunner worker: hand records to the parent process via a file
+        spool = Path(os.environ.get(self.SPOOL_ENV, self.report_dir / ".spool"))
+        spool.mkdir(parents=True, exist_ok=True)
+        with open(spool / f"{os.getpid()}.jsonl", "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def _write_report(self) -> None:
+        if self._run_dir is None:
+            return
+        records = list(self._records)
+        spool = self._run_dir / ".spool"
+        if spool.exists():
+            for path in sorted(spool.glob("*.jsonl")):
+                records += [json.loads(line) for line in path.read_text().splitlines()]
+            shutil.rmtree(spool)
+        os.environ.pop(self.SPOOL_ENV, None)
+        if not records:
+            return
+
+        self._run_dir.mkdir(parents=True, exist_ok=True)
+        datasets = pd.DataFrame([r for r in records if r["kind"] == "dataset"],
+                                columns=["node", "dataset", "operation", "seconds",
+                                         "rows", "cols"])
+        nodes = pd.DataFrame([r for r in records if r["kind"] == "node"])
+        if not nodes.empty:
+            io = datasets.pivot_table(index="node", columns="operation",
+                                      values="seconds", aggfunc="sum")
+            for operation in ("load", "save"):
+                nodes[f"{operation}_s"] = nodes["node"].map(
+                    io[operation] if operation in io else {}).fillna(0.0).round(4)
+            nodes = nodes.sort_values("wall_s", ascending=False)
+            if "stacks" in nodes:
+                for _, row in nodes.head(self.top_nodes).iterrows():
+                    if isinstance(row["stacks"], str) and row["stacks"]:
+                        (self._run_dir / f"{row['node']}.folded").write_text(row["stacks"])
+                nodes = nodes.drop(columns="stacks")
+            counts = ["input_rows", "input_cols", "output_rows", "output_cols"]
+            nodes[counts] = nodes[counts].astype("Int64")
+            nodes.drop(columns="kind").to_csv(self._run_dir / "nodes.csv", index=False)
+        datasets = datasets.astype({"rows": "Int64", "cols": "Int64"})
+        datasets.to_csv(self._run_dir / "datasets.csv", index=False)
+        logger.info("Node profile written to %s", self._run_dir)
+
+
+def _largest_table(data: dict) -> Tuple[Optional[int], Optional[int]]:
+    """(rows, columns) of the largest frame/array in ``data``. Spark frames
+    are skipped because ``count()`` would trigger a job."""
+    best = (None, None)
+    for value in data.values():
+        shape = getattr(value, "shape", None)
+        if not isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)) or not shape:
+            continue
+        rows, cols = shape[0], shape[1] if len(shape) > 1 else 1
+        if best[0] is None or rows > best[0]:
+            best = (int(rows), int(cols))
+    return best
@@ -1,17 +1,56 @@
 # src/carprices/pipeline_registry.py
+import os
+from pathlib import Path
+
+from kedro.config import OmegaConfigLoader
+from kedro.framework.project import settings
 from kedro.pipeline import Pipeline
 from .pipelines.data_preparation.pipeline import create_pipeline as dp_pipeline
+from .pipelines.data_preparation.pipeline import create_incremental_pipeline as dp_incremental
+from .pipelines.data_preparation.pipeline import create_chunked_pipeline as dp_chunked
+from .pipelines.data_preparation.pipeline import create_spark_pipeline as dp_spark
+from .pipelines.model_input.pipeline import create_pipeline as split_pipeline
 from .pipelines.autogluon_pipelin.pipeline import create_pipeline as ag_pipeline
 from .pipelines.final_pipeline.pipeline import create_pipeline as final_pipeline
+from .pipelines.batch_scoring.pipeline import create_pipeline as batch_pipeline
+from .pipelines.feature_modes.pipeline import create_pipeline as feature_modes_pipeline
+from .pipelines.reporting.pipeline import create_pipeline as reporting_pipeline
+from .pipelines.learning_curve.pipeline import create_pipeline as learning_curve_pipeline
+
+def data_preparation_engine() -> str:
+    """
+    ``data_preparation.engine`` z konfiguracji projektu (conf/base, conf/local
+    albo środowisko z ``KEDRO_ENV``). Struktura pipeline'ów powstaje przed
+    przebiegiem, więc parametru nie da się zmienić przez ``--params``.
+    """
+    conf_path = Path(__file__).resolve().parents[2] / settings.CONF_SOURCE
+    loader = OmegaConfigLoader(str(conf_path), env=os.environ.get("KEDRO_ENV"),
+                               **settings.CONFIG_LOADER_ARGS)
+    return (loader["parameters"].get("data_preparation") or {}).get("engine", "pandas")
 
 def register_pipelines() -> dict[str, Pipeline]:
-    data_prep: Pipeline = dp_pipeline()
-    autogluon: Pipeline = ag_pipeline()
-    final_ens: Pipeline = final_pipeline()
+    # data_preparation.engine: spark podmienia wariant w data_preparation i __default__
+    data_prep: Pipeline = dp_spark() if data_preparation_engine() == "spark" else dp_pipeline()
+    # jeden wspólny podział train/test; oba treningi są od siebie niezależne,
+    # więc ``kedro run --runner ParallelRunner`` uruchamia je równolegle
+    # (domyślny SequentialRunner wykonuje je po kolei)
+    split: Pipeline = split_pipeline()
+    autogluon: Pipeline = split + ag_pipeline()
+    final_ens: Pipeline = split + final_pipeline()
+    batch_scoring: Pipeline = batch_pipeline()
+    reporting: Pipeline = reporting_pipeline()
     return {
         "__default__": data_prep + autogluon + final_ens,
         "data_preparation": data_prep,
+        "data_preparation_incremental": dp_incremental(),
+        "data_preparation_chunked": dp_chunked(),
+        "data_preparation_spark": dp_spark(),
         "autogluon_pipeline": autogluon,
         "final_pipeline": final_ens,
-        "all": data_prep + autogluon + final_ens,
+        "batch_scoring": batch_scoring,
+        "feature_mode_comparison": feature_modes_pipeline(),
+        "reporting": reporting,
+        "learning_curve": split + learning_curve_pipeline(),
+        # ``all`` to __default__ z raportami EDA
+        "all": data_prep + autogluon + final_ens + reporting,
     }
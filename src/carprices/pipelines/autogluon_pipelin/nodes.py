@@ -1,33 +1,20 @@
 import pandas as pd
 from autogluon.tabular import TabularPredictor
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
-
-def split_data(features_df: pd.DataFrame,
-               price_target: pd.DataFrame,
-               test_size: float = 0.2,
-               random_state: int = 42):
-    """
-    Dzieli dane na treningowe i testowe.
-    """
-    X_train, X_test, y_train, y_test = train_test_split(
-        features_df,
-        price_target['price'],
-        test_size=test_size,
-        random_state=random_state
-    )
-    return X_train, X_test, y_train, y_test
+from carprices.resources import cpu_budget
 
 
 def train_autogluon(X_train: pd.DataFrame,
                     y_train: pd.Series,
                     time_limit: int = 600,
                     eval_metric: str = 'rmse',
-                    save_path: str = "data/06_models/car_price_predictor") -> TabularPredictor:
+                    save_path: str = "data/06_models/car_price_predictor",
+                    cpu_share: float = 1.0) -> TabularPredictor:
     """
     Trenuje model AutoGluon używając tylko LightGBM, CatBoost i XGBoost,
     wyłączając sieci NN poprzez parametr excluded_model_types.
+    Trening używa ``cpu_budget(cpu_share)`` rdzeni.
     """
     train_data = X_train.copy()
     train_data['price'] = y_train
@@ -45,6 +32,7 @@ def train_autogluon(X_train: pd.DataFrame,
             'XGB': {}
         },
         excluded_model_types=['NN'],  # poprawny parametr
+        num_cpus=cpu_budget(cpu_share),
     )
     return predictor
 
@@ -0,0 +1,3 @@
+"""Batch scoring pipeline: chunked pricing of large listing files"""
+
+from .pipeline import create_pipeline  # NOQA
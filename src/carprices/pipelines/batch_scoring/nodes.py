@@ -0,0 +1,56 @@
+import logging
+import time
+
+import joblib
+import pandas as pd
+from autogluon.tabular import TabularPredictor
+
+from carprices.chunks import ChunkWriter, arrow_schema, iter_chunks
+from carprices.pipelines.data_preparation.nodes import RAW_DTYPES, raw_read_args
+from carprices.profiling import peak_rss_mb
+
+logger = logging.getLogger(__name__)
+
+
+def score_listings(input_path: str,
+                   output_path: str,
+                   preprocessors_path: str,
+                   predictor_path: str,
+                   chunksize: int = 200000) -> pd.DataFrame:
+    """
+    Wycenia ogłoszenia z dużego pliku porcjami: transformacja cech zapisanym
+    preprocessorem, ``predictor.predict`` i dopisanie wyników do pliku
+    wyjściowego. Pamięć zależy od ``chunksize``, a nie od rozmiaru wejścia.
+    Zwraca DataFrame ze statystykami przebiegu (wiersze/s, szczytowy RSS).
+    """
+    transformer = joblib.load(preprocessors_path)["transformer"]
+    predictor = TabularPredictor.load(predictor_path)
+
+    # stały schemat kolumn ogłoszenia i wyniku; typ z pierwszej porcji
+    # (np. int bez braków, kolumna samych NaN) nie pasowałby do kolejnych
+    schema = arrow_schema({
+        **{c: "str" if t == "category" else "float64" for c, t in RAW_DTYPES.items()},
+        "predicted_price": "float64",
+    })
+    rows = 0
+    chunks = 0
+    start = time.perf_counter()
+    with ChunkWriter(output_path, schema) as writer:
+        # ta sama projekcja co ``load_data``: bez kolumny indeksu i ``province``
+        for chunk in iter_chunks(input_path, chunksize, **raw_read_args()):
+            chunk = chunk[[c for c in RAW_DTYPES if c in chunk.columns]]
+            X = transformer.transform(chunk)
+            chunk["predicted_price"] = predictor.predict(X).to_numpy()
+            writer.write(chunk)
+            rows += len(chunk)
+            chunks += 1
+            elapsed = time.perf_counter() - start
+            logger.info("Scored %d rows (%.0f rows/s, peak RSS %.0f MB)",
+                        rows, rows / elapsed, peak_rss_mb())
+    elapsed = time.perf_counter() - start
+
+    return pd.DataFrame({
+        'metric': ['rows', 'chunks', 'seconds', 'rows_per_sec', 'peak_rss_mb'],
+        'value': [rows, chunks, elapsed, rows / elapsed if elapsed else 0.0,
+                  peak_rss_mb()]
+    })
@@ -0,0 +1,17 @@
+from kedro.pipeline import Pipeline, node
+from .nodes import score_listings
+
+
+def create_pipeline(**kwargs) -> Pipeline:
+    return Pipeline([
+        node(
+            func=score_listings,
+            inputs=["params:batch_scoring.input_path",
+                    "params:batch_scoring.output_path",
+                    "params:batch_scoring.preprocessors_path",
+                    "params:save_path_final",
+                    "params:batch_scoring.chunksize"],
+            outputs="batch_scoring_metrics",
+            name="score_listings_node"
+        )
+    ])
@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Sequence, Tuple
+
+NUM_COLS = ["age", "mileage", "mileage_per_year", "vol_engine", "log_mileage"]
+# pozycja w indeksie to wartość fuel_encoded
+_FUEL_INDEX = pd.Index(["Gasoline", "Diesel"])
+FEATURE_MODES = ("onehot", "categorical")
+
+
+def numerical_features(df: pd.DataFrame, current_year: int,
+                       out: np.ndarray = None) -> np.ndarray:
+    """
+    Nieskalowane cechy ``NUM_COLS`` jako blok (n_rows, 5) float64;
+    opcjonalnie zapisuje je do podanego bloku ``out``.
+    """
+    if out is None:
+        out = np.empty((len(df), len(NUM_COLS)), dtype=np.float64)
+    year = df["year"].to_numpy(dtype=np.float64)
+    mileage = df["mileage"].to_numpy(dtype=np.float64)
+    age = current_year - year
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[:, 2] = mileage / np.where(age == 0, np.nan, age)
+    out[:, 0] = age
+    out[:, 1] = mileage
+    out[:, 3] = df["vol_engine"].to_numpy(dtype=np.float64)
+    out[:, 4] = np.log1p(mileage)
+    return out
+
+
+class CarFeatureTransformer:
+    """
+    Dopasowany preprocessing cech samochodu, wspólny dla treningu i inferencji.
+
+    Przechowuje statystyki wyliczone w pipeline data_preparation (średnie
+    i odchylenia cech liczbowych, target encoding modelu, top marki/miasta,
+    klasy generacji) i w jednym, zwektoryzowanym przejściu buduje macierz
+    cech o stałym układzie kolumn.
+
+    ``feature_mode="onehot"`` koduje markę, miasto i generację jako kolumny
+    0/1, a ``"categorical"`` jako trzy kolumny ``category`` o stałych
+    kategoriach (``categories_``), które LightGBM/CatBoost obsługują natywnie.
+    """
+
+    # transformery zapisane przed wprowadzeniem trybów są w trybie one-hot
+    feature_mode = "onehot"
+
+    def __init__(self,
+                 scale_mean: Sequence[float],
+                 scale_std: Sequence[float],
+                 gen_classes: Sequence[str],
+                 model_te_map: Dict[str, float],
+                 top_marks: List[str],
+                 top_cities: List[str],
+                 current_year: int = 2025,
+                 feature_mode: str = "onehot"):
+        if feature_mode not in FEATURE_MODES:
+            raise ValueError(f"feature_mode must be one of {FEATURE_MODES}, "
+                             f"got {feature_mode!r}")
+        self.feature_mode = feature_mode
+        self.current_year = current_year
+        self.scale_mean_ = np.asarray(scale_mean, dtype=np.float64)
+        self.scale_std_ = np.asarray(scale_std, dtype=np.float64)
+
+        self.model_index_ = pd.Index(list(model_te_map.keys()))
+        self.model_te_values_ = np.fromiter(model_te_map.values(), dtype=np.float64,
+                                            count=len(model_te_map))
+        self.model_te_default_ = float(self.model_te_values_.mean()) \
+            if len(self.model_te_values_) else np.nan
+
+        self.top_marks = list(top_marks)
+        self.top_cities = list(top_cities)
+        self.mark_index_ = pd.Index(self.top_marks)
+        self.city_index_ = pd.Index(self.top_cities)
+
+        self.gen_classes_ = pd.Index(gen_classes)
+        self.gen_other_ = self.gen_classes_.get_loc("other") \
+            if "other" in self.gen_classes_ else -1
+
+        if feature_mode == "categorical":
+            self.feature_names_ = NUM_COLS + ["fuel_encoded", "model_te",
+                                              "mark", "city", "generation"]
+        else:
+            self.feature_names_ = (
+                NUM_COLS
+                + ["fuel_encoded", "model_te"]
+                + [f"mark_{m}" for m in self.top_marks + ["other_mark"]]
+                + [f"city_{c}" for c in self.top_cities + ["other_city"]]
+                + [f"gen_{i}" for i in range(len(self.gen_classes_))]
+            )
+        self._mark_offset = 0
+        self._city_offset = len(self.top_marks) + 1
+        self._gen_offset = self._city_offset + len(self.top_cities) + 1
+
+    @property
+    def n_features(self) -> int:
+        return len(self.feature_names_)
+
+    @property
+    def feature_dtypes_(self) -> Dict[str, str]:
+        n_num = len(NUM_COLS) + 2
+        other = "category" if self.feature_mode == "categorical" else "uint8"
+        return {c: ("float32" if i < n_num else other)
+                for i, c in enumerate(self.feature_names_)}
+
+    @property
+    def categories_(self) -> Dict[str, List[str]]:
+        """Stałe kategorie kolumn ``category`` (tryb categorical)."""
+        if self.feature_mode != "categorical":
+            return {}
+        return {"mark": self.top_marks + ["other_mark"],
+                "city": self.top_cities + ["other_city"],
+                "generation": list(self.gen_classes_)}
+
+    def _encode(self, df: pd.DataFrame) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Wypełnia prealokowany blok numeryczny (float64) i zwraca pozycje
+        marki, miasta i generacji w ich słownikach (-1: brak klasy).
+        """
+        n = len(df)
+        num = np.empty((n, len(NUM_COLS) + 2), dtype=np.float64)
+
+        numerical_features(df, self.current_year, out=num[:, :5])
+        num[:, :5] -= self.scale_mean_
+        num[:, :5] /= self.scale_std_
+
+        fuel_idx = _lookup(_FUEL_INDEX, df["fuel"])
+        num[:, 5] = np.where(fuel_idx >= 0, fuel_idx, np.nan)
+
+        model_idx = _lookup(self.model_index_, df["model"])
+        num[:, 6] = np.where(model_idx >= 0,
+                             self.model_te_values_[model_idx],
+                             self.model_te_default_)
+
+        mark_idx = _lookup(self.mark_index_, df["mark"])
+        mark_idx[mark_idx < 0] = len(self.top_marks)
+        city_idx = _lookup(self.city_index_, df["city"])
+        city_idx[city_idx < 0] = len(self.top_cities)
+        gen_idx = _lookup(self.gen_classes_, df["generation_name"],
+                          normalize=_normalize_generation)
+        gen_idx[gen_idx < 0] = self.gen_other_
+        return num, {"mark": mark_idx, "city": city_idx, "generation": gen_idx}
+
+    def unknown_flags(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Wiersze z modelem spoza target encodingu (``model_te_map``)
+        i z generacją kodowaną jako "other" albo spoza słownika.
+        """
+        model_idx = _lookup(self.model_index_, df["model"])
+        gen_idx = _lookup(self.gen_classes_, df["generation_name"],
+                          normalize=_normalize_generation)
+        return {"unknown_model": model_idx < 0,
+                "other_generation": (gen_idx < 0) | (gen_idx == self.gen_other_)}
+
+    def _onehot(self, codes: Dict[str, np.ndarray]) -> np.ndarray:
+        n = len(codes["mark"])
+        onehot = np.zeros((n, self._gen_offset + len(self.gen_classes_)), dtype=np.uint8)
+        rows = np.arange(n)
+        onehot[rows, self._mark_offset + codes["mark"]] = 1
+        onehot[rows, self._city_offset + codes["city"]] = 1
+        known = codes["generation"] >= 0
+        onehot[rows[known], self._gen_offset + codes["generation"][known]] = 1
+        return onehot
+
+    def transform_array(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Zwraca macierz cech (n_rows, n_features) jako jeden blok float64;
+        w trybie categorical kolumny kategorii zawierają kody (-1: brak).
+        """
+        num, codes = self._encode(df)
+        if self.feature_mode == "categorical":
+            return np.hstack([num, np.column_stack(list(codes.values()))])
+        return np.hstack([num, self._onehot(codes)])
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Buduje ramkę cech o układzie kolumn ``feature_names_`` i typach
+        ``feature_dtypes_`` (float32 dla cech liczbowych, uint8 dla one-hot
+        albo ``category`` w trybie categorical).
+        """
+        num, codes = self._encode(df)
+        n_num = num.shape[1]
+        numeric = pd.DataFrame(num.astype(np.float32),
+                               columns=self.feature_names_[:n_num], index=df.index)
+        if self.feature_mode == "categorical":
+            for col, categories in self.categories_.items():
+                numeric[col] = pd.Categorical.from_codes(codes[col], categories)
+            return numeric
+        return pd.concat([
+            numeric,
+            pd.DataFrame(self._onehot(codes),
+                         columns=self.feature_names_[n_num:], index=df.index),
+        ], axis=1)
+
+
+def _normalize_generation(values: pd.Series) -> pd.Series:
+    return values.fillna("unknown").astype(str) \
+        .str.replace(r"^gen-", "", regex=True)
+
+
+def _lookup(index: pd.Index, values: pd.Series, normalize=None) -> np.ndarray:
+    """
+    Pozycje wartości w ``index`` (-1 dla nieznanych). Dla kolumn
+    kategorycznych wyszukiwanie i normalizacja odbywają się na słowniku
+    kategorii, a wiersze dostają wynik przez kody.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = pd.Series(values.cat.categories)
+        if normalize is not None:
+            categories = normalize(categories)
+        positions = index.get_indexer(categories)
+        codes = values.cat.codes.to_numpy()
+        if not len(positions):
+            positions = np.full(1, -1)
+        if normalize is None:
+            return np.where(codes >= 0, positions[codes], -1)
+        missing = index.get_indexer(normalize(pd.Series([np.nan])))[0]
+        return np.where(codes >= 0, positions[codes], missing)
+    if normalize is not None:
+        values = normalize(values)
+    return index.get_indexer(values)
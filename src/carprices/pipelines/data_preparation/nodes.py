@@ -1,108 +1,327 @@
+import copy
+import logging
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler, LabelEncoder
 import joblib
-from typing import Tuple, Dict, List
+from typing import Callable, Tuple, Dict, List
+
+from carprices.chunks import ChunkWriter, arrow_schema, iter_chunks
+from carprices.profiling import peak_rss_mb
+from carprices.serving.comparables import build_index
+from carprices.serving.drift import DriftReference, build_reference
+from .features import CarFeatureTransformer
+from .stats import FeatureStats, SeenHashes, drop_seen_rows, row_hashes
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_COLS = ["mark", "model", "generation_name", "city"]
+
+# projekcja i typy przy wczytaniu surowego CSV: tekst jako kategorie, więc
+# operacje na napisach działają na słowniku kategorii, a nie na wierszach
+RAW_DTYPES = {
+    "mark": "category",
+    "model": "category",
+    "generation_name": "category",
+    "year": "float32",
+    "mileage": "float32",
+    "vol_engine": "float32",
+    "fuel": "category",
+    "city": "category",
+    "price": "float32",
+}
+
+# kolumny niesione w ``price_target`` obok ceny na potrzeby ewaluacji segmentów
+SEGMENT_COLUMNS = ["mark", "year"]
+
+CLEAN_DTYPES = {
+    "mark": "category",
+    "model": "category",
+    "generation_name": "category",
+    "city": "category",
+    "fuel": "category",
+    "fuel_type": "category",
+    "year": "int16",
+    "mileage": "int32",
+    "vol_engine": "float32",
+    "price": "float32",
+    "fuel_encoded": "int8",
+}
 
 def load_data(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path, encoding="utf-8")
-    df = df.drop(columns=[c for c in df.columns if c.lower().startswith("unnamed")],
-                 errors="ignore")
-    return df
+    return pd.read_csv(path, encoding="utf-8", **raw_read_args())
+
+def raw_read_args() -> Dict:
+    """
+    ``usecols``/``dtype`` dla ``read_csv``: pomija kolumnę indeksu
+    i ``province``, a kolumny tekstowe wczytuje jako kategorie.
+    """
+    return {"usecols": lambda c: c in RAW_DTYPES, "dtype": RAW_DTYPES}
+
+def drop_index_columns(df: pd.DataFrame) -> pd.DataFrame:
+    return df.drop(columns=[c for c in df.columns if c.lower().startswith("unnamed")],
+                   errors="ignore")
 
-def clean_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, LabelEncoder]:
-    df = df.copy()
-    df.drop(columns=["province"], errors="ignore", inplace=True)
+def filter_listings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Filtry ``clean_data`` i normalizacja ``generation_name`` (bez prefiksu
+    ``gen-``, brak jako ``unknown``). Duplikaty są usuwane dopiero potem,
+    w każdym trybie (pandas, porcjowy, przyrostowy, Spark), więc wiersze
+    różniące się tylko zapisem generacji (``gen-b8``/``b8``, brak/``unknown``)
+    to jedno ogłoszenie. Pierwotny ``clean_data`` porównywał surowe wartości;
+    skróty wierszy historii pochodzą z ``clean_df``, więc muszą widzieć
+    wartości po normalizacji.
+    """
+    df = df.drop(columns=["province"], errors="ignore")
+    keep = (df["fuel"].isin(["Gasoline", "Diesel"])
+            & df["price"].between(10000, 300000)
+            & df["mileage"].between(2000, 300000)
+            & df["year"].between(1990, 2025))
+    df = df[keep].copy()
     df["fuel_type"] = df["fuel"]
-    df = df[df["fuel_type"].isin(["Gasoline", "Diesel"])].copy()
-    df["fuel_encoded"] = df["fuel_type"].map({"Gasoline": 0, "Diesel": 1})
-    df = df[df["price"].between(10000, 300000)]
-    df = df[df["mileage"].between(2000, 300000)]
-    df = df[df["year"].between(1990, 2025)]
-    df.drop_duplicates(inplace=True)
-    df["generation_name"] = df["generation_name"].fillna("unknown")
-    df["generation_name"] = df["generation_name"].str.replace(r"^gen-", "",
-                                                              regex=True)
-    freq = df["generation_name"].value_counts(normalize=True)
-    rare = freq[freq < 0.01].index
-    df["generation_name_grouped"] = df["generation_name"].where(
-        ~df["generation_name"].isin(rare), "other"
-    )
-    le = LabelEncoder()
-    df["generation_name_encoded"] = le.fit_transform(
-        df["generation_name_grouped"]
-    )
-    df.drop(columns=["generation_name_grouped"], inplace=True)
-    return df, le
-
-def extract_target(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
-    target = df["price"].copy()
-    features = df.drop(columns=["price"])
-    return features, target
+    df["fuel_encoded"] = (df["fuel"] == "Diesel").astype("int8")
+    df["generation_name"] = map_categories(
+        df["generation_name"],
+        lambda c: c.str.replace(r"^gen-", "", regex=True), fill="unknown")
+    return df
 
-def create_numerical_features(
-    df: pd.DataFrame, current_year: int
-) -> pd.DataFrame:
-    df = df.copy()
-    df["age"] = current_year - df["year"]
-    df["mileage_per_year"] = df["mileage"] / df["age"].replace(0, np.nan)
-    df["log_mileage"] = np.log1p(df["mileage"])
+def map_categories(values: pd.Series, fn: Callable[[pd.Series], pd.Series],
+                   fill: str = None) -> pd.Series:
+    """
+    Stosuje ``fn`` do słownika kategorii zamiast do każdego wiersza;
+    kategorie, które po zmianie się pokrywają, są scalane. Brak wartości
+    zastępuje ``fill``. Kolumny tekstowe (object) są najpierw kategoryzowane.
+    """
+    values = values.astype("category")
+    mapped = fn(pd.Series(values.cat.categories.astype(object)))
+    inverse, uniques = pd.factorize(mapped)
+    codes = values.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, inverse[codes] if len(inverse) else -1, -1)
+    categories = pd.Index(uniques, dtype=object)
+    if fill is not None and (new_codes < 0).any():
+        if fill not in categories:
+            categories = categories.append(pd.Index([fill], dtype=object))
+        new_codes = np.where(new_codes >= 0, new_codes, categories.get_loc(fill))
+    result = pd.Categorical.from_codes(new_codes.astype(np.int32), categories)
+    return pd.Series(result, index=values.index, name=values.name)
+
+def cast_clean_dtypes(df: pd.DataFrame, categorical: bool = True) -> pd.DataFrame:
+    dtypes = {c: t for c, t in CLEAN_DTYPES.items() if c in df.columns}
+    if not categorical:
+        dtypes = {c: (object if t == "category" else t) for c, t in dtypes.items()}
+    return df.astype(dtypes)
+
+def clean_data(df: pd.DataFrame) -> pd.DataFrame:
+    df = filter_listings(df)
+    # po normalizacji generacji, jak deduplikacja po skrótach wierszy
+    df = df.drop_duplicates()
+    df = cast_clean_dtypes(df)
+    # kategorie z odfiltrowanych wierszy nie trafiają do clean_df
+    for col in df.select_dtypes("category"):
+        df[col] = df[col].cat.remove_unused_categories()
     return df
 
-def scale_features(
-    df: pd.DataFrame
-) -> Tuple[pd.DataFrame, StandardScaler]:
-    df = df.copy()
-    num_cols = ["age", "mileage", "mileage_per_year", "vol_engine", "log_mileage"]
-    scaler = StandardScaler().fit(df[num_cols])
-    df[num_cols] = scaler.transform(df[num_cols])
-    return df, scaler
+def compute_feature_stats(df: pd.DataFrame, current_year: int) -> FeatureStats:
+    stats = FeatureStats(current_year)
+    stats.seen_hashes = SeenHashes(row_hashes(df))
+    return stats.update(df)
 
-def encode_categoricals(
-    df: pd.DataFrame,
-    top_marks: int = 20,
-    top_cities: int = 30
-) -> Tuple[pd.DataFrame, Dict[str, float], List[str], List[str]]:
-    df = df.copy()
-    top_marks_list = df["mark"].value_counts().index[:top_marks].tolist()
-    df["mark_group"] = df["mark"].where(df["mark"].isin(top_marks_list),
-                                        "other_mark")
-    df = pd.get_dummies(df, columns=["mark_group"], prefix="mark")
-    top_cities_list = df["city"].value_counts().index[:top_cities].tolist()
-    df["city_group"] = df["city"].where(df["city"].isin(top_cities_list),
-                                        "other_city")
-    df = pd.get_dummies(df, columns=["city_group"], prefix="city")
-    model_te_map = df.groupby("model")["price"].mean().to_dict()
-    df["model_te"] = df["model"].map(model_te_map)
-    df = pd.get_dummies(df, columns=["generation_name_encoded"], prefix="gen")
-    return df, model_te_map, top_marks_list, top_cities_list
-
-def feature_engineering(
-    df: pd.DataFrame, current_year: int
+def update_feature_stats(
+    partitions: Dict[str, pd.DataFrame], stats: FeatureStats
+) -> Tuple[pd.DataFrame, FeatureStats]:
+    """
+    Czyści tylko nowe partycje ogłoszeń, odrzuca duplikaty historii
+    i dolicza je do statystyk. Koszt jest proporcjonalny do delty.
+    """
+    stats = copy.deepcopy(stats)
+    frames = [drop_index_columns(p) for p in partitions.values()]
+    if not frames:
+        return pd.DataFrame(columns=list(CLEAN_DTYPES)), stats
+    delta = cast_clean_dtypes(filter_listings(pd.concat(frames, ignore_index=True)))
+    delta = stats.deduplicate(delta)
+    logger.info("Ingested %d new listings (%d rows in history)",
+                len(delta), stats.n_rows + len(delta))
+    return delta, stats.update(delta)
+
+def compute_feature_stats_chunked(
+    path: str, chunksize: int, current_year: int
+) -> Tuple[FeatureStats, pd.DataFrame]:
+    """
+    Pierwsze przejście trybu porcjowego: filtruje każdą porcję, usuwa
+    duplikaty po skrótach wierszy i dolicza ją do globalnych statystyk.
+    Zwraca też zdeduplikowane kombinacje kolumn potrzebne do ``app_lookups``.
+    """
+    stats = FeatureStats(current_year)
+    lookup_parts = []
+    for chunk in iter_chunks(path, chunksize, **raw_read_args()):
+        chunk = drop_index_columns(chunk)
+        lookup_parts.append(chunk[LOOKUP_COLS].drop_duplicates().astype(object))
+        clean = stats.deduplicate(cast_clean_dtypes(filter_listings(chunk)))
+        stats.update(clean)
+        logger.info("Stats pass: %d clean rows so far", stats.n_rows)
+    lookup_source = pd.concat(lookup_parts, ignore_index=True).drop_duplicates()
+    return stats, lookup_source
+
+def transform_chunked(
+    path: str,
+    transformer: CarFeatureTransformer,
+    chunksize: int,
+    clean_path: str,
+    features_path: str,
+    target_path: str
 ) -> pd.DataFrame:
-    df_num = create_numerical_features(df, current_year)
-    df_scl, _ = scale_features(df_num)
-    df_enc, *_ = encode_categoricals(df_scl)
-    drop_cols = [
-        "year", "mileage", "mark", "model", "city", "generation_name",
-        "fuel", "fuel_type"
-    ]
-    return df_enc.drop(columns=drop_cols, errors="ignore")
+    """
+    Drugie przejście trybu porcjowego: czyści i deduplikuje porcje tak samo
+    jak pierwsze przejście, transformuje je dopasowanym transformerem
+    i dopisuje do plików Parquet. Pamięć zależy od ``chunksize``
+    (plus 8 B na skrót wiersza do deduplikacji), a nie od rozmiaru pliku.
+    """
+    seen = SeenHashes()
+    rows_in = rows_out = 0
+    start = time.perf_counter()
+    # typy Parquet z góry, a nie z pierwszej porcji (np. pusta generacja)
+    clean_dtypes = {c: "str" if t == "category" else t for c, t in CLEAN_DTYPES.items()}
+    target_dtypes = {"price": CLEAN_DTYPES["price"], "mark": "str",
+                     "year": CLEAN_DTYPES["year"]}
+    with ChunkWriter(clean_path, arrow_schema(clean_dtypes)) as clean_out, \
+            ChunkWriter(features_path, arrow_schema(transformer.feature_dtypes_)) as features_out, \
+            ChunkWriter(target_path, arrow_schema(target_dtypes)) as target_out:
+        for chunk in iter_chunks(path, chunksize, **raw_read_args()):
+            rows_in += len(chunk)
+            clean = cast_clean_dtypes(filter_listings(drop_index_columns(chunk)),
+                                      categorical=False)
+            clean = drop_seen_rows(clean, seen)
+            if not len(clean):
+                continue
+            features, target = extract_target(clean, transformer)
+            clean_out.write(clean)
+            features_out.write(features)
+            target_out.write(target)
+            rows_out += len(clean)
+    return pd.DataFrame({
+        'metric': ['rows_in', 'rows_out', 'seconds', 'peak_rss_mb'],
+        'value': [rows_in, rows_out, time.perf_counter() - start, peak_rss_mb()]
+    })
+
+def build_feature_transformer(
+    stats: FeatureStats,
+    top_marks: int = 20,
+    top_cities: int = 30,
+    feature_mode: str = "onehot"
+) -> CarFeatureTransformer:
+    return stats.to_transformer(top_marks, top_cities, feature_mode)
+
+def ingest_deltas(
+    partitions: Dict[str, pd.DataFrame], stats: FeatureStats, state_path: str
+) -> Tuple[pd.DataFrame, FeatureStats]:
+    """
+    ``update_feature_stats`` na stanie z ``state_path`` (statystyki bazy
+    i wcześniejszych przyrostów), a przy jego braku na ``feature_stats``
+    z pełnego przebiegu.
+    """
+    state = joblib.load(state_path) if Path(state_path).exists() else stats
+    return update_feature_stats(partitions, state)
+
+def append_delta_features(
+    delta: pd.DataFrame,
+    stats: FeatureStats,
+    transformer: CarFeatureTransformer,
+    state_path: str
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, pd.DataFrame]]:
+    """
+    Transformuje tylko deltę zapisanym (niezmienionym) transformerem i zwraca
+    cechy i ``price_target`` jako nowe partycje o wspólnym kluczu, więc
+    dopisane wiersze pozostają zgodne z ``preprocessors.pkl`` usługi.
+    Stan statystyk jest zapisywany dopiero tutaj: przebieg przerwany
+    wcześniej nie oznacza delty jako widzianej.
+    """
+    joblib.dump(stats, state_path)
+    if not len(delta):
+        return {}, {}
+    features, target = extract_target(delta, transformer)
+    # mikrosekundy w nazwie: dwa przebiegi w tej samej sekundzie nie
+    # nadpisują sobie partycji
+    key = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    return {key: features}, {key: target}
+
+def reset_increments(stats: FeatureStats, paths: List[str]):
+    """
+    Pełny przebieg liczy statystyki od zera z ``csv_path``, więc usuwa
+    przyrosty, stan statystyk trybu przyrostowego i ``CHECKPOINT`` delt:
+    następny przebieg przyrostowy dołoży wszystkie delty do nowej bazy.
+    """
+    for path in map(Path, paths):
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink(missing_ok=True)
+
+def extract_target(
+    df: pd.DataFrame, transformer: CarFeatureTransformer
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Cechy i ``price_target``: cena oraz ``SEGMENT_COLUMNS`` tych samych
+    wierszy (marka jako napis), żeby raporty błędów według segmentów nie
+    musiały dopasowywać wierszy ``clean_df`` po indeksie.
+    """
+    target = df[["price"] + SEGMENT_COLUMNS].astype({"mark": str})
+    features = transformer.transform(df)
+    return features, target
+
+def build_app_lookups(
+    df: pd.DataFrame, transformer: CarFeatureTransformer
+) -> Dict[str, object]:
+    # deduplikacja na kodach kategorii, dalej tylko małe ramki napisów
+    pairs = df[["mark", "model"]].dropna().drop_duplicates().astype(object) \
+        .sort_values(["mark", "model"])
+    gens = df[["model", "generation_name"]].dropna().drop_duplicates().astype(object)
+    gens["generation_name"] = gens["generation_name"].str.replace(r"^gen-", "",
+                                                                  regex=True)
+    gens = gens.drop_duplicates().sort_values(["model", "generation_name"])
+    return {
+        "marks": sorted(df["mark"].dropna().unique().tolist()),
+        "model_map": pairs.groupby("mark")["model"].agg(list).to_dict(),
+        "gen_map": gens.groupby("model")["generation_name"].agg(list).to_dict(),
+        "cities": sorted(df["city"].dropna().unique().tolist()),
+        "template_columns": transformer.feature_names_,
+    }
+
+def build_drift_reference(
+    df: pd.DataFrame, transformer: CarFeatureTransformer, options: Dict = None
+) -> DriftReference:
+    """
+    Szkice rozkładów danych treningowych, z którymi usługa porównuje
+    bieżące zapytania (``carprices.serving.drift``).
+    """
+    options = options or {}
+    return build_reference(df, transformer, bins=options.get("bins", 64),
+                           capacity=options.get("capacity", 256))
+
+def build_comparables_index(
+    df: pd.DataFrame,
+    transformer: CarFeatureTransformer,
+    path: str = "data/06_models/comparables"
+):
+    """
+    Indeks porównywalnych ogłoszeń dla aplikacji i usługi
+    (``carprices.serving.comparables``), zapisywany jako tablice ``.npy``.
+    """
+    build_index(df, transformer, path)
 
 def save_preprocessors(
-    scaler,
-    gen_le: LabelEncoder,
-    model_te_map: Dict[str,float],
-    top_marks: List[str],
-    top_cities: List[str],
+    transformer: CarFeatureTransformer,
     filepath: str = "data/06_models/preprocessors.pkl"
 ):
 
     artifacts = {
-        "scaler": scaler,
-        "gen_le": gen_le,
-        "model_te_map": model_te_map,
-        "top_marks": top_marks,
-        "top_cities": top_cities
+        "transformer": transformer
     }
     joblib.dump(artifacts, filepath)
+
+def load_preprocessors(
+    filepath: str = "data/06_models/preprocessors.pkl"
+) -> CarFeatureTransformer:
+    return joblib.load(filepath)["transformer"]
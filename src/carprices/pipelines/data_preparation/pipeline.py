@@ -2,11 +2,24 @@ from kedro.pipeline import Pipeline, node
 from .nodes import (
     load_data,
     clean_data,
-    create_numerical_features,
-    scale_features,
-    encode_categoricals,
+    compute_feature_stats,
+    build_feature_transformer,
+    build_app_lookups,
+    build_comparables_index,
+    build_drift_reference,
     save_preprocessors,
-    extract_target
+    load_preprocessors,
+    extract_target,
+    ingest_deltas,
+    append_delta_features,
+    reset_increments,
+    compute_feature_stats_chunked,
+    transform_chunked
+)
+from .spark_nodes import (
+    clean_data_spark,
+    compute_feature_stats_spark,
+    encode_features_spark
 )
 
 def create_pipeline(**kwargs) -> Pipeline:
@@ -20,44 +33,211 @@ def create_pipeline(**kwargs) -> Pipeline:
         node(
             func=clean_data,
             inputs="raw_df",
-            outputs=["clean_df","gen_label_encoder"],
+            outputs="clean_df",
             name="clean_data_node"
         ),
         node(
-            func=create_numerical_features,
+            func=compute_feature_stats,
             inputs=["clean_df","params:current_year"],
-            outputs="num_df",
-            name="create_numeric_node"
+            outputs="feature_stats",
+            name="compute_feature_stats_node"
+        ),
+        node(
+            func=build_feature_transformer,
+            inputs=["feature_stats","params:top_marks","params:top_cities",
+                    "params:feature_mode"],
+            outputs="feature_transformer",
+            name="build_feature_transformer_node"
+        ),
+        node(
+            func=build_app_lookups,
+            inputs=["raw_df","feature_transformer"],
+            outputs="app_lookups",
+            name="build_app_lookups_node"
         ),
         node(
-            func=scale_features,
-            inputs="num_df",
-            outputs=["scaled_df","scaler_obj"],
-            name="scale_features_node"
+            func=build_drift_reference,
+            inputs=["clean_df","feature_transformer","params:drift"],
+            outputs="drift_reference",
+            name="build_drift_reference_node"
         ),
         node(
-            func=encode_categoricals,
-            inputs=["scaled_df","params:top_marks","params:top_cities"],
-            outputs=["features_with_price",
-                     "model_te_map",
-                     "top_marks_list",
-                     "top_cities_list"],
-            name="encode_categoricals_node"
+            func=build_comparables_index,
+            inputs=["clean_df","feature_transformer","params:comparables.path"],
+            outputs=None,
+            name="build_comparables_index_node"
         ),
         node(
             func=save_preprocessors,
-            inputs=["scaler_obj",
-                    "gen_label_encoder",
-                    "model_te_map",
-                    "top_marks_list",
-                    "top_cities_list"],
+            inputs="feature_transformer",
             outputs=None,
             name="save_preprocessors_node"
         ),
+        node(
+            func=reset_increments,
+            inputs=["feature_stats","params:data_preparation.reset_paths"],
+            outputs=None,
+            name="reset_increments_node"
+        ),
         node(
             func=extract_target,
-            inputs="features_with_price",
+            inputs=["clean_df","feature_transformer"],
             outputs=["features_df","price_target"],
             name="extract_target_node"
         ),
-    ])
\ No newline at end of file
+    ])
+
+def create_incremental_pipeline(**kwargs) -> Pipeline:
+    """
+    Przyrostowe przygotowanie danych: czyści tylko nowe partycje z
+    ``data/01_raw/deltas``, aktualizuje statystyki enkoderów strumieniowo
+    (stan w ``data_preparation.incremental_stats_path``) i transformuje deltę
+    transformerem z ``preprocessors.pkl``, dopisując cechy i cenę jako nowe
+    partycje ``features_increments``/``target_increments``. Koszt zależy od
+    delty, nie od historii.
+
+    Transformer, ``app_lookups``, ``drift_reference`` i indeks porównywalnych
+    ogłoszeń pozostają z ostatniego pełnego przebiegu ``data_preparation``
+    (który też usuwa przyrosty).
+    """
+    return Pipeline([
+        node(
+            func=ingest_deltas,
+            inputs=["car_prices_deltas","feature_stats",
+                    "params:data_preparation.incremental_stats_path"],
+            outputs=["clean_delta","feature_stats_incremental"],
+            name="ingest_deltas_node"
+        ),
+        node(
+            func=load_preprocessors,
+            inputs="params:data_preparation.preprocessors_path",
+            outputs="saved_feature_transformer",
+            name="load_preprocessors_node"
+        ),
+        node(
+            func=append_delta_features,
+            inputs=["clean_delta","feature_stats_incremental",
+                    "saved_feature_transformer",
+                    "params:data_preparation.incremental_stats_path"],
+            outputs=["features_increments","target_increments"],
+            name="append_delta_features_node",
+            confirms="car_prices_deltas"
+        ),
+    ])
+
+def create_chunked_pipeline(**kwargs) -> Pipeline:
+    """
+    Porcjowy (out-of-core) wariant data_preparation dla danych większych niż
+    RAM: pierwsze przejście liczy globalne statystyki, drugie transformuje
+    porcje i dopisuje je do plików Parquet w ``data/02_intermediate``.
+    """
+    return Pipeline([
+        node(
+            func=compute_feature_stats_chunked,
+            inputs=["params:csv_path",
+                    "params:data_preparation.chunksize",
+                    "params:current_year"],
+            outputs=["feature_stats","lookup_source"],
+            name="compute_feature_stats_chunked_node"
+        ),
+        node(
+            func=build_feature_transformer,
+            inputs=["feature_stats","params:top_marks","params:top_cities",
+                    "params:feature_mode"],
+            outputs="feature_transformer",
+            name="build_feature_transformer_node"
+        ),
+        node(
+            func=build_app_lookups,
+            inputs=["lookup_source","feature_transformer"],
+            outputs="app_lookups",
+            name="build_app_lookups_node"
+        ),
+        node(
+            func=save_preprocessors,
+            inputs="feature_transformer",
+            outputs=None,
+            name="save_preprocessors_node"
+        ),
+        node(
+            func=reset_increments,
+            inputs=["feature_stats","params:data_preparation.reset_paths"],
+            outputs=None,
+            name="reset_increments_node"
+        ),
+        node(
+            func=transform_chunked,
+            inputs=["params:csv_path",
+                    "feature_transformer",
+                    "params:data_preparation.chunksize",
+                    "params:data_preparation.clean_path",
+                    "params:data_preparation.features_path",
+                    "params:data_preparation.target_path"],
+            outputs="chunked_preparation_metrics",
+            name="transform_chunked_node"
+        ),
+    ])
+
+def create_spark_pipeline(**kwargs) -> Pipeline:
+    """
+    Wariant data_preparation na Sparku (sesja startuje przy pierwszym węźle)
+    z tymi samymi wyjściami co wariant pandas, łącznie z ``drift_reference``
+    i indeksem porównywalnych ogłoszeń budowanymi z zebranego ``clean_df``.
+    """
+    return Pipeline([
+        node(
+            func=clean_data_spark,
+            inputs="params:csv_path",
+            outputs=["clean_sdf","lookup_source"],
+            name="clean_data_spark_node"
+        ),
+        node(
+            func=compute_feature_stats_spark,
+            inputs=["clean_sdf","params:current_year"],
+            outputs="feature_stats",
+            name="compute_feature_stats_spark_node"
+        ),
+        node(
+            func=build_feature_transformer,
+            inputs=["feature_stats","params:top_marks","params:top_cities",
+                    "params:feature_mode"],
+            outputs="feature_transformer",
+            name="build_feature_transformer_node"
+        ),
+        node(
+            func=build_app_lookups,
+            inputs=["lookup_source","feature_transformer"],
+            outputs="app_lookups",
+            name="build_app_lookups_node"
+        ),
+        node(
+            func=save_preprocessors,
+            inputs="feature_transformer",
+            outputs=None,
+            name="save_preprocessors_node"
+        ),
+        node(
+            func=reset_increments,
+            inputs=["feature_stats","params:data_preparation.reset_paths"],
+            outputs=None,
+            name="reset_increments_node"
+        ),
+        node(
+            func=encode_features_spark,
+            inputs=["clean_sdf","feature_transformer"],
+            outputs=["features_df","price_target","clean_df"],
+            name="encode_features_spark_node"
+        ),
+        node(
+            func=build_drift_reference,
+            inputs=["clean_df","feature_transformer","params:drift"],
+            outputs="drift_reference",
+            name="build_drift_reference_node"
+        ),
+        node(
+            func=build_comparables_index,
+            inputs=["clean_df","feature_transformer","params:comparables.path"],
+            outputs=None,
+            name="build_comparables_index_node"
+        ),
+    ])
@@ -0,0 +1,156 @@
+"""Spark-owy wariant węzłów data_preparation (pipeline ``data_preparation_spark``).
+
+Filtrowanie, deduplikacja i agregaty statystyk (momenty cech liczbowych,
+liczności marek/miast/generacji, sumy cen per model) liczą się rozproszenie;
+kodowanie cech wykonuje ten sam ``CarFeatureTransformer`` przez
+``mapInPandas``, więc wynik jest identyczny z wariantem pandas (z dokładnością
+do kolejności wierszy).
+"""
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from pyspark.sql import DataFrame
+from pyspark.sql import functions as F
+from pyspark.sql import types as T
+
+from carprices.spark import get_spark
+
+from .features import CarFeatureTransformer, NUM_COLS
+from .nodes import LOOKUP_COLS, SEGMENT_COLUMNS, cast_clean_dtypes
+from .stats import FeatureStats, SeenHashes, row_hashes
+
+# identyfikator wiersza nadawany przed cache: Spark nie gwarantuje tej samej
+# kolejności wierszy w dwóch akcjach, więc cechy i clean_df są po nim sortowane
+ROW_ID = "_row_id"
+
+
+def clean_data_spark(path: str) -> Tuple[DataFrame, pd.DataFrame]:
+    """
+    Wczytuje surowy CSV do Sparka i czyści go tak samo jak ``clean_data``.
+    Zwraca zcache'owany Spark DataFrame oraz małą ramkę unikalnych
+    kombinacji kolumn dla ``app_lookups``.
+    """
+    raw = get_spark().read.csv(path, header=True, inferSchema=True, encoding="utf-8")
+    raw = raw.drop(*[c for c in raw.columns
+                     if c.lower().startswith("unnamed") or c == "_c0"])
+    lookup_source = raw.select(*LOOKUP_COLS).distinct().toPandas()
+
+    df = (
+        raw.drop("province")
+        .withColumn("fuel_type", F.col("fuel"))
+        .filter(F.col("fuel_type").isin("Gasoline", "Diesel"))
+        .withColumn("fuel_encoded",
+                    F.when(F.col("fuel_type") == "Diesel", 1).otherwise(0))
+        .filter(F.col("price").between(10000, 300000))
+        .filter(F.col("mileage").between(2000, 300000))
+        .filter(F.col("year").between(1990, 2025))
+        .withColumn("generation_name", F.regexp_replace(
+            F.coalesce(F.col("generation_name"), F.lit("unknown")), "^gen-", ""))
+        .dropDuplicates()
+        .withColumn(ROW_ID, F.monotonically_increasing_id())
+    )
+    return df.cache(), lookup_source
+
+
+def _numeric_columns(current_year: int) -> list:
+    age = F.lit(current_year) - F.col("year")
+    mileage = F.col("mileage").cast("double")
+    exprs = {
+        "age": age,
+        "mileage": mileage,
+        "mileage_per_year": F.when(age != 0, mileage / age),
+        "vol_engine": F.col("vol_engine").cast("double"),
+        "log_mileage": F.log1p(mileage),
+    }
+    return [exprs[c].cast("double") for c in NUM_COLS]
+
+
+def _counts(df: DataFrame, column: str) -> pd.Series:
+    counts = df.filter(F.col(column).isNotNull()).groupBy(column).count().toPandas()
+    return pd.Series(counts["count"].to_numpy(dtype=np.float64),
+                     index=pd.Index(counts[column], dtype=object))
+
+
+def compute_feature_stats_spark(df: DataFrame, current_year: int) -> FeatureStats:
+    """
+    Odpowiednik ``compute_feature_stats`` liczony agregatami Sparka.
+    """
+    stats = FeatureStats(current_year)
+    numeric = _numeric_columns(current_year)
+    aggs = []
+    for i, col in enumerate(numeric):
+        aggs += [F.count(col).alias(f"n{i}"), F.avg(col).alias(f"mean{i}"),
+                 F.var_pop(col).alias(f"var{i}")]
+    row = df.agg(*aggs).first()
+    stats.n = np.array([row[f"n{i}"] for i in range(len(NUM_COLS))], dtype=np.float64)
+    stats.mean = np.array([row[f"mean{i}"] or 0.0 for i in range(len(NUM_COLS))])
+    stats.m2 = np.array([(row[f"var{i}"] or 0.0) * row[f"n{i}"]
+                         for i in range(len(NUM_COLS))])
+
+    by_model = (df.filter(F.col("model").isNotNull()).groupBy("model")
+                .agg(F.sum(F.col("price").cast("double")).alias("sum"),
+                     F.count("price").alias("count"))
+                .toPandas().set_index("model"))
+    by_model.index = by_model.index.astype(object)
+    stats.model_price_sum = by_model["sum"].astype(np.float64)
+    stats.model_count = by_model["count"].astype(np.float64)
+    stats.mark_counts = _counts(df, "mark")
+    stats.city_counts = _counts(df, "city")
+    stats.gen_counts = _counts(df, "generation_name")
+
+    def hash_rows(batches):
+        for batch in batches:
+            yield pd.DataFrame({"h": row_hashes(batch).view(np.int64)})
+
+    hashes = df.mapInPandas(hash_rows, "h long").toPandas()["h"].to_numpy()
+    stats.seen_hashes = SeenHashes(hashes.view(np.uint64))
+    return stats
+
+
+def encode_features_spark(
+    df: DataFrame, transformer: CarFeatureTransformer
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Koduje cechy rozproszenie przez ``mapInPandas`` i zbiera wyniki
+    (kompaktowe float32/int8) do ``features_df``, ``price_target``
+    i ``clean_df`` dla pojedynczego węzła treningowego. Obie zebrane ramki
+    są sortowane po ``ROW_ID``, więc i-ty wiersz cech, ceny i ``clean_df``
+    to to samo ogłoszenie.
+    """
+    dtypes = transformer.feature_dtypes_
+    spark_types = {"float32": T.FloatType(), "uint8": T.ByteType(),
+                   "category": T.StringType()}
+    schema = T.StructType(
+        [T.StructField(c, spark_types[t]) for c, t in dtypes.items()]
+        + [T.StructField("price", T.DoubleType()), T.StructField("_mark", T.StringType()),
+           T.StructField("_year", T.ShortType()), T.StructField(ROW_ID, T.LongType())]
+    )
+    # kategorie wracają z Sparka jako napisy; stałe słowniki z transformera
+    dtypes = {c: pd.CategoricalDtype(transformer.categories_[c]) if t == "category"
+              else t for c, t in dtypes.items()}
+
+    def encode(batches):
+        for batch in batches:
+            features = transformer.transform(batch)
+            features = features.astype({c: "int8" if t == "uint8" else object
+                                        for c, t in transformer.feature_dtypes_.items()
+                                        if t != "float32"})
+            features["price"] = batch["price"].to_numpy(dtype=np.float64)
+            # segmenty w tym samym wierszu co cechy, niezależnie od kolejności;
+            # prefiks, bo tryb categorical ma własną kolumnę cechy ``mark``
+            features["_mark"] = batch["mark"].astype(str).to_numpy()
+            features["_year"] = batch["year"].to_numpy(dtype=np.int16)
+            features[ROW_ID] = batch[ROW_ID].to_numpy()
+            yield features
+
+    encoded = df.mapInPandas(encode, schema).toPandas() \
+        .sort_values(ROW_ID, ignore_index=True)
+    segments = [f"_{c}" for c in SEGMENT_COLUMNS]
+    price_target = encoded[["price"] + segments].astype({"price": "float32"}) \
+        .rename(columns=dict(zip(segments, SEGMENT_COLUMNS)))
+    features_df = encoded.drop(columns=["price", ROW_ID] + segments).astype(dtypes)
+    clean_df = cast_clean_dtypes(df.toPandas().sort_values(ROW_ID, ignore_index=True)
+                                 .drop(columns=ROW_ID))
+    df.unpersist()
+    return features_df, price_target, clean_df
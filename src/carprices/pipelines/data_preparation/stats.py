@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+from .features import CarFeatureTransformer, NUM_COLS, numerical_features
+
+HASH_COLS = ["mark", "model", "generation_name", "year", "mileage",
+             "vol_engine", "fuel", "city", "price"]
+RARE_GENERATION_FREQ = 0.01
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    64-bitowe skróty wierszy (po ``HASH_COLS``) niezależne od typów kolumn,
+    używane do wykrywania duplikatów bez trzymania całej historii w pamięci.
+    """
+    frame = df[HASH_COLS].astype({c: "float64" for c in
+                                  ["year", "mileage", "vol_engine", "price"]})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+class SeenHashes:
+    """
+    Zbiór 64-bitowych skrótów wierszy jako posortowane przebiegi (jak w drzewie
+    LSM): każda porcja dokłada nowy przebieg, a przebiegi podobnej wielkości są
+    scalane, więc jest ich O(log n), a każdy skrót jest scalany O(log n) razy.
+    Cała historia kosztuje O(n log n) zamiast O(n²/porcja) przy ``np.union1d``
+    z pełnym zbiorem po każdej porcji; pamięć to 8 B na unikalny wiersz.
+    """
+
+    def __init__(self, hashes: np.ndarray = None):
+        self._runs = []
+        if hashes is not None:
+            self.add(hashes)
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self._runs)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """Maska skrótów obecnych w zbiorze (wyszukiwanie binarne w przebiegach)."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            position = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[position] == hashes
+        return found
+
+    def add(self, hashes: np.ndarray) -> None:
+        """Dodaje skróty, których jeszcze nie ma w zbiorze."""
+        run = np.unique(np.asarray(hashes, dtype=np.uint64))
+        run = run[~self.contains(run)]
+        if not len(run):
+            return
+        self._runs.append(run)
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            newer, older = self._runs.pop(), self._runs.pop()
+            # dwa posortowane przebiegi: sortowanie stabilne (timsort) scala je w O(n)
+            self._runs.append(np.sort(np.concatenate([older, newer]), kind="stable"))
+
+    def to_array(self) -> np.ndarray:
+        """Wszystkie skróty jako jedna posortowana tablica."""
+        if not self._runs:
+            return np.empty(0, dtype=np.uint64)
+        return np.sort(np.concatenate(self._runs), kind="stable")
+
+
+def drop_seen_rows(df: pd.DataFrame, seen: SeenHashes) -> pd.DataFrame:
+    """
+    Zostawia pierwsze wystąpienie każdego wiersza, którego skrótu nie ma
+    w ``seen``, i dopisuje skróty zostawionych wierszy do ``seen``.
+    """
+    hashes = row_hashes(df)
+    _, first = np.unique(hashes, return_index=True)
+    keep = np.zeros(len(df), dtype=bool)
+    keep[first] = True
+    keep &= ~seen.contains(hashes)
+    seen.add(hashes[keep])
+    return df[keep]
+
+
+class FeatureStats:
+    """
+    Statystyki potrzebne do dopasowania ``CarFeatureTransformer``, aktualizowane
+    strumieniowo: bieżąca średnia/wariancja cech liczbowych (scalanie Chana),
+    sumy i liczności ceny per model, liczności marek, miast i generacji oraz
+    skróty już widzianych wierszy. ``update`` kosztuje O(len(df)), a stan
+    zależy tylko od liczby kategorii i wierszy historii (8 B/wiersz).
+    """
+
+    def __init__(self, current_year: int = 2025):
+        self.current_year = current_year
+        self.n = np.zeros(len(NUM_COLS))
+        self.mean = np.zeros(len(NUM_COLS))
+        self.m2 = np.zeros(len(NUM_COLS))
+        self.model_price_sum = pd.Series(dtype="float64")
+        self.model_count = pd.Series(dtype="float64")
+        self.mark_counts = pd.Series(dtype="float64")
+        self.city_counts = pd.Series(dtype="float64")
+        self.gen_counts = pd.Series(dtype="float64")
+        self.seen_hashes = SeenHashes()
+
+    def __setstate__(self, state: dict) -> None:
+        # statystyki zapisane przed SeenHashes trzymały skróty w tablicy
+        if isinstance(state.get("seen_hashes"), np.ndarray):
+            state["seen_hashes"] = SeenHashes(state["seen_hashes"])
+        self.__dict__.update(state)
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.gen_counts.sum())
+
+    def deduplicate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Usuwa wiersze powtórzone w ``df`` lub widziane we wcześniejszych
+        porcjach i zapamiętuje skróty nowych wierszy.
+        """
+        return drop_seen_rows(df, self.seen_hashes)
+
+    def update(self, df: pd.DataFrame) -> "FeatureStats":
+        """
+        Dolicza oczyszczone wiersze ``df`` do statystyk.
+        """
+        if not len(df):
+            return self
+        x = numerical_features(df, self.current_year)
+        valid = ~np.isnan(x)
+        n_b = valid.sum(axis=0).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_b = np.where(valid, x, 0.0).sum(axis=0) / n_b
+            m2_b = np.where(valid, (x - mean_b) ** 2, 0.0).sum(axis=0)
+        self._merge_moments(n_b, np.nan_to_num(mean_b), m2_b)
+
+        by_model = df["price"].astype("float64") \
+            .groupby(df["model"], observed=True).agg(["sum", "count"])
+        by_model.index = by_model.index.astype(object)
+        self.model_price_sum = self.model_price_sum.add(by_model["sum"], fill_value=0)
+        self.model_count = self.model_count.add(by_model["count"], fill_value=0)
+        self.mark_counts = _add_counts(self.mark_counts, df["mark"])
+        self.city_counts = _add_counts(self.city_counts, df["city"])
+        self.gen_counts = _add_counts(self.gen_counts, df["generation_name"])
+        return self
+
+    def merge(self, other: "FeatureStats") -> "FeatureStats":
+        """
+        Scala statystyki policzone na rozłącznych porcjach danych.
+        """
+        self._merge_moments(other.n, other.mean, other.m2)
+        for attr in ["model_price_sum", "model_count", "mark_counts",
+                     "city_counts", "gen_counts"]:
+            setattr(self, attr, getattr(self, attr).add(getattr(other, attr),
+                                                        fill_value=0))
+        self.seen_hashes.add(other.seen_hashes.to_array())
+        return self
+
+    def _merge_moments(self, n_b: np.ndarray, mean_b: np.ndarray,
+                       m2_b: np.ndarray) -> None:
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.mean = np.where(n > 0, self.mean + delta * n_b / n, 0.0)
+            self.m2 = np.where(n > 0, self.m2 + m2_b + delta ** 2 * self.n * n_b / n,
+                               0.0)
+        self.n = n
+
+    def gen_classes(self) -> list:
+        freq = self.gen_counts / self.gen_counts.sum()
+        rare = freq < RARE_GENERATION_FREQ
+        classes = set(freq.index[~rare])
+        if rare.any():
+            classes.add("other")
+        return sorted(classes)
+
+    def to_transformer(self, top_marks: int = 20, top_cities: int = 30,
+                       feature_mode: str = "onehot") -> CarFeatureTransformer:
+        var = np.where(self.n > 0, self.m2 / np.maximum(self.n, 1), 0.0)
+        std = np.sqrt(var)
+        std[std < 10 * np.finfo(np.float64).eps] = 1.0
+        model_te_map = (self.model_price_sum / self.model_count).to_dict()
+        return CarFeatureTransformer(
+            self.mean, std, self.gen_classes(), model_te_map,
+            _top(self.mark_counts, top_marks), _top(self.city_counts, top_cities),
+            self.current_year, feature_mode,
+        )
+
+
+def _add_counts(counts: pd.Series, values: pd.Series) -> pd.Series:
+    batch = values.value_counts()
+    batch.index = batch.index.astype(object)
+    return counts.add(batch[batch > 0].astype("float64"), fill_value=0)
+
+
+def _top(counts: pd.Series, k: int) -> list:
+    # remisy rozstrzygane alfabetycznie, niezależnie od kolejności porcji
+    order = np.lexsort((counts.index.astype(str), -counts.to_numpy()))
+    return counts.index[order[:k]].tolist()
@@ -0,0 +1,3 @@
+"""Feature mode comparison: one-hot vs native categorical features"""
+
+from .pipeline import create_pipeline  # NOQA
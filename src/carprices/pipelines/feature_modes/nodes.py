@@ -0,0 +1,78 @@
+import shutil
+import time
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from carprices.pipelines.autogluon_pipelin.nodes import evaluate_model, train_autogluon
+from carprices.pipelines.data_preparation.features import FEATURE_MODES
+from carprices.pipelines.data_preparation.stats import FeatureStats
+from carprices.pipelines.model_input.nodes import split_data
+from carprices.profiling import PeakMemorySampler
+
+
+def compare_feature_modes(clean_df: pd.DataFrame,
+                          stats: FeatureStats,
+                          top_marks: int,
+                          top_cities: int,
+                          test_size: float,
+                          random_state: int,
+                          options: Dict) -> pd.DataFrame:
+    """
+    Trenuje ten sam zestaw modeli AutoGluon (``train_autogluon``) na cechach
+    one-hot i na natywnych kolumnach ``category``, na identycznym podziale
+    train/test. Dla każdego trybu raportuje szerokość i rozmiar macierzy
+    cech, czas i szczytowy RSS treningu, latencję predykcji pojedynczego
+    ogłoszenia (z budową cech) i batcha oraz metryki na zbiorze testowym.
+    """
+    if options.get("sample_rows"):
+        clean_df = clean_df.sample(min(options["sample_rows"], len(clean_df)),
+                                   random_state=random_state)
+    target = clean_df[["price"]]
+    rows = []
+    for mode in FEATURE_MODES:
+        transformer = stats.to_transformer(top_marks, top_cities, mode)
+        features = transformer.transform(clean_df)
+        X_train, X_test, y_train, y_test = split_data(features, target,
+                                                      test_size, random_state)
+        save_path = Path(options["path"]) / mode
+        shutil.rmtree(save_path, ignore_errors=True)
+
+        memory = PeakMemorySampler().start()
+        start = time.perf_counter()
+        predictor = train_autogluon(X_train, y_train, options["time_limit"],
+                                    options.get("eval_metric", "rmse"), str(save_path),
+                                    options.get("cpu_share", 1.0))
+        fit_s = time.perf_counter() - start
+        peak = memory.stop()
+
+        metrics = evaluate_model(predictor, X_test, y_test).set_index("metric")["value"]
+        listing = clean_df.loc[[X_test.index[0]]]
+        batch = X_test.iloc[:1000]
+        rows.append({
+            "feature_mode": mode,
+            "n_features": features.shape[1],
+            "features_mb": features.memory_usage(deep=True).sum() / 2 ** 20,
+            "fit_s": fit_s,
+            "fit_peak_rss_delta_mb": peak - memory.start_mb,
+            "model_best": predictor.model_best,
+            "single_listing_ms": _latency_ms(
+                lambda: predictor.predict(transformer.transform(listing))),
+            "batch_1000_ms": _latency_ms(lambda: predictor.predict(batch), repeat=5),
+            "rmse": metrics["RMSE"],
+            "mae": metrics["MAE"],
+            "r2": metrics["R2"],
+        })
+    return pd.DataFrame(rows).round(4)
+
+
+def _latency_ms(fn, repeat: int = 20) -> float:
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1e3)
@@ -0,0 +1,15 @@
+from kedro.pipeline import Pipeline, node
+from .nodes import compare_feature_modes
+
+
+def create_pipeline(**kwargs) -> Pipeline:
+    return Pipeline([
+        node(
+            func=compare_feature_modes,
+            inputs=["clean_df", "feature_stats", "params:top_marks", "params:top_cities",
+                    "params:test_size", "params:random_state",
+                    "params:feature_mode_comparison"],
+            outputs="feature_mode_comparison",
+            name="compare_feature_modes_node"
+        )
+    ])
@@ -0,0 +1,224 @@
+"""Eksport ensemble'u AutoGluon do ``CompiledEnsemble`` (tylko NumPy).
+
+Obsługiwane są modele LightGBM, XGBoost i CatBoost na cechach liczbowych
+(bez kategorii), bagging/stacking ``StackerEnsembleModel`` oraz
+``WeightedEnsembleModel``. Inne konstrukcje zgłaszają
+``CompileError``, a zgodność z ``predictor.predict`` sprawdza węzeł
+``compile_final_ensemble``.
+"""
+import json
+import os
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+from autogluon.tabular import TabularPredictor
+
+from carprices.serving.compiled import (
+    MISSING_NAN,
+    MISSING_NONE,
+    MISSING_ZERO,
+    CompiledEnsemble,
+    CompiledModel,
+    CompileError,
+    ObliviousForest,
+    TreeForest,
+)
+
+_LGB_MISSING = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+_SUPPORTED_GENERATORS = {"AsTypeFeatureGenerator", "FillNaFeatureGenerator",
+                         "IdentityFeatureGenerator", "DropUniqueFeatureGenerator",
+                         "DropDuplicatesFeatureGenerator"}
+
+
+def compile_predictor(predictor: TabularPredictor, model: str = None) -> CompiledEnsemble:
+    """
+    Kompiluje ``model`` (domyślnie wersję z refitu ``predictor.model_best``)
+    do ``CompiledEnsemble``.
+    """
+    if model is None:
+        model = predictor.model_refit_map().get(predictor.model_best, predictor.model_best)
+    if predictor.problem_type != "regression":
+        raise CompileError(f"problem_type {predictor.problem_type}")
+
+    input_columns, features, source, bool_true = _compile_feature_generator(predictor)
+    compiler = _EnsembleCompiler(predictor._trainer, features)
+    compiler.compile(model)
+    return CompiledEnsemble(input_columns, source, bool_true, compiler.models,
+                            model_name=model)
+
+
+def _compile_feature_generator(predictor: TabularPredictor):
+    generator = predictor._learner.feature_generator
+    stages = [g for stage in generator.generators for g in stage]
+    unsupported = {type(g).__name__ for g in stages} - _SUPPORTED_GENERATORS
+    if unsupported:
+        raise CompileError(f"feature generators {sorted(unsupported)}")
+
+    as_type = next((g for g in stages if type(g).__name__ == "AsTypeFeatureGenerator"), None)
+    bool_features = as_type._bool_features if as_type is not None else {}
+    input_columns = list(generator.features_in)
+    features = list(generator.features_out)
+    source = [input_columns.index(f) for f in features]
+    try:
+        bool_true = [float(bool_features[f]) if f in bool_features else np.nan
+                     for f in features]
+    except (TypeError, ValueError) as e:  # np. dwuwartościowa kolumna z napisami
+        raise CompileError(f"non-numeric boolean feature ({e})") from e
+    return input_columns, features, source, bool_true
+
+
+class _EnsembleCompiler:
+    """Kompiluje modele rekurencyjnie, najpierw modele bazowe stackingu."""
+
+    def __init__(self, trainer, features: List[str]):
+        self.trainer = trainer
+        # kolumny macierzy roboczej: cechy po generatorach, potem wyniki modeli
+        self.columns: Dict[str, int] = {f: i for i, f in enumerate(features)}
+        self.models: List[CompiledModel] = []
+
+    def compile(self, name: str) -> int:
+        if name in self.columns:
+            return self.columns[name]
+        model = self.trainer.load_model(name)
+        stack_map = getattr(model, "stack_column_prefix_to_model_map", {})
+        stack_columns = {col: self.compile(base) for col, base in stack_map.items()}
+        children = [model.load_child(child) for child in model.models]
+
+        if type(model).__name__ == "WeightedEnsembleModel":
+            (child,) = children
+            columns = [stack_columns[f] for f in child.features]
+            compiled = CompiledModel(name, columns, weights=child.model.weights_)
+        else:
+            features = children[0].features
+            if any(child.features != features for child in children):
+                raise CompileError(f"{name}: bagged children with different features")
+            columns = [stack_columns[f] if f in stack_columns else self.columns[f]
+                       for f in features]
+            compiled = CompiledModel(name, columns, forests=[_compile_child(c) for c in children])
+
+        self.columns[name] = len(self.columns)
+        self.models.append(compiled)
+        return self.columns[name]
+
+
+def _compile_child(child):
+    kind = type(child).__name__
+    if kind == "LGBModel":
+        return _lightgbm_forest(child.model)
+    if kind == "XGBoostModel":
+        if child._ohe_generator.cat_cols:
+            raise CompileError("XGBoost with categorical features")
+        return _xgboost_forest(child.model.get_booster())
+    if kind == "CatBoostModel":
+        return _catboost_forest(child.model)
+    raise CompileError(f"model type {kind}")
+
+
+def _flatten(trees: List[dict], split, **kwargs) -> TreeForest:
+    """
+    Spłaszcza drzewa podane jako zagnieżdżone słowniki; ``split(node)``
+    zwraca (feature, threshold, default_left, missing, left, right) albo
+    None dla liścia i wtedy ``node["value"]`` to wartość liścia. ``kwargs``
+    trafiają do ``TreeForest``.
+    """
+    cols = {k: [] for k in ["feature", "threshold", "left", "right",
+                            "default_left", "missing", "value"]}
+    roots, depth = [], 0
+
+    def add(node, level):
+        nonlocal depth
+        i = len(cols["feature"])
+        for values in cols.values():
+            values.append(0)
+        parsed = split(node)
+        if parsed is None:
+            depth = max(depth, level)
+            cols["feature"][i], cols["left"][i], cols["right"][i] = -1, i, i
+            cols["value"][i] = node["value"]
+            return i
+        feature, threshold, default_left, missing, left, right = parsed
+        cols["feature"][i], cols["threshold"][i] = feature, threshold
+        cols["default_left"][i], cols["missing"][i] = default_left, missing
+        cols["left"][i] = add(left, level + 1)
+        cols["right"][i] = add(right, level + 1)
+        return i
+
+    for tree in trees:
+        roots.append(add(tree, 0))
+    return TreeForest(roots=roots, depth=depth, **cols, **kwargs)
+
+
+def _lightgbm_forest(booster) -> TreeForest:
+    dump = booster.dump_model()
+    if dump["num_tree_per_iteration"] != 1:
+        raise CompileError("multi-output LightGBM model")
+
+    def split(node):
+        if "leaf_value" in node:
+            node["value"] = node["leaf_value"]
+            return None
+        if node["decision_type"] != "<=":
+            raise CompileError("LightGBM categorical split")
+        return (node["split_feature"], node["threshold"], node["default_left"],
+                _LGB_MISSING[node["missing_type"]], node["left_child"], node["right_child"])
+
+    forest = _flatten([t["tree_structure"] for t in dump["tree_info"]], split)
+    if dump.get("average_output"):
+        forest.value /= len(forest.roots)
+    return forest
+
+
+def _xgboost_forest(booster) -> TreeForest:
+    model = json.loads(booster.save_raw("json"))["learner"]
+    if model["gradient_booster"]["name"] != "gbtree":
+        raise CompileError(f"XGBoost booster {model['gradient_booster']['name']}")
+    trees = model["gradient_booster"]["model"]["trees"]
+    best = booster.attributes().get("best_iteration")
+    if best is not None:
+        trees = trees[:int(best) + 1]
+
+    def as_nested(tree, i=0):
+        if tree["left_children"][i] == -1:
+            return {"value": tree["split_conditions"][i]}
+        # AutoGluon podaje XGBoost macierz rzadką: brak wartości to 0 i NaN;
+        # progi XGBoost to float32 zapisane dziesiętnie
+        return {"split": (tree["split_indices"][i], float(np.float32(tree["split_conditions"][i])),
+                          bool(tree["default_left"][i]), MISSING_ZERO,
+                          as_nested(tree, tree["left_children"][i]),
+                          as_nested(tree, tree["right_children"][i]))}
+
+    base_score = float(str(model["learner_model_param"]["base_score"]).strip("[]"))
+    return _flatten([as_nested(t) for t in trees], lambda node: node.get("split"),
+                    strict=True, bias=base_score)
+
+
+def _catboost_forest(model) -> ObliviousForest:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.json")
+        model.save_model(path, format="json")
+        with open(path) as f:
+            dump = json.load(f)
+    info = dump["features_info"]
+    if info.get("categorical_features") or info.get("ctrs"):
+        raise CompileError("CatBoost categorical features")
+    float_features = {f["feature_index"]: f for f in info["float_features"]}
+
+    trees = dump["oblivious_trees"]
+    depth = max(len(t["splits"]) for t in trees)
+    feature = np.zeros((len(trees), depth), dtype=np.int32)
+    border = np.full((len(trees), depth), np.inf)
+    leaf_values = np.zeros((len(trees), 2 ** depth))
+    for t, tree in enumerate(trees):
+        for d, s in enumerate(tree["splits"]):
+            if s["split_type"] != "FloatFeature":
+                raise CompileError(f"CatBoost split {s['split_type']}")
+            feature[t, d] = float_features[s["float_feature_index"]]["flat_feature_index"]
+            border[t, d] = s["border"]
+        leaf_values[t, :len(tree["leaf_values"])] = tree["leaf_values"]
+
+    nan_as_true = [f["flat_feature_index"] for f in info["float_features"]
+                   if f.get("nan_value_treatment") == "AsTrue"]
+    scale, bias = dump.get("scale_and_bias", [1.0, [0.0]])
+    return ObliviousForest(feature, border, leaf_values, nan_as_true,
+                           scale=scale, bias=bias[0] if isinstance(bias, list) else bias)
@@ -0,0 +1,126 @@
+"""Ewaluacja finalnego modelu: przedziały bootstrap i błędy w segmentach.
+
+Wszystko liczone jest z sum wystarczających błędu (liczba wierszy, suma
+|e|, e², y, y²; y wycentrowane średnią), z których wynikają MAE, RMSE i R2.
+Resample bootstrap to macierz indeksów (resample × jednostka) zamieniana
+na macierz liczności i mnożona przez sumy jednostek. Przy milionach
+wierszy jednostkami są losowe bloki wierszy (bootstrap blokowy), więc
+koszt nie zależy od rozmiaru zbioru testowego.
+"""
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+METRICS = ["MAE", "RMSE", "R2"]
+
+
+def error_sums(y_true: np.ndarray, y_pred: np.ndarray) -> np.ndarray:
+    """Sumy wystarczające pojedynczych wierszy, tablica (n, 5)."""
+    y_true = np.asarray(y_true, dtype=np.float64)
+    err = np.asarray(y_pred, dtype=np.float64) - y_true
+    y = y_true - y_true.mean()  # centrowanie chroni R2 przed utratą precyzji
+    return np.column_stack([np.ones_like(y), np.abs(err), err * err, y, y * y])
+
+
+def metrics_from_sums(sums: np.ndarray) -> np.ndarray:
+    """MAE, RMSE i R2 z sum (..., 5), wynik (..., 3)."""
+    n, abs_err, sq_err, y, y2 = np.moveaxis(sums, -1, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.stack([abs_err / n, np.sqrt(sq_err / n),
+                         1 - sq_err / (y2 - y * y / n)], axis=-1)
+
+
+def bootstrap_metrics(y_true: np.ndarray,
+                      y_pred: np.ndarray,
+                      n_resamples: int = 2000,
+                      confidence: float = 0.95,
+                      max_units: int = 10000,
+                      random_state: int = 42,
+                      chunk_elements: int = 2 ** 24) -> pd.DataFrame:
+    """
+    Wartości MAE/RMSE/R2 z percentylowymi przedziałami ufności.
+    ``max_units`` ogranicza liczbę jednostek resamplingu (bloków wierszy),
+    a ``chunk_elements`` rozmiar jednej macierzy indeksów.
+    """
+    sums = error_sums(y_true, y_pred)
+    rng = np.random.default_rng(random_state)
+    if len(sums) > max_units:
+        block = rng.integers(0, max_units, len(sums))
+        units = np.column_stack([np.bincount(block, weights=sums[:, j], minlength=max_units)
+                                 for j in range(sums.shape[1])])
+    else:
+        units = sums
+
+    k = len(units)
+    resampled = np.empty((n_resamples, units.shape[1]))
+    step = max(1, chunk_elements // k)
+    for start in range(0, n_resamples, step):
+        b = min(step, n_resamples - start)
+        idx = rng.integers(0, k, size=(b, k)) + (np.arange(b) * k)[:, None]
+        counts = np.bincount(idx.ravel(), minlength=b * k).reshape(b, k)
+        resampled[start:start + b] = counts @ units
+
+    alpha = (1 - confidence) / 2
+    low, high = np.nanquantile(metrics_from_sums(resampled), [alpha, 1 - alpha], axis=0)
+    return pd.DataFrame({
+        "metric": METRICS,
+        "value": metrics_from_sums(sums.sum(axis=0)),
+        "ci_low": low,
+        "ci_high": high,
+        "confidence": confidence,
+        "n_resamples": n_resamples,
+    })
+
+
+def bands(values: pd.Series, edges: Sequence[float]) -> pd.Categorical:
+    """Przedziały ``[a, b)`` o etykietach ``"a-b"``; ostatni otwarty (``"a+"``)."""
+    edges = list(edges)
+    labels = [f"{lo:g}-{hi:g}" for lo, hi in zip(edges, edges[1:])] + [f"{edges[-1]:g}+"]
+    return pd.cut(values, edges + [np.inf], right=False, labels=labels)
+
+
+def segment_errors(segments: pd.DataFrame,
+                   y_true: np.ndarray,
+                   y_pred: np.ndarray) -> pd.DataFrame:
+    """
+    Liczba wierszy, MAE, RMSE, MAPE i średni błąd (bias) dla każdej wartości
+    każdej kolumny ``segments``. Dane są grupowane raz, po wszystkich
+    kolumnach naraz; tabele pojedynczych wymiarów to sumy tej małej agregaty.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    err = np.asarray(y_pred, dtype=np.float64) - y_true
+    frame = segments.reset_index(drop=True).assign(
+        n=1, abs_err=np.abs(err), sq_err=err * err, err=err, pct_err=np.abs(err) / y_true)
+    grouped = frame.groupby(list(segments.columns), observed=True, dropna=False)[
+        ["n", "abs_err", "sq_err", "err", "pct_err"]].sum()
+
+    tables = []
+    for column in segments.columns:
+        part = grouped.groupby(level=column, observed=True, dropna=False).sum()
+        tables.append(pd.DataFrame({
+            "segment": column,
+            "value": part.index.astype(str),
+            "count": part["n"].to_numpy(),
+            "MAE": (part["abs_err"] / part["n"]).to_numpy(),
+            "RMSE": np.sqrt(part["sq_err"] / part["n"]).to_numpy(),
+            "MAPE": (part["pct_err"] / part["n"]).to_numpy(),
+            "bias": (part["err"] / part["n"]).to_numpy(),
+        }))
+    return pd.concat(tables, ignore_index=True)
+
+
+def evaluation_segments(rows: pd.DataFrame,
+                        y_true: pd.Series,
+                        current_year: int,
+                        options: Dict) -> pd.DataFrame:
+    """
+    Marka, przedział wieku i przedział ceny rzeczywistej; ``rows`` (kolumny
+    ``mark`` i ``year``) to wiersze w tej samej kolejności co ``y_true``.
+    """
+    return pd.DataFrame({
+        "mark": rows["mark"].to_numpy(),
+        "age_bucket": bands(pd.Series(current_year - rows["year"].to_numpy()),
+                            options["age_buckets"]),
+        "price_band": bands(pd.Series(np.asarray(y_true)), options["price_bands"]),
+    })
@@ -1,34 +1,59 @@
+import logging
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Tuple, Union
+
+import numpy as np
 import pandas as pd
 from autogluon.tabular import TabularPredictor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
+from carprices.resources import cpu_budget
+from carprices.serving.compiled import CompiledEnsemble, CompileError, NotCompiled
+from carprices.serving.service import load_autogluon
 
-def split_data(features_df: pd.DataFrame,
-               price_target: pd.Series,
-               test_size: float = 0.2,
-               random_state: int = 42):
-    """
-    Dzieli dane na zbiór treningowy i testowy (hold-out).
-    """
-    X_train, X_test, y_train, y_test = train_test_split(
-        features_df,
-        price_target,
-        test_size=test_size,
-        random_state=random_state
-    )
-    return X_train, X_test, y_train, y_test
+from .compile import compile_predictor
+from .evaluation import bootstrap_metrics, evaluation_segments, segment_errors
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EVALUATION = {
+    "n_resamples": 2000,
+    "confidence": 0.95,
+    "max_units": 10000,
+    "random_state": 42,
+    "age_buckets": [0, 3, 6, 10, 15, 20],
+    "price_bands": [0, 20000, 40000, 70000, 120000, 250000],
+}
+
+DEFAULT_FINAL_FIT = {
+    "hyperparameters": {"GBM": {}, "CAT": {}, "XGB": {}},
+    "num_bag_folds": 5,
+    "num_bag_sets": 2,
+    "num_stack_levels": 1,
+}
+
+DEFAULT_LATENCY_BUDGET = {
+    "batch_1_ms": 50.0,
+    "batch_1000_ms": 1000.0,
+    "repeat": 10,
+}
 
 
 def train_final_ensemble(X_train: pd.DataFrame,
                          y_train: pd.Series,
                          time_limit: int = 600,
                          eval_metric: str = 'rmse',
-                         save_path: str = 'data/07_model_output/car_price_predictor_final') -> TabularPredictor:
+                         save_path: str = 'data/07_model_output/car_price_predictor_final',
+                         cpu_share: float = 1.0,
+                         fit_options: Dict = None) -> TabularPredictor:
     """
     Trenuje WeightedEnsemble (bagging + stacking) na danych treningowych,
-    zapisuje predictor pod wskazaną ścieżką.
+    zapisuje predictor pod wskazaną ścieżką. Modele, liczbę foldów, zestawów
+    baggingu i poziomów stackingu nadpisuje ``fit_options`` (domyślnie
+    ``DEFAULT_FINAL_FIT``). Trening używa ``cpu_budget(cpu_share)`` rdzeni.
     """
+    fit_options = {**DEFAULT_FINAL_FIT, **(fit_options or {})}
     train_data = X_train.copy()
     train_data['price'] = y_train.values
 
@@ -39,34 +64,202 @@ def train_final_ensemble(X_train: pd.DataFrame,
     ).fit(
         train_data=train_data,
         time_limit=time_limit,
-        hyperparameters={
-            'GBM': {},
-            'CAT': {},
-            'XGB': {}
-        },
-        num_bag_folds=5,
-        num_bag_sets=2,
-        num_stack_levels=1,
         excluded_model_types=['NN'],
-        refit_full=True
+        refit_full=True,
+        num_cpus=cpu_budget(cpu_share),
+        **fit_options,
     )
     return predictor
 
 
+def select_model(predictor: TabularPredictor,
+                 X_test: pd.DataFrame,
+                 y_test: pd.Series,
+                 budget: Dict = None) -> Tuple[str, pd.DataFrame]:
+    """
+    Wybiera model do serwowania: najdokładniejszy (``score_val``) spośród
+    modeli, których zmierzona latencja predykcji 1 i 1000 wierszy mieści się
+    w budżecie. Modele z refitu dziedziczą ``score_val`` modelu, z którego
+    powstały; przy równym wyniku wygrywa szybszy. Gdy żaden model nie mieści
+    się w budżecie, wybiera najszybszy. Zwraca nazwę modelu i tabelę
+    kompromisu dokładność/latencja (leaderboard z ``pred_time_val``,
+    ``fit_time``, wynikiem na teście i pomiarami latencji).
+    """
+    budget = {**DEFAULT_LATENCY_BUDGET, **(budget or {})}
+    test_data = X_test.assign(**{predictor.label: y_test.to_numpy()})
+    board = predictor.leaderboard(test_data, silent=True)
+    board = board[board['can_infer']].reset_index(drop=True)
+    parents = {refit: model for model, refit in predictor.model_refit_map().items()}
+    board['refit_of'] = board['model'].map(parents)
+    board['score_val'] = board['score_val'].fillna(
+        board['refit_of'].map(board.set_index('model')['score_val']))
+
+    row = X_test.iloc[:1]
+    batch = X_test.iloc[np.resize(np.arange(len(X_test)), 1000)]
+    board['latency_batch_1_ms'] = [
+        _latency_ms(lambda m=m: predictor.predict(row, model=m), budget['repeat'])
+        for m in board['model']]
+    board['latency_batch_1000_ms'] = [
+        _latency_ms(lambda m=m: predictor.predict(batch, model=m), max(budget['repeat'] // 5, 1))
+        for m in board['model']]
+    board['within_budget'] = (board['latency_batch_1_ms'] <= budget['batch_1_ms']) \
+        & (board['latency_batch_1000_ms'] <= budget['batch_1000_ms'])
+
+    board = board.sort_values(['score_val', 'latency_batch_1_ms'],
+                              ascending=[False, True]).reset_index(drop=True)
+    if board['within_budget'].any():
+        model_name = board.loc[board['within_budget'], 'model'].iloc[0]
+    else:
+        model_name = board.loc[board['latency_batch_1_ms'].idxmin(), 'model']
+        logger.warning("No model fits the latency budget %s; using the fastest, %s",
+                       budget, model_name)
+    board['selected'] = board['model'] == model_name
+    logger.info("Selected %s for serving (AutoGluon best: %s)", model_name, predictor.model_best)
+    columns = ['model', 'refit_of', 'stack_level', 'score_val', 'score_test', 'pred_time_val',
+               'pred_time_test', 'fit_time', 'latency_batch_1_ms', 'latency_batch_1000_ms',
+               'within_budget', 'selected']
+    return model_name, board[columns]
+
+
 def evaluate_final(predictor: TabularPredictor,
                    X_test: pd.DataFrame,
-                   y_test: pd.Series) -> pd.DataFrame:
+                   y_test: pd.Series,
+                   test_segments: pd.DataFrame,
+                   current_year: int = 2025,
+                   options: Dict = None,
+                   model_name: str = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """
-    Ewaluacja finalnego predictora na zbiorze testowym.
-    Zwraca DataFrame z metrykami MAE, RMSE i R2.
+    Ewaluacja finalnego predictora (modelu ``model_name``, domyślnie
+    ``model_best``) na zbiorze testowym. Zwraca metryki MAE/RMSE/R2, te same
+    metryki z przedziałami bootstrap oraz błędy według marki, przedziału
+    wieku i przedziału ceny. Marka i rok pochodzą z ``test_segments``
+    (wiersze w kolejności ``X_test``).
     """
-    y_pred = predictor.predict(X_test)
-    mae  = mean_absolute_error(y_test, y_pred)
-    rmse = mean_squared_error(y_test, y_pred, squared=False)
-    r2   = r2_score(y_test, y_pred)
+    options = {**DEFAULT_EVALUATION, **(options or {})}
+    y_pred = predictor.predict(X_test, model=model_name).to_numpy(dtype=np.float64)
+    y_true = y_test.to_numpy(dtype=np.float64)
+
+    bootstrap = bootstrap_metrics(
+        y_true, y_pred,
+        n_resamples=options["n_resamples"],
+        confidence=options["confidence"],
+        max_units=options["max_units"],
+        random_state=options["random_state"])
+    metrics = bootstrap[['metric', 'value']].copy()
+    segments = segment_errors(
+        evaluation_segments(test_segments, y_true, current_year, options),
+        y_true, y_pred)
+    return metrics, bootstrap, segments
+
 
+def compile_final_ensemble(
+    predictor: TabularPredictor,
+    X_test: pd.DataFrame,
+    rtol: float = 1e-4,
+    model_name: str = None
+) -> Tuple[Union[CompiledEnsemble, NotCompiled], pd.DataFrame]:
+    """
+    Kompiluje ``model_name`` (domyślnie model z refitu dla ``model_best``)
+    do ``CompiledEnsemble`` (NumPy, bez AutoGluon)
+    i sprawdza zgodność z ``predictor.predict`` na zbiorze testowym.
+    Zgłasza ValueError, gdy błąd względny przekracza ``rtol``. Zwraca też
+    metryki zgodności i latencji pojedynczego wiersza. Modele, których nie
+    da się skompilować (np. ``feature_mode: categorical``), dają
+    ``NotCompiled`` i puste metryki zgodności.
+    """
+    model_name = model_name or _refit_best(predictor)
+    try:
+        compiled = compile_predictor(predictor, model_name)
+    except CompileError as e:
+        logger.warning("Cannot compile %s (%s); serving will use AutoGluon", model_name, e)
+        row = X_test.iloc[:1]
+        metrics = pd.DataFrame({
+            'metric': ['rows', 'max_abs_diff', 'max_rel_diff',
+                       'predictor_single_row_ms', 'compiled_single_row_ms'],
+            'value': [len(X_test), np.nan, np.nan,
+                      _latency_ms(lambda: predictor.predict(row, model=model_name)), np.nan]
+        })
+        return NotCompiled(model_name, str(e)), metrics
+
+    expected = predictor.predict(X_test, model=compiled.model_name).to_numpy(dtype=np.float64)
+    actual = compiled.predict(X_test)
+    abs_diff = np.abs(actual - expected)
+    rel_diff = abs_diff / np.maximum(np.abs(expected), 1.0)
+    if rel_diff.max() > rtol:
+        raise ValueError(f"Compiled ensemble {compiled.model_name} differs from "
+                         f"predictor.predict: max relative error {rel_diff.max():.3g} > {rtol}")
+
+    row = X_test.iloc[:1]
     metrics = pd.DataFrame({
-        'metric': ['MAE', 'RMSE', 'R2'],
-        'value':  [mae, rmse, r2]
+        'metric': ['rows', 'max_abs_diff', 'max_rel_diff',
+                   'predictor_single_row_ms', 'compiled_single_row_ms'],
+        'value': [len(X_test), abs_diff.max(), rel_diff.max(),
+                  _latency_ms(lambda: predictor.predict(row, model=compiled.model_name)),
+                  _latency_ms(lambda: compiled.predict(row))]
     })
-    return metrics
\ No newline at end of file
+    return compiled, metrics
+
+
+def package_for_deployment(
+    predictor: TabularPredictor,
+    X_test: pd.DataFrame,
+    deploy_path: str = 'data/07_model_output/car_price_predictor_deploy',
+    model_name: str = None
+) -> pd.DataFrame:
+    """
+    Zapisuje w ``deploy_path`` predictor tylko z modelami potrzebnymi
+    ``model_name`` (domyślnie modelowi z refitu dla ``model_best``), bez
+    foldów baggingu, modeli spoza refitu i danych treningowych (jak
+    ``clone_for_deployment``). Zwraca rozmiar na dysku, liczbę
+    modeli, czas wczytania z ``persist`` i czas pierwszej predykcji dla
+    pełnego i spakowanego predictora.
+    """
+    model_name = model_name or _refit_best(predictor)
+    shutil.rmtree(deploy_path, ignore_errors=True)
+    clone = predictor.clone(deploy_path, return_clone=True)
+    # clone_for_deployment usuwa najpierw model_best spoza refitu i szuka nowego
+    # po wynikach walidacji, których modele z refitu nie mają (TypeError)
+    clone.set_model_best(model_name, save_trainer=True)
+    clone.delete_models(models_to_keep=model_name, dry_run=False)
+    clone.save_space()
+    kept = set(clone.model_names())
+    for model_dir in Path(deploy_path, 'models').iterdir():
+        if model_dir.is_dir() and model_dir.name not in kept:
+            shutil.rmtree(model_dir)  # katalogi modeli spoza grafu (np. przerwanych)
+
+    # spakowany pierwszy: płaci za import bibliotek modeli jak przy zimnym starcie
+    row = X_test.iloc[:1]
+    rows = []
+    for name, path in [('deploy', deploy_path), ('full', predictor.path)]:
+        start = time.perf_counter()
+        loaded = load_autogluon(path)
+        load_s = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded.predict(row)
+        rows.append({
+            'predictor': name,
+            'path': str(path),
+            'models': len(loaded.model_names()),
+            'size_mb': _dir_size(path) / 2 ** 20,
+            'load_s': load_s,
+            'first_predict_ms': (time.perf_counter() - start) * 1e3,
+        })
+    logger.info("Deployment package %s: %.1f MB (full %.1f MB)", deploy_path,
+                rows[0]['size_mb'], rows[1]['size_mb'])
+    return pd.DataFrame(rows)
+
+
+def _refit_best(predictor: TabularPredictor) -> str:
+    return predictor.model_refit_map().get(predictor.model_best, predictor.model_best)
+
+
+def _dir_size(path: str) -> int:
+    return sum(f.stat().st_size for f in Path(path).rglob('*') if f.is_file())
+
+
+def _latency_ms(fn, repeat: int = 20) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e3
@@ -1,31 +1,50 @@
 from kedro.pipeline import Pipeline, node
-from .nodes import split_data, train_final_ensemble, evaluate_final
+
+from carprices.artifact_cache import cached
+from .nodes import (
+    compile_final_ensemble,
+    evaluate_final,
+    package_for_deployment,
+    select_model,
+    train_final_ensemble,
+)
 
 
 def create_pipeline(**kwargs) -> Pipeline:
     return Pipeline([
         node(
-            func=split_data,
-            inputs=["features_df", "price_target"],
-            outputs=["X_train", "X_test", "y_train", "y_test"],
-            name="split_data_node"
-        ),
-        node(
-            func=train_final_ensemble,
-            inputs=["X_train", "y_train", "params:time_limit", "params:eval_metric", "params:save_path_final"],
+            func=cached(train_final_ensemble, artifacts=["save_path"]),
+            inputs=["X_train", "y_train", "params:time_limit", "params:eval_metric", "params:save_path_final",
+                    "params:cpu_share_final", "params:final_fit"],
             outputs="predictor_final",
             name="train_final_ensemble_node"
         ),
+        # bez cache: wybór zależy od latencji zmierzonej na tej maszynie
+        # i w tym przebiegu, a nie tylko od wejść węzła
         node(
-            func=evaluate_final,
-            inputs=["predictor_final", "X_test", "y_test"],
-            outputs="final_metrics",
+            func=select_model,
+            inputs=["predictor_final", "X_test", "y_test", "params:latency_budget"],
+            outputs=["selected_model", "model_selection"],
+            name="select_model_node"
+        ),
+        node(
+            func=cached(evaluate_final),
+            inputs=["predictor_final", "X_test", "y_test", "test_segments", "params:current_year",
+                    "params:evaluation", "selected_model"],
+            outputs=["final_model_metrics", "final_model_bootstrap", "final_model_segments"],
             name="evaluate_final_node"
         ),
         node(
-            lambda df: df,
-            inputs="final_metrics",
-            outputs="final_model_metrics",
-            name="save_final_metrics_node"
+            func=cached(compile_final_ensemble),
+            inputs=["predictor_final", "X_test", "params:compiled_parity_rtol",
+                    "selected_model"],
+            outputs=["compiled_ensemble", "compiled_parity"],
+            name="compile_final_ensemble_node"
+        ),
+        node(
+            func=cached(package_for_deployment, artifacts=["deploy_path"]),
+            inputs=["predictor_final", "X_test", "params:deploy_path", "selected_model"],
+            outputs="deployment_package",
+            name="package_for_deployment_node"
         )
     ])
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""Learning curve: RMSE vs fit time on progressively larger training samples"""
+
+from .pipeline import create_pipeline  # NOQA
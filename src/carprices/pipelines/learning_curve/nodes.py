@@ -0,0 +1,92 @@
+import logging
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from carprices.pipelines.autogluon_pipelin.nodes import evaluate_model, train_autogluon
+from carprices.pipelines.model_input.nodes import stratified_sample
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEARNING_CURVE = {
+    "fractions": [0.05, 0.1, 0.25, 0.5, 1.0],
+    "time_limit": 60,
+    "path": "data/06_models/learning_curve",
+    "cpu_share": 1.0,
+    "target_rmse": None,
+    "tolerance": 0.01,
+}
+
+
+def select_fraction(report: pd.DataFrame,
+                    target_rmse: float = None,
+                    tolerance: float = 0.01) -> float:
+    """
+    Dopisuje do ``report`` kolumny ``meets_target`` i ``selected`` i zwraca
+    użyty próg RMSE. Gdy żadna próbka nie osiąga ``target_rmse``, wybierana
+    jest ta z najlepszym RMSE (z ostrzeżeniem w logu).
+    """
+    target = target_rmse
+    if target is None:
+        target = report["RMSE"].min() * (1 + tolerance)
+    report["meets_target"] = report["RMSE"] <= target
+    if report["meets_target"].any():
+        chosen = report.loc[report["meets_target"], "fit_s"].idxmin()
+    else:
+        chosen = report["RMSE"].idxmin()
+        logger.warning("No sample reaches target RMSE %.1f (best %.1f at fraction %g); "
+                       "selecting the best one", target, report.loc[chosen, "RMSE"],
+                       report.loc[chosen, "fraction"])
+    report["selected"] = report.index == chosen
+    return target
+
+
+def learning_curve(X_train: pd.DataFrame,
+                   y_train: pd.Series,
+                   X_test: pd.DataFrame,
+                   y_test: pd.Series,
+                   eval_metric: str = "rmse",
+                   random_state: int = 42,
+                   options: Dict = None) -> Tuple[pd.DataFrame, go.Figure]:
+    """
+    Trenuje ``train_autogluon`` na warstwowych próbkach ``fractions`` zbioru
+    treningowego i ocenia każdy model na tym samym, pełnym zbiorze testowym.
+    Zwraca tabelę (wiersze, czas treningu, MAE/RMSE/R2) i wykres RMSE od
+    czasu treningu. ``meets_target`` oznacza RMSE nie większe niż
+    ``target_rmse``, a bez niego niż najlepsze RMSE powiększone o
+    ``tolerance``; ``selected`` to najtańsza w treningu taka próbka
+    (``select_fraction``).
+    """
+    options = {**DEFAULT_LEARNING_CURVE, **(options or {})}
+    rows = []
+    for fraction in sorted(options["fractions"]):
+        X, y = stratified_sample(X_train, y_train, fraction, random_state)
+        save_path = Path(options["path"]) / f"{fraction:g}"
+        shutil.rmtree(save_path, ignore_errors=True)
+
+        start = time.perf_counter()
+        predictor = train_autogluon(X, y, options["time_limit"], eval_metric,
+                                    str(save_path), options["cpu_share"])
+        fit_s = time.perf_counter() - start
+        metrics = evaluate_model(predictor, X_test, y_test).set_index("metric")["value"]
+        rows.append({
+            "fraction": fraction,
+            "rows": len(X),
+            "fit_s": fit_s,
+            "model_best": predictor.model_best,
+            **metrics.to_dict(),
+        })
+    report = pd.DataFrame(rows)
+    target = select_fraction(report, options["target_rmse"], options["tolerance"])
+
+    figure = go.Figure(go.Scatter(
+        x=report["fit_s"], y=report["RMSE"], mode="lines+markers+text",
+        text=[f"{f:.0%}" for f in report["fraction"]], textposition="top center"))
+    figure.add_hline(y=target, line_dash="dash", annotation_text="cel RMSE")
+    figure.update_layout(title="Krzywa uczenia: RMSE na teście vs czas treningu",
+                         xaxis_title="Czas treningu [s]", yaxis_title="RMSE")
+    return report, figure
@@ -0,0 +1,16 @@
+from kedro.pipeline import Pipeline, node
+
+from carprices.artifact_cache import cached
+from .nodes import learning_curve
+
+
+def create_pipeline(**kwargs) -> Pipeline:
+    return Pipeline([
+        node(
+            func=cached(learning_curve),
+            inputs=["X_train", "y_train", "X_test", "y_test", "params:eval_metric",
+                    "params:random_state", "params:learning_curve"],
+            outputs=["learning_curve", "learning_curve_plot"],
+            name="learning_curve_node"
+        )
+    ])
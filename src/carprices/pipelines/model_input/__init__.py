@@ -0,0 +1,3 @@
+"""Model input pipeline: one train/test split shared by both training pipelines"""
+
+from .pipeline import create_pipeline  # NOQA
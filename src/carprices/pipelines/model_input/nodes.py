@@ -0,0 +1,91 @@
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+
+def stratified_sample(X: pd.DataFrame,
+                      y: pd.Series,
+                      fraction: float,
+                      random_state: int = 42,
+                      n_strata: int = 10) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Losuje ``fraction`` wierszy z każdego z ``n_strata`` przedziałów
+    kwantylowych ceny, więc rozkład ceny w próbce odpowiada pełnym danym.
+    Kolejność wierszy jest zachowana; ``fraction >= 1`` zwraca dane bez zmian.
+    """
+    if fraction >= 1:
+        return X, y
+    values = y.to_numpy(dtype=np.float64)
+    edges = np.nanquantile(values, np.linspace(0, 1, n_strata + 1)[1:-1])
+    strata = np.searchsorted(edges, values, side="right")
+    counts = np.bincount(strata, minlength=n_strata)
+    take = np.round(counts * fraction).astype(np.int64)
+
+    # w każdej warstwie wiersze z najmniejszymi kluczami losowymi
+    order = np.lexsort((np.random.default_rng(random_state).random(len(values)), strata))
+    starts = np.cumsum(counts) - counts
+    position = np.arange(len(values)) - starts[strata[order]]
+    rows = np.sort(order[position < take[strata[order]]])
+    return X.iloc[rows], y.iloc[rows]
+
+
+def append_increments(features_df: pd.DataFrame,
+                      price_target: pd.DataFrame,
+                      features_increments: Dict[str, pd.DataFrame],
+                      target_increments: Dict[str, pd.DataFrame]
+                      ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Dokleja partycje z ``data_preparation_incremental`` (w kolejności kluczy)
+    do danych pełnego przebiegu. Cechy i cena są sklejane w tej samej
+    kolejności, więc wspólny indeks nadal wskazuje te same ogłoszenia.
+    """
+    if not features_increments:
+        return features_df, price_target
+    keys = sorted(features_increments)
+    features = pd.concat([features_df] + [features_increments[k] for k in keys],
+                         ignore_index=True)
+    target = pd.concat([price_target] + [target_increments[k] for k in keys],
+                       ignore_index=True)
+    return features, target
+
+
+def subsample_data(features_df: pd.DataFrame,
+                   price_target: pd.DataFrame,
+                   fraction: float = 1.0,
+                   random_state: int = 42) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Warstwowa (po cenie) próbka ``fraction`` danych przed podziałem
+    train/test, np. w profilu ``fast`` (``kedro run --env fast``).
+    """
+    if fraction >= 1:
+        return features_df, price_target
+    X, y = stratified_sample(features_df, price_target['price'], fraction, random_state)
+    return X, price_target.loc[y.index]
+
+
+def split_data(features_df: pd.DataFrame,
+               price_target: pd.DataFrame,
+               test_size: float = 0.2,
+               random_state: int = 42):
+    """
+    Dzieli dane na zbiór treningowy i testowy (hold-out), wspólny dla
+    autogluon_pipeline i final_pipeline.
+    """
+    X_train, X_test, y_train, y_test = train_test_split(
+        features_df,
+        price_target['price'],
+        test_size=test_size,
+        random_state=random_state
+    )
+    return X_train, X_test, y_train, y_test
+
+
+def select_test_segments(price_target: pd.DataFrame, X_test: pd.DataFrame) -> pd.DataFrame:
+    """
+    Kolumny segmentów (marka, rok) wierszy zbioru testowego do ewaluacji
+    według segmentów. ``price_target`` powstaje razem z ``features_df`` z tych
+    samych wierszy, więc wspólny indeks wskazuje te same ogłoszenia.
+    """
+    return price_target.loc[X_test.index, ["mark", "year"]]
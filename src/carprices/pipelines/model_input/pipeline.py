@@ -0,0 +1,34 @@
+from kedro.pipeline import Pipeline, node
+from .nodes import append_increments, select_test_segments, split_data, subsample_data
+
+
+def create_pipeline(**kwargs) -> Pipeline:
+    return Pipeline([
+        node(
+            func=append_increments,
+            inputs=["features_df", "price_target", "features_increments",
+                    "target_increments"],
+            outputs=["features_history", "price_target_history"],
+            name="append_increments_node"
+        ),
+        node(
+            func=subsample_data,
+            inputs=["features_history", "price_target_history", "params:train_fraction",
+                    "params:random_state"],
+            outputs=["features_sample", "price_target_sample"],
+            name="subsample_data_node"
+        ),
+        node(
+            func=split_data,
+            inputs=["features_sample", "price_target_sample", "params:test_size",
+                    "params:random_state"],
+            outputs=["X_train", "X_test", "y_train", "y_test"],
+            name="split_data_node"
+        ),
+        node(
+            func=select_test_segments,
+            inputs=["price_target_sample", "X_test"],
+            outputs="test_segments",
+            name="select_test_segments_node"
+        )
+    ])
@@ -0,0 +1,3 @@
+"""Reporting: EDA aggregates and figures precomputed from clean_df"""
+
+from .pipeline import create_pipeline  # NOQA
@@ -0,0 +1,206 @@
+"""Agregaty EDA liczone raz z ``clean_df`` zamiast przy każdym uruchomieniu
+notebooka.
+
+Wyniki to małe tabele (parquet) i wykresy Plotly (JSON), które dashboardy
+i notebooki wczytują w milisekundach:
+
+* ``price_cube``: liczność, suma, suma kwadratów, min i max ceny w każdej
+  komórce (marka, rok, przedział przebiegu, paliwo); dowolne zestawienie
+  tych wymiarów (np. średnia cena marki w roczniku) to suma wierszy kostki;
+* ``price_quantiles``: kwantyle ceny (do wykresów pudełkowych) dla
+  ``top_n`` najczęstszych marek, generacji i miast, dla paliw i roczników;
+* ``histograms``: histogramy ceny, przebiegu, wieku i log1p(przebiegu);
+* ``correlations``: macierz korelacji cech liczbowych i ceny;
+* ``summary``: braki, liczba unikalnych wartości i statystyki kolumn.
+"""
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+DEFAULT_EDA = {
+    "mileage_step": 25000,
+    "top_n": 10,
+    "bins": 50,
+    "quantiles": [0.05, 0.25, 0.5, 0.75, 0.95],
+}
+CUBE_KEYS = ["mark", "year", "mileage_band", "fuel"]
+QUANTILE_DIMENSIONS = ["mark", "generation_name", "city", "fuel", "year"]
+CORRELATION_COLUMNS = ["price", "year", "mileage", "vol_engine", "fuel_encoded"]
+
+
+def _quantile_column(q: float) -> str:
+    return f"p{round(q * 100):02d}"
+
+
+def _dimension_codes(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Kody całkowite (-1 dla braków) i etykiety kolumny."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(np.int64), values.cat.categories.to_numpy()
+    codes, labels = pd.factorize(values, sort=True)
+    return codes.astype(np.int64), np.asarray(labels)
+
+
+def _group_quantiles(codes: np.ndarray,
+                     price: np.ndarray,
+                     by_price: np.ndarray,
+                     n_groups: int,
+                     quantiles) -> pd.DataFrame:
+    """
+    Liczność, średnia i kwantyle (interpolacja liniowa jak w pandas) ceny
+    w grupach ``0..n_groups-1``; wiersze z kodem -1 są pomijane.
+    """
+    group = codes[by_price]
+    rows = by_price[group >= 0]
+    group = group[group >= 0]
+    if n_groups < 2 ** 15:
+        group = group.astype(np.int16)  # sortowanie pozycyjne zamiast scalania
+    order = np.argsort(group, kind="stable")
+    sorted_price, group = price[rows[order]], group[order]
+
+    counts = np.bincount(group, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    position = starts[:, None] + np.asarray(quantiles)[None, :] * np.maximum(counts - 1, 0)[:, None]
+    lo = np.floor(position).astype(np.int64)
+    hi = np.minimum(lo + 1, np.maximum(starts + counts - 1, 0)[:, None])
+    frac = position - lo
+    values = np.full(position.shape, np.nan)
+    present = counts > 0
+    values[present] = sorted_price[lo[present]] * (1 - frac[present]) \
+        + sorted_price[hi[present]] * frac[present]
+
+    table = pd.DataFrame(values, columns=[_quantile_column(q) for q in quantiles])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        table.insert(0, "mean", np.bincount(group, weights=sorted_price,
+                                            minlength=n_groups) / counts)
+    table.insert(0, "count", counts)
+    return table
+
+
+def compute_eda_aggregates(
+    clean_df: pd.DataFrame,
+    current_year: int = 2025,
+    options: Dict = None
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Liczy ``price_cube``, ``price_quantiles``, ``histograms``,
+    ``correlations`` i ``summary`` (opis w docstringu modułu). Kolumny
+    pochodne (cena jako float64, wiek, przedział przebiegu) powstają raz
+    i są współdzielone przez wszystkie agregaty.
+    """
+    options = {**DEFAULT_EDA, **(options or {})}
+    price = clean_df["price"].to_numpy(dtype=np.float64)
+    mileage = clean_df["mileage"].to_numpy(dtype=np.float64)
+    step = options["mileage_step"]
+    frame = pd.DataFrame({
+        "mark": clean_df["mark"],
+        "year": clean_df["year"],
+        "mileage_band": np.floor(mileage / step) * step,
+        "fuel": clean_df["fuel"],
+        "price": price,
+        "price_sq": price * price,
+    })
+
+    cube = frame.groupby(CUBE_KEYS, observed=True, sort=True).agg(
+        count=("price", "size"),
+        price_sum=("price", "sum"),
+        price_sumsq=("price_sq", "sum"),
+        price_min=("price", "min"),
+        price_max=("price", "max"),
+    ).reset_index()
+
+    # ceny posortowane raz; w każdym wymiarze stabilne sortowanie po kodzie
+    # grupy daje ceny grup już uporządkowane, a kwantyle to odczyt pozycji
+    by_price = np.argsort(price, kind="stable")
+    tables = []
+    for dimension in QUANTILE_DIMENSIONS:
+        codes, labels = _dimension_codes(clean_df[dimension])
+        if dimension != "year":
+            counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+            top = np.argsort(-counts, kind="stable")[:options["top_n"]]
+            rank = np.full(len(labels), -1)
+            rank[top] = np.arange(len(top))
+            codes = np.where(codes >= 0, rank[codes], -1)
+            labels = labels[top]
+        table = _group_quantiles(codes, price, by_price, len(labels), options["quantiles"])
+        table.insert(0, "value", labels.astype(str))
+        table.insert(0, "dimension", dimension)
+        tables.append(table[table["count"] > 0])
+    price_quantiles = pd.concat(tables, ignore_index=True)
+
+    variables = {
+        "price": price,
+        "mileage": mileage,
+        "age": current_year - clean_df["year"].to_numpy(dtype=np.float64),
+        "log_mileage": np.log1p(np.clip(mileage, 0, None)),
+    }
+    rows = []
+    for name, values in variables.items():
+        values = values[np.isfinite(values)]
+        counts, edges = np.histogram(values, bins=options["bins"])
+        rows.append(pd.DataFrame({"variable": name, "left": edges[:-1],
+                                  "right": edges[1:], "count": counts}))
+    histograms = pd.concat(rows, ignore_index=True)
+
+    correlations = clean_df[CORRELATION_COLUMNS].astype(np.float64).corr() \
+        .rename_axis("variable").reset_index()
+
+    summary = pd.DataFrame({
+        "column": clean_df.columns,
+        "dtype": [str(t) for t in clean_df.dtypes],
+        "missing": clean_df.isna().sum().to_numpy(),
+        "n_unique": clean_df.nunique().to_numpy(),
+    })
+    numeric = clean_df.select_dtypes("number")
+    stats = pd.DataFrame({"mean": numeric.mean(), "std": numeric.std(), "min": numeric.min(),
+                          "median": numeric.median(), "max": numeric.max()})
+    summary = summary.merge(stats, left_on="column", right_index=True, how="left")
+    return cube, price_quantiles, histograms, correlations, summary
+
+
+def build_eda_figures(
+    price_cube: pd.DataFrame,
+    price_quantiles: pd.DataFrame,
+    histograms: pd.DataFrame,
+    correlations: pd.DataFrame
+) -> Tuple[go.Figure, go.Figure, go.Figure, go.Figure]:
+    """
+    Wykresy z gotowych agregatów: pudełka ceny dla marek (kwantyle
+    p05/p25/p50/p75/p95), średnia cena według rocznika i przebiegu,
+    histogramy oraz macierz korelacji.
+    """
+    marks = price_quantiles[price_quantiles["dimension"] == "mark"] \
+        .sort_values("p50", ascending=False)
+    price_by_mark = go.Figure(go.Box(
+        x=marks["value"], q1=marks["p25"], median=marks["p50"], q3=marks["p75"],
+        lowerfence=marks["p05"], upperfence=marks["p95"], mean=marks["mean"],
+        name="cena"))
+    price_by_mark.update_layout(title="Cena vs najczęstsze marki (p05-p95)",
+                                xaxis_title="Marka", yaxis_title="Cena [PLN]")
+
+    cells = price_cube.groupby(["year", "mileage_band"])[["count", "price_sum"]].sum()
+    mean_price = (cells["price_sum"] / cells["count"]).unstack("mileage_band")
+    price_by_year_mileage = go.Figure(go.Heatmap(
+        z=mean_price.to_numpy(), x=mean_price.columns, y=mean_price.index,
+        colorbar={"title": "PLN"}))
+    price_by_year_mileage.update_layout(title="Średnia cena według rocznika i przebiegu",
+                                        xaxis_title="Przebieg [km]", yaxis_title="Rok produkcji")
+
+    names = list(dict.fromkeys(histograms["variable"]))
+    distributions = make_subplots(rows=(len(names) + 1) // 2, cols=2, subplot_titles=names)
+    for i, name in enumerate(names):
+        h = histograms[histograms["variable"] == name]
+        distributions.add_trace(
+            go.Bar(x=(h["left"] + h["right"]) / 2, y=h["count"], width=h["right"] - h["left"],
+                   name=name, showlegend=False),
+            row=i // 2 + 1, col=i % 2 + 1)
+    distributions.update_layout(title="Rozkłady (liczba ogłoszeń)")
+
+    matrix = correlations.set_index("variable")
+    correlation_heatmap = go.Figure(go.Heatmap(
+        z=matrix.to_numpy(), x=matrix.columns, y=matrix.index,
+        zmin=-1, zmax=1, colorscale="RdBu"))
+    correlation_heatmap.update_layout(title="Macierz korelacji")
+    return price_by_mark, price_by_year_mileage, distributions, correlation_heatmap
@@ -0,0 +1,25 @@
+from kedro.pipeline import Pipeline, node
+
+from carprices.artifact_cache import cached
+from .nodes import build_eda_figures, compute_eda_aggregates
+
+
+def create_pipeline(**kwargs) -> Pipeline:
+    return Pipeline([
+        node(
+            # przeliczane tylko po zmianie clean_df, parametrów albo kodu węzła
+            func=cached(compute_eda_aggregates),
+            inputs=["clean_df", "params:current_year", "params:eda"],
+            outputs=["eda_price_cube", "eda_price_quantiles", "eda_histograms",
+                     "eda_correlations", "eda_summary"],
+            name="compute_eda_aggregates_node"
+        ),
+        node(
+            func=build_eda_figures,
+            inputs=["eda_price_cube", "eda_price_quantiles", "eda_histograms",
+                    "eda_correlations"],
+            outputs=["eda_price_by_mark_plot", "eda_price_by_year_mileage_plot",
+                     "eda_distributions_plot", "eda_correlations_plot"],
+            name="build_eda_figures_node"
+        )
+    ])
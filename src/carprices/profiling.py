@@ -0,0 +1,106 @@
+"""Pomiary pamięci i czasu CPU procesu oraz próbkowanie stosu wątku"""
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+
+import psutil
+
+
+def peak_rss_mb() -> float:
+    """
+    Szczytowe zużycie pamięci (RSS) bieżącego procesu od startu, w MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux raportuje KB, macOS bajty
+    return peak / (1024 ** 2 if sys.platform == "darwin" else 1024)
+
+
+def rss_mb() -> float:
+    return psutil.Process().memory_info().rss / 1024 ** 2
+
+
+class PeakMemorySampler:
+    """
+    Próbkuje RSS w wątku tła i zapamiętuje maksimum od ``start()``.
+    W przeciwieństwie do ``ru_maxrss`` pozwala zmierzyć szczyt pojedynczego
+    węzła, nawet jeśli wcześniejszy węzeł zużył więcej pamięci.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = None
+        self.start_mb = 0.0
+        self.peak_mb = 0.0
+
+    def start(self) -> "PeakMemorySampler":
+        self.start_mb = self.peak_mb = self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> float:
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self._sample())
+        return self.peak_mb
+
+    def _sample(self) -> float:
+        return self._process.memory_info().rss / 1024 ** 2
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, self._sample())
+
+
+def cpu_seconds() -> float:
+    """
+    Czas CPU (user + sys) wszystkich wątków procesu i zakończonych procesów
+    potomnych, w sekundach.
+    """
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+class StackSampler:
+    """
+    Próbkuje stos jednego wątku co ``interval`` sekund (``sys._current_frames``)
+    i zlicza ścieżki wywołań. ``folded()`` zwraca format "collapsed stacks"
+    (``a;b;c liczba``), który czytają flamegraph.pl, speedscope i inferno.
+    """
+
+    def __init__(self, thread_id: int = None, interval: float = 0.005):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                              f":{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
@@ -0,0 +1,13 @@
+"""Budżety zasobów dla równolegle uruchamianych treningów"""
+import os
+
+
+def cpu_budget(share: float) -> int:
+    """
+    Liczba rdzeni dla jednego treningu jako ułamek ``share`` rdzeni
+    dostępnych procesowi (co najmniej 1). Przy ``--runner ParallelRunner``
+    suma udziałów równoległych treningów nie powinna przekraczać 1.0.
+    """
+    available = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") \
+        else os.cpu_count() or 1
+    return max(1, int(available * share))
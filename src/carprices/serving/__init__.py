@@ -0,0 +1,3 @@
+"""Serwowanie predykcji cen: micro-batching i usługa HTTP"""
+
+from .batcher import MicroBatcher  # NOQA
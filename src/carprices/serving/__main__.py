@@ -0,0 +1,5 @@
+"""Uruchamia usługę HTTP: `python -m carprices.serving`"""
+from .service import main
+
+if __name__ == "__main__":
+    main()
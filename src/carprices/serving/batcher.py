@@ -0,0 +1,104 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Sequence
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PredictFn = Callable[[pd.DataFrame], Sequence[float]]
+
+
+class MicroBatcher:
+    """
+    Zbiera współbieżne żądania w micro-batche i wywołuje ``predict_fn`` raz
+    na batch. Batch jest wysyłany, gdy osiągnie ``max_batch_size`` rekordów
+    albo gdy od pierwszego oczekującego żądania minie ``max_wait_ms``.
+    """
+
+    def __init__(self,
+                 predict_fn: PredictFn,
+                 max_batch_size: int = 64,
+                 max_wait_ms: float = 5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher",
+                                        daemon=True)
+        self._worker.start()
+
+    def submit(self, records: List[Dict]) -> Future:
+        """
+        Dodaje rekordy do kolejki; Future zwraca listę cen w tej samej kolejności.
+        Rekordy, które nie są listą słowników, dają od razu Future z TypeError.
+        """
+        future: Future = Future()
+        if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+            future.set_exception(TypeError("records must be a list of JSON objects"))
+            return future
+        self._queue.put((records, future))
+        return future
+
+    def predict(self, records: List[Dict], timeout: float = None) -> List[float]:
+        return self.submit(records).result(timeout=timeout)
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._worker.join()
+
+    def _collect(self) -> list:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        pending = [first]
+        size = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            pending = []
+            try:
+                pending = self._collect()
+                if pending:
+                    self._predict_batch(pending)
+            except Exception as exc:  # wątek workera nie może zginąć
+                logger.exception("Micro-batch failed")
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    def _predict_batch(self, pending: list) -> None:
+        records = [r for recs, _ in pending for r in recs]
+        try:
+            prices = list(self.predict_fn(pd.DataFrame.from_records(records)))
+        except Exception as exc:
+            if len(pending) == 1:
+                logger.exception("Batch prediction failed")
+                pending[0][1].set_exception(exc)
+                return
+            # błędny rekord nie może zepsuć predykcji pozostałych żądań:
+            # każde żądanie z batcha liczymy osobno
+            for item in pending:
+                self._predict_batch([item])
+            return
+        offset = 0
+        for recs, future in pending:
+            future.set_result(prices[offset:offset + len(recs)])
+            offset += len(recs)
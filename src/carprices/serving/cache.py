@@ -0,0 +1,290 @@
+"""Dwupoziomowy cache predykcji dla powtarzających się konfiguracji aut.
+
+Klucz to znormalizowana krotka cech wejściowych, a wpisy są przypisane do
+wersji artefaktów modelu (predictor, preprocessory, skompilowany ensemble).
+Pierwszy poziom to LRU w pamięci procesu, drugi (opcjonalny) to plik
+SQLite współdzielony przez procesy workerów. Zmiana któregoś artefaktu na
+dysku powoduje przeładowanie modelu i unieważnienie cache.
+
+``mileage_bucket > 0`` to świadome przybliżenie: przebieg jest zaokrąglany
+w kluczu i w ramce przekazywanej do modelu, więc cena jest ceną dla
+zaokrąglonego przebiegu (ta sama dla trafienia i chybienia), a nie dla
+dokładnej wartości z zapytania. Domyślnie (``0``) klucz jest dokładny.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .batcher import PredictFn
+from .records import INPUT_COLUMNS, normalize_frame
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = INPUT_COLUMNS
+# AutoGluon zapisuje predictor.pkl przy każdym ``save``, więc jego stat
+# wystarcza do wykrycia podmiany katalogu predictora
+MANIFEST_FILE = "predictor.pkl"
+
+
+def artifact_version(paths: Iterable[str]) -> str:
+    """
+    Skrót (ścieżka, rozmiar, mtime) wszystkich plików artefaktów; katalogi
+    (np. ``car_price_predictor_final``) są przechodzone rekurencyjnie.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        path = Path(path)
+        files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() \
+            else [path] if path.exists() else []
+        for f in files:
+            stat = f.stat()
+            digest.update(f"{f}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+
+def artifact_stamp(paths: Iterable[str]) -> Tuple:
+    """
+    Tani znacznik zmian: stat jednego pliku na artefakt (``MANIFEST_FILE``
+    dla katalogu, o ile istnieje, inaczej sam katalog albo plik). Pełny
+    ``artifact_version`` jest liczony dopiero po zmianie znacznika.
+    """
+    stamp = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir() and (path / MANIFEST_FILE).exists():
+            path = path / MANIFEST_FILE
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            stamp.append((str(path), None))
+            continue
+        stamp.append((str(path), stat.st_ino, stat.st_size, stat.st_mtime_ns))
+    return tuple(stamp)
+
+
+def record_key(record: Dict, mileage_bucket: int = 0) -> str:
+    """
+    Klucz rekordu (napisy już przycięte przez ``normalize_frame``): liczby
+    jako float, brak wartości jako pusty napis; przy ``mileage_bucket > 0``
+    przebieg jest zaokrąglany.
+    """
+    parts = []
+    for col in KEY_COLUMNS:
+        value = record.get(col)
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            parts.append("")
+        elif col in ("year", "mileage", "vol_engine"):
+            value = float(value)
+            if col == "mileage" and mileage_bucket:
+                value = float(round(value / mileage_bucket) * mileage_bucket)
+            parts.append(repr(value))
+        else:
+            parts.append(str(value))
+    return "\x1f".join(parts)
+
+
+class LRUCache:
+    """Słownik z limitem wpisów; najdawniej używane wpisy są usuwane."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, float]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    found[key] = self._data[key]
+        return found
+
+    def put_many(self, items: Dict[str, float]) -> None:
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class DiskCache:
+    """
+    Cache w pliku SQLite (tryb WAL) współdzielony przez procesy. Wpisy są
+    przypisane do wersji artefaktów; po przekroczeniu ``max_entries``
+    usuwane są najdawniej używane.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1_000_000):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " version TEXT NOT NULL, key TEXT NOT NULL, price REAL NOT NULL,"
+            " used REAL NOT NULL, PRIMARY KEY (version, key))")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS predictions_used ON predictions (used)")
+
+    def get_many(self, version: str, keys: Sequence[str]) -> Dict[str, float]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = list(keys[start:start + 500])
+                rows = self._conn.execute(
+                    "SELECT key, price FROM predictions WHERE version = ? AND key IN "
+                    f"({','.join('?' * len(batch))})", [version, *batch]).fetchall()
+                found.update(rows)
+            if found:
+                self._conn.executemany(
+                    "UPDATE predictions SET used = ? WHERE version = ? AND key = ?",
+                    [(time.time(), version, key) for key in found])
+        return found
+
+    def put_many(self, version: str, items: Dict[str, float]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                [(version, key, price, now) for key, price in items.items()])
+            self._writes += 1
+            if self._writes % 64:  # COUNT(*) kosztuje O(n), limit sprawdzamy co 64 zapisy
+                return
+            excess = self._conn.execute(
+                "SELECT COUNT(*) FROM predictions").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM predictions WHERE rowid IN (SELECT rowid FROM "
+                    "predictions ORDER BY used LIMIT ?)", (excess,))
+                self.evictions += excess
+
+    def drop_other_versions(self, version: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM predictions WHERE version != ?", (version,))
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CachedPredictor:
+    """
+    ``PredictFn`` z cache: rekordy znalezione w LRU albo na dysku nie
+    przechodzą przez budowę cech i model, a brakujące są liczone jednym
+    wywołaniem modelu. Co ``check_interval`` sekund sprawdza znacznik
+    artefaktów (``artifact_stamp``); po zmianie wersji przeładowuje model
+    (``load_fn``) i czyści cache.
+    """
+
+    def __init__(self,
+                 load_fn: Callable[[], PredictFn],
+                 artifact_paths: Sequence[str],
+                 max_entries: int = 10000,
+                 disk_path: Optional[str] = None,
+                 max_disk_entries: int = 1_000_000,
+                 check_interval: float = 1.0,
+                 mileage_bucket: int = 0):
+        self.load_fn = load_fn
+        self.artifact_paths = [str(p) for p in artifact_paths if p]
+        self.memory = LRUCache(max_entries)
+        self.disk = DiskCache(disk_path, max_disk_entries) if disk_path else None
+        self.check_interval = check_interval
+        self.mileage_bucket = mileage_bucket
+        self.hits = self.disk_hits = self.misses = self.invalidations = 0
+        # liczniki zmieniają wątki handlerów HTTP; ``+=`` nie jest atomowe
+        self._stats_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._stamp = artifact_stamp(self.artifact_paths)
+        self.version = artifact_version(self.artifact_paths)
+        self._predict_fn = load_fn()
+        self._checked = time.monotonic()
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            counters = {"hits": self.hits, "disk_hits": self.disk_hits,
+                        "misses": self.misses, "invalidations": self.invalidations}
+        return {
+            "version": self.version,
+            **counters,
+            "evictions": self.memory.evictions,
+            "disk_evictions": self.disk.evictions if self.disk else 0,
+            "entries": len(self.memory),
+        }
+
+    def _count(self, name: str, value: int) -> None:
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def _refresh(self) -> Tuple[str, PredictFn]:
+        if time.monotonic() - self._checked >= self.check_interval:
+            with self._reload_lock:
+                self._checked = time.monotonic()
+                stamp = artifact_stamp(self.artifact_paths)
+                if stamp == self._stamp:
+                    return self.version, self._predict_fn
+                self._stamp = stamp
+                version = artifact_version(self.artifact_paths)
+                if version != self.version:
+                    logger.info("Model artifacts changed (%s -> %s), reloading",
+                                self.version, version)
+                    self._predict_fn = self.load_fn()
+                    self.memory.clear()
+                    if self.disk is not None:
+                        self.disk.drop_other_versions(version)
+                    self.version = version
+                    self._count("invalidations", 1)
+        return self.version, self._predict_fn
+
+    def __call__(self, df: pd.DataFrame) -> np.ndarray:
+        version, predict_fn = self._refresh()
+        # ta sama znormalizowana ramka daje klucze i trafia do modelu
+        df = normalize_frame(df)
+        records = df.to_dict("records")
+        keys = [version + "\x1e" + record_key(r, self.mileage_bucket) for r in records]
+
+        found = self.memory.get_many(keys)
+        self._count("hits", sum(key in found for key in keys))
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+        if missing and self.disk is not None:
+            from_disk = self.disk.get_many(version, missing)
+            self._count("disk_hits", sum(key in from_disk for key in keys if key not in found))
+            self.memory.put_many(from_disk)
+            found.update(from_disk)
+            missing = [k for k in missing if k not in from_disk]
+
+        if missing:
+            self._count("misses", sum(key not in found for key in keys))
+            first = {k: i for i, k in reversed(list(enumerate(keys)))}
+            batch = df.iloc[[first[k] for k in missing]]
+            if self.mileage_bucket:
+                batch = batch.assign(mileage=(batch["mileage"] / self.mileage_bucket)
+                                     .round() * self.mileage_bucket)
+            computed = dict(zip(missing, map(float, predict_fn(batch))))
+            self.memory.put_many(computed)
+            if self.disk is not None:
+                self.disk.put_many(version, computed)
+            found.update(computed)
+        return np.array([found[k] for k in keys], dtype=np.float64)
@@ -0,0 +1,186 @@
+"""Indeks najbliższych porównywalnych ogłoszeń.
+
+Ogłoszenia z ``clean_df`` są posortowane po (marka, model, rok) i zapisane
+jako tablice ``.npy`` w jednym katalogu: wektory cech (przeskalowane cechy
+liczbowe i paliwo z ``CarFeatureTransformer``), kody kategorii i pola do
+wyświetlenia. ``ComparablesIndex.load`` otwiera je przez ``mmap_mode="r"``,
+więc start nie wczytuje ani nie przebudowuje indeksu, a procesy workerów
+współdzielą strony w page cache.
+
+Zapytanie przeszukuje tylko grupę (marka, model) auta, a w niej tylko
+roczniki w oknie ``year_window`` (zakres z ``searchsorted``), i liczy
+odległości wektorowo. Gdy model jest nieznany albo ma mniej niż ``k``
+ogłoszeń, szuka w grupach marki, a dalej we wszystkich grupach. Zakresy wszystkich grup wyznacza
+jedno ``searchsorted`` po kluczu (grupa, rok) zapisanym przy budowie, a
+zbyt wiele kandydatów jest przerzedzanych do ``max_candidates``.
+"""
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+DISPLAY_CATEGORIES = ["mark", "model", "generation_name", "fuel", "city"]
+DISPLAY_NUMBERS = {"year": np.int16, "mileage": np.int32, "vol_engine": np.float32,
+                   "price": np.float32}
+# przeskalowane NUM_COLS i fuel_encoded z transform_array
+N_DIMS = 6
+# klucz wiersza: grupa * YEAR_SPAN + (rok - min_year)
+YEAR_SPAN = 1 << 10
+
+
+def _vectors(transformer, df: pd.DataFrame) -> np.ndarray:
+    vectors = transformer.transform_array(df)[:, :N_DIMS].astype(np.float32)
+    return np.nan_to_num(vectors, nan=0.0)
+
+
+def build_index(df: pd.DataFrame, transformer, path: str,
+                chunk_rows: int = 1_000_000) -> Path:
+    """
+    Zapisuje indeks ``df`` (po ``clean_data``) do katalogu ``path``. Nowy
+    indeks powstaje obok i zastępuje stary jednym przeniesieniem katalogu.
+    """
+    path = Path(path)
+    codes = {c: df[c].astype("category") for c in DISPLAY_CATEGORIES}
+    order = np.lexsort((df["year"].to_numpy(), codes["model"].cat.codes.to_numpy(),
+                        codes["mark"].cat.codes.to_numpy()))
+
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    tmp.mkdir(parents=True)
+    try:
+        vectors = np.lib.format.open_memmap(tmp / "vectors.npy", mode="w+",
+                                            dtype=np.float32, shape=(len(df), N_DIMS))
+        for start in range(0, len(df), chunk_rows):
+            rows = order[start:start + chunk_rows]
+            vectors[start:start + len(rows)] = _vectors(transformer, df.iloc[rows])
+        vectors.flush()
+        del vectors
+
+        for column, series in codes.items():
+            np.save(tmp / f"{column}.npy", series.cat.codes.to_numpy()[order])
+        for column, dtype in DISPLAY_NUMBERS.items():
+            np.save(tmp / f"{column}.npy", df[column].to_numpy(dtype=dtype)[order])
+
+        # granice grup (marka, model) w posortowanych wierszach
+        mark = codes["mark"].cat.codes.to_numpy()[order]
+        model = codes["model"].cat.codes.to_numpy()[order]
+        starts = np.flatnonzero(np.r_[True, (mark[1:] != mark[:-1]) | (model[1:] != model[:-1])])
+        np.save(tmp / "group_start.npy", np.append(starts, len(df)).astype(np.int64))
+        np.save(tmp / "group_mark.npy", mark[starts])
+        np.save(tmp / "group_model.npy", model[starts])
+        group = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(df))))
+        min_year = int(df["year"].min()) if len(df) else 0
+        years = df["year"].to_numpy(dtype=np.int64)[order] - min_year
+        np.save(tmp / "key.npy", group * YEAR_SPAN + np.clip(years, 0, YEAR_SPAN - 1))
+
+        meta = {"rows": len(df), "min_year": min_year,
+                "categories": {c: s.cat.categories.astype(str).tolist()
+                               for c, s in codes.items()}}
+        (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+        if path.exists():
+            shutil.rmtree(path)
+        os.replace(tmp, path)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return path
+
+
+class ComparablesIndex:
+    """Indeks z ``build_index`` otwarty przez memory mapping."""
+
+    def __init__(self, path: str, transformer, year_window: int = 2,
+                 max_candidates: int = 20_000):
+        path = Path(path)
+        self.transformer = transformer
+        self.year_window = year_window
+        self.max_candidates = max_candidates
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        self.categories = meta["categories"]
+        self.min_year = meta["min_year"]
+        self.arrays = {p.stem: np.load(p, mmap_mode="r") for p in path.glob("*.npy")}
+        # małe tablice grup trzymamy w pamięci
+        self.group_start = np.asarray(self.arrays.pop("group_start"))
+        self.group_mark = np.asarray(self.arrays.pop("group_mark"))
+        self.group_model = np.asarray(self.arrays.pop("group_model"))
+        self._codes = {c: {v: i for i, v in enumerate(values)}
+                       for c, values in self.categories.items()}
+        self._groups = {(int(m), int(n)): i
+                        for i, (m, n) in enumerate(zip(self.group_mark, self.group_model))}
+
+    @classmethod
+    def load(cls, path: str, transformer, year_window: int = 2,
+             max_candidates: int = 20_000) -> "ComparablesIndex":
+        return cls(path, transformer, year_window, max_candidates)
+
+    def __len__(self) -> int:
+        return len(self.arrays["price"])
+
+    def _groups_for(self, mark: str, model: str) -> List[np.ndarray]:
+        """Kolejne coraz szersze zbiory grup: model, marka, wszystkie."""
+        mark_code = self._codes["mark"].get(mark, -1)
+        model_code = self._codes["model"].get(model, -1)
+        levels = []
+        group = self._groups.get((mark_code, model_code))
+        if group is not None:
+            levels.append(np.array([group]))
+        if mark_code >= 0:
+            levels.append(np.flatnonzero(self.group_mark == mark_code))
+        levels.append(np.arange(len(self.group_mark)))
+        return levels
+
+    def _candidates(self, groups: np.ndarray, year: float, k: int) -> np.ndarray:
+        key = self.arrays["key"]
+        year = int(np.clip(year - self.min_year, 0, YEAR_SPAN - 1))
+        window = self.year_window
+        while True:
+            base = groups * YEAR_SPAN
+            lo = np.searchsorted(key, base + max(year - window, 0), side="left")
+            hi = np.searchsorted(key, base + min(year + window, YEAR_SPAN - 1), side="right")
+            total = int((hi - lo).sum())
+            if total >= k or window >= YEAR_SPAN:
+                break
+            window = window * 2 + 1
+        lo, hi = lo[hi > lo], hi[hi > lo]
+        if not len(lo):
+            return np.empty(0, dtype=np.int64)
+        # wiersze zakresów bez pętli: przesunięcia od początku każdego zakresu
+        lengths = hi - lo
+        rows = np.repeat(lo - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        if total > self.max_candidates:
+            rows = rows[::-(-total // self.max_candidates)]
+        return rows
+
+    def query(self, record: Dict, k: int = 5) -> pd.DataFrame:
+        """``k`` najbliższych ogłoszeń dla jednego auta (słownik cech)."""
+        df = pd.DataFrame([record])
+        vector = _vectors(self.transformer, df)[0]
+        for groups in self._groups_for(str(record.get("mark")), str(record.get("model"))):
+            rows = self._candidates(groups, float(record.get("year", 0)), k)
+            if len(rows) >= k:
+                break
+        if not len(rows):
+            return pd.DataFrame(columns=DISPLAY_CATEGORIES + list(DISPLAY_NUMBERS) + ["distance"])
+        # wiersze kandydatów są ciągłymi zakresami, więc odczyt z mmap jest sekwencyjny
+        diff = self.arrays["vectors"][rows] - vector
+        distance = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+        best = np.argpartition(distance, min(k, len(rows)) - 1)[:k]
+        best = best[np.argsort(distance[best])]
+        chosen = rows[best]
+
+        result = {}
+        for column in DISPLAY_CATEGORIES:
+            codes = self.arrays[column][chosen]
+            values = np.asarray(self.categories[column], dtype=object)
+            result[column] = np.where(codes >= 0, values[np.maximum(codes, 0)], None)
+        for column in DISPLAY_NUMBERS:
+            result[column] = self.arrays[column][chosen]
+        result["distance"] = distance[best]
+        return pd.DataFrame(result)
+
+    def query_many(self, df: pd.DataFrame, k: int = 5) -> List[pd.DataFrame]:
+        return [self.query(record, k) for record in df.to_dict("records")]
@@ -0,0 +1,203 @@
+"""Skompilowany ensemble drzew: predykcja bez importu AutoGluon.
+
+``compile_predictor`` (pipeline final_pipeline) spłaszcza modele z refitu
+(LightGBM/XGBoost/CatBoost, bagging, stacking i wagi WeightedEnsemble) do
+tablic NumPy. Predykcja to kilka zwektoryzowanych operacji na całym lesie
+naraz, więc pojedynczy wiersz nie przechodzi przez generatory cech
+i dispatch modeli AutoGluon.
+"""
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+
+# kody ``missing`` w TreeForest, zgodne z semantyką LightGBM
+MISSING_NONE = 0  # NaN -> 0.0, potem zwykłe porównanie
+MISSING_ZERO = 1  # 0 i NaN idą w stronę default_left
+MISSING_NAN = 2   # tylko NaN idzie w stronę default_left
+_ZERO_THRESHOLD = 1e-35
+# wiersze na porcję: tablice (wiersze x drzewa) mieszczą się w cache
+CHUNK_ROWS = 2048
+
+
+class TreeForest:
+    """
+    Las drzew binarnych (LightGBM, XGBoost) jako płaskie tablice węzłów.
+
+    Węzły są przenumerowane tak, że prawe dziecko leży zaraz po lewym:
+    krok przejścia to ``idx = child[idx] + (x > threshold[idx])``. Liście
+    mają ``threshold = +inf`` i wskazują same na siebie, więc po ``depth``
+    krokach każde drzewo kończy w liściu. Porównanie ``x < t`` (XGBoost)
+    jest zamieniane na ``x > prev(t)``.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, missing,
+                 value, roots, depth: int, strict: bool = False, bias: float = 0.0):
+        feature = np.asarray(feature, dtype=np.int64)
+        threshold = np.asarray(threshold, dtype=np.float64)
+        left, right = np.asarray(left), np.asarray(right)
+        default_left = np.asarray(default_left, dtype=bool)
+        missing = np.asarray(missing, dtype=np.int8)
+        if strict:
+            threshold = np.nextafter(threshold, -np.inf)
+
+        order, child = _sibling_layout(feature, left, right, roots)
+        leaf = feature[order] < 0
+        self.feature = np.where(leaf, 0, feature[order]).astype(np.int32)
+        self.threshold = np.where(leaf, np.inf, threshold[order])
+        self.child = child
+        # kierunek dla NaN i dla zera w węzłach ze zbiorczym brakiem wartości
+        zero_right = 0.0 > self.threshold
+        default_right = ~default_left[order] & ~leaf
+        self.nan_right = np.where(missing[order] == MISSING_NONE, zero_right, default_right)
+        self.zero_right = np.where(missing[order] == MISSING_ZERO, default_right, zero_right)
+        self.has_zero_missing = bool((missing[order][~leaf] == MISSING_ZERO).any())
+        self.value = np.asarray(value, dtype=np.float64)[order]
+        self.roots = np.arange(len(roots), dtype=np.int32)
+        self.depth = int(depth)
+        self.bias = float(bias)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        n, d = X.shape
+        flat = X.ravel()
+        offsets = (np.arange(n, dtype=np.int32) * d)[:, None]
+        has_nan = np.isnan(flat).any()
+        idx = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+        for _ in range(self.depth):
+            x = flat.take(offsets + self.feature.take(idx))
+            right = x > self.threshold.take(idx)
+            if has_nan:
+                right = np.where(np.isnan(x), self.nan_right.take(idx), right)
+            if self.has_zero_missing:
+                right = np.where(np.abs(x) <= _ZERO_THRESHOLD, self.zero_right.take(idx), right)
+            idx = self.child.take(idx) + right
+        return self.value.take(idx).sum(axis=1) + self.bias
+
+
+def _sibling_layout(feature, left, right, roots):
+    """
+    Nowa kolejność węzłów (korzenie na początku, dzieci parami obok siebie)
+    oraz indeks lewego dziecka w nowej numeracji (dla liścia: on sam).
+    """
+    order = list(roots)
+    child = [0] * len(order)
+    i = 0
+    while i < len(order):
+        old = order[i]
+        if feature[old] < 0:
+            child[i] = i
+        else:
+            child[i] = len(order)
+            order += [left[old], right[old]]
+            child += [0, 0]
+        i += 1
+    return np.asarray(order), np.asarray(child, dtype=np.int32)
+
+
+class ObliviousForest:
+    """
+    Las drzew symetrycznych (CatBoost): na każdym poziomie drzewa ten sam
+    podział, a numer liścia to bity ``x > border``. Płytsze drzewa są
+    dopełnione podziałami z ``border = +inf`` (bit zawsze 0).
+    """
+
+    def __init__(self, feature, border, leaf_values, nan_as_true=(),
+                 scale: float = 1.0, bias: float = 0.0):
+        self.feature = np.asarray(feature, dtype=np.int32)          # (T, D)
+        self.border = np.asarray(border, dtype=np.float64)          # (T, D)
+        self.leaf_values = np.asarray(leaf_values, dtype=np.float64)  # (T, 2**D)
+        self.nan_as_true = np.asarray(nan_as_true, dtype=np.int32)
+        self.scale = float(scale)
+        self.bias = float(bias)
+        self._powers = 1 << np.arange(self.feature.shape[1])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if len(self.nan_as_true):
+            X = X.copy()
+            cols = X[:, self.nan_as_true]
+            X[:, self.nan_as_true] = np.where(np.isnan(cols), np.inf, cols)
+        bits = X[:, self.feature] > self.border
+        leaf = bits @ self._powers
+        trees = np.arange(len(self.leaf_values))
+        return self.leaf_values[trees, leaf].sum(axis=1) * self.scale + self.bias
+
+
+class CompiledModel:
+    """
+    Jeden model ensemble'u: średnia lasów z baggingu (``forests``) liczona
+    na kolumnach ``columns`` macierzy roboczej, albo ważona suma kolumn
+    (``weights``) dla WeightedEnsemble.
+    """
+
+    def __init__(self, name: str, columns: Sequence[int], forests: List = (),
+                 weights: Sequence[float] = None):
+        self.name = name
+        self.columns = np.asarray(columns, dtype=np.int64)
+        self.forests = list(forests)
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+
+    def predict(self, Z: np.ndarray) -> np.ndarray:
+        X = Z[:, self.columns]
+        if self.weights is not None:
+            return X @ self.weights
+        return np.mean([forest.predict(X) for forest in self.forests], axis=0)
+
+
+class CompileError(Exception):
+    """
+    Modelu nie da się wyrazić w ``CompiledEnsemble`` (np. cechy ``category``,
+    nieobsługiwany typ modelu albo generator cech).
+    """
+
+
+class NotCompiled:
+    """
+    Zapisywany zamiast ``CompiledEnsemble``, gdy modelu nie da się
+    skompilować (np. cechy ``category``); serwowanie używa wtedy predictora
+    AutoGluon.
+    """
+
+    def __init__(self, model_name: str, reason: str):
+        self.model_name = model_name
+        self.reason = reason
+
+
+class CompiledEnsemble:
+    """
+    Cały ensemble z refitu: odwzorowanie cech wejściowych na cechy modelu
+    (jak generatory cech AutoGluon) i modele w kolejności topologicznej.
+    Wynik każdego modelu trafia do kolejnej kolumny macierzy roboczej,
+    z której korzystają modele wyższych poziomów stackingu.
+    """
+
+    def __init__(self, input_columns: Sequence[str], source: Sequence[int],
+                 bool_true: Sequence[float], models: List[CompiledModel],
+                 model_name: str = ""):
+        self.input_columns = list(input_columns)
+        self.source = np.asarray(source, dtype=np.int64)
+        # NaN: cecha przepisana (float32); liczba: cecha 0/1 (x == bool_true)
+        self.bool_true = np.asarray(bool_true, dtype=np.float64)
+        self.models = models
+        self.model_name = model_name
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Ceny dla ramki cech z ``CarFeatureTransformer.transform`` (albo
+        tablicy w kolejności ``input_columns``).
+        """
+        if isinstance(X, pd.DataFrame):
+            X = X[self.input_columns].to_numpy(dtype=np.float32)
+        X = np.asarray(X, dtype=np.float32)[:, self.source].astype(np.float64)
+
+        is_bool = ~np.isnan(self.bool_true)
+        if is_bool.any():
+            X[:, is_bool] = X[:, is_bool] == self.bool_true[is_bool]
+
+        Z = np.empty((len(X), X.shape[1] + len(self.models)))
+        Z[:, :X.shape[1]] = X
+        for start in range(0, len(Z), CHUNK_ROWS):
+            chunk = Z[start:start + CHUNK_ROWS]
+            for i, model in enumerate(self.models):
+                # AutoGluon przekazuje predykcje niższego poziomu jako float32
+                chunk[:, X.shape[1] + i] = model.predict(chunk).astype(np.float32)
+        return Z[:, -1]
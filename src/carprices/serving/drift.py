@@ -0,0 +1,294 @@
+"""Monitorowanie dryfu wejść usługi w stałej pamięci.
+
+Referencja (``build_reference``) powstaje w pipeline ``data_preparation``
+z danych po ``clean_data`` i jest zapisywana obok ``preprocessors.pkl``.
+``DriftMonitor`` aktualizuje przy każdym batchu szkice o stałym rozmiarze:
+
+* ``QuantileSketch``: histogram o krawędziach z kwantyli referencji
+  (year, mileage, vol_engine), z którego odczytujemy kwantyle i PSI;
+* dla mark, model, city, generation_name: dokładne liczności
+  ``capacity`` najczęstszych wartości referencji (reszta w jednym koszyku)
+  do PSI oraz ``FrequencySketch`` (Space-Saving, ``capacity`` liczników)
+  z najczęstszymi wartościami w ruchu, także nowymi;
+* liczniki modeli spoza ``model_te_map`` i generacji "other".
+
+Co ``interval`` sekund porównuje bieżące okno z referencją (PSI) i zaczyna
+nowe okno, więc pamięć nie zależy od liczby obsłużonych zapytań.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_COLUMNS = ["year", "mileage", "vol_engine"]
+CATEGORICAL_COLUMNS = ["mark", "model", "city", "generation_name"]
+RATE_NAMES = ["unknown_model", "other_generation"]
+MISSING = "<missing>"
+# PSI: < 0.1 brak zmian, 0.1-0.25 umiarkowana, > 0.25 istotna zmiana rozkładu
+PSI_ALERT = 0.25
+# PSI cech kategorycznych liczymy na tylu najczęstszych wartościach + reszcie;
+# obciążenie PSI na małym oknie rośnie z liczbą koszyków (ok. koszyki / wiersze)
+PSI_CATEGORIES = 20
+
+
+def psi(expected: np.ndarray, actual: np.ndarray, eps: float = 1e-4) -> float:
+    """Population Stability Index dwóch wektorów liczności tych samych koszyków."""
+    p = np.maximum(expected / max(expected.sum(), 1), eps)
+    q = np.maximum(actual / max(actual.sum(), 1), eps)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+class QuantileSketch:
+    """
+    Liczności w koszykach o stałych krawędziach (kwantyle referencji);
+    pamięć O(``len(edges)``) niezależnie od liczby wartości.
+    """
+
+    def __init__(self, edges: Sequence[float]):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.missing = 0
+
+    @classmethod
+    def from_values(cls, values, bins: int = 64) -> "QuantileSketch":
+        values = np.asarray(values, dtype=np.float64)
+        quantiles = np.linspace(0, 1, bins + 1)[1:-1]
+        sketch = cls(np.unique(np.nanquantile(values, quantiles)))
+        sketch.update(values)
+        return sketch
+
+    def empty(self) -> "QuantileSketch":
+        return QuantileSketch(self.edges)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def update(self, values) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        missing = np.isnan(values)
+        self.missing += int(missing.sum())
+        self.counts += np.bincount(np.searchsorted(self.edges, values[~missing], side="right"),
+                                   minlength=len(self.counts))
+
+    def quantile(self, q: float) -> float:
+        """Przybliżony kwantyl: interpolacja liniowa w koszyku."""
+        if not self.total:
+            return float("nan")
+        cum = np.cumsum(self.counts)
+        i = int(np.searchsorted(cum, q * self.total))
+        if i == 0 or i == len(self.edges):
+            return float(self.edges[min(i, len(self.edges) - 1)])
+        frac = (q * self.total - cum[i - 1]) / max(self.counts[i], 1)
+        return float(self.edges[i - 1] + frac * (self.edges[i] - self.edges[i - 1]))
+
+
+class FrequencySketch:
+    """
+    Najczęstsze wartości (Space-Saving): co najwyżej ``capacity`` liczników;
+    nowa wartość przy pełnym szkicu zastępuje najmniejszy licznik, więc
+    liczności są zawyżone najwyżej o ten licznik.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.total = 0
+
+    @classmethod
+    def from_values(cls, values: pd.Series, capacity: int = 256) -> "FrequencySketch":
+        """Dokładne liczności ``capacity`` najczęstszych wartości."""
+        sketch = cls(capacity)
+        counts = _value_counts(values)
+        sketch.counts = dict(counts.head(capacity).items())
+        sketch.total = int(counts.sum())
+        return sketch
+
+    def empty(self) -> "FrequencySketch":
+        return FrequencySketch(self.capacity)
+
+    def update(self, keys: Iterable[str]) -> None:
+        counts = self.counts
+        for key, count in Counter(keys).items():
+            self.total += count
+            if key in counts:
+                counts[key] += count
+            elif len(counts) < self.capacity:
+                counts[key] = count
+            else:
+                victim = min(counts, key=counts.get)
+                counts[key] = counts.pop(victim) + count
+
+    def top(self, n: int = 10) -> List[List]:
+        return [[k, v] for k, v in sorted(self.counts.items(), key=lambda kv: -kv[1])[:n]]
+
+
+def _value_counts(values: pd.Series) -> pd.Series:
+    counts = values.astype(object).fillna(MISSING).astype(str).value_counts()
+    return counts[counts > 0].astype(int)
+
+
+def _categorical_values(df: pd.DataFrame, column: str) -> pd.Series:
+    values = df[column]
+    if column == "generation_name":
+        # zapytania mogą mieć prefiks "gen-", którego clean_data już nie zostawia
+        values = values.astype(object).str.replace(r"^gen-", "", regex=True)
+    return values
+
+
+def _keys(df: pd.DataFrame, column: str) -> List[str]:
+    """Klucze jak w ``_value_counts(_categorical_values(...))``; dla małych batchy
+    pętla w Pythonie jest kilka razy szybsza niż operacje pandas."""
+    keys = [MISSING if v is None or v != v else str(v) for v in df[column].tolist()]
+    if column == "generation_name":
+        keys = [k[4:] if k.startswith("gen-") else k for k in keys]
+    return keys
+
+
+class DriftReference:
+    """Szkice i odsetki ``RATE_NAMES`` na danych treningowych."""
+
+    def __init__(self,
+                 numeric: Dict[str, QuantileSketch],
+                 categorical: Dict[str, FrequencySketch],
+                 rates: Dict[str, float],
+                 rows: int):
+        self.numeric = numeric
+        self.categorical = categorical
+        self.rates = rates
+        self.rows = rows
+
+
+def build_reference(df: pd.DataFrame, transformer, bins: int = 64,
+                    capacity: int = 256) -> DriftReference:
+    flags = transformer.unknown_flags(df)
+    return DriftReference(
+        numeric={c: QuantileSketch.from_values(df[c], bins) for c in NUMERIC_COLUMNS},
+        categorical={c: FrequencySketch.from_values(_categorical_values(df, c), capacity)
+                     for c in CATEGORICAL_COLUMNS},
+        rates={name: float(flags[name].mean()) if len(df) else 0.0 for name in RATE_NAMES},
+        rows=len(df),
+    )
+
+
+class DriftMonitor:
+    """
+    Okno szkiców bieżącego ruchu porównywane z referencją co ``interval``
+    sekund (gdy okno ma co najmniej ``min_rows`` wierszy). Wynik trafia do
+    ``last_report`` i, opcjonalnie, jako linia JSON do ``log_path``.
+    """
+
+    def __init__(self,
+                 reference: DriftReference,
+                 transformer,
+                 interval: float = 60.0,
+                 min_rows: int = 1000,
+                 log_path: Optional[str] = None):
+        self.reference = reference
+        self.transformer = transformer
+        self._known_positions = {c: {k: i for i, k in enumerate(s.counts)}
+                                 for c, s in reference.categorical.items()}
+        self.interval = interval
+        self.min_rows = min_rows
+        self.log_path = Path(log_path) if log_path else None
+        self.last_report: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.numeric = {c: s.empty() for c, s in self.reference.numeric.items()}
+        self.categorical = {c: s.empty() for c, s in self.reference.categorical.items()}
+        # dokładne liczności wartości z referencji + koszyk pozostałych
+        self.known = {c: np.zeros(len(s.counts) + 1, dtype=np.int64)
+                      for c, s in self.reference.categorical.items()}
+        self.flag_counts = dict.fromkeys(RATE_NAMES, 0)
+        self.rows = 0
+        self.window_start = time.time()
+
+    def update(self, df: pd.DataFrame) -> None:
+        flags = self.transformer.unknown_flags(df)
+        with self._lock:
+            for column, sketch in self.numeric.items():
+                sketch.update(pd.to_numeric(df[column], errors="coerce").to_numpy(np.float64))
+            for column, sketch in self.categorical.items():
+                keys = _keys(df, column)
+                sketch.update(keys)
+                positions = self._known_positions[column]
+                known = self.known[column]
+                other = len(known) - 1
+                for key in keys:
+                    known[positions.get(key, other)] += 1
+            for name in RATE_NAMES:
+                self.flag_counts[name] += int(flags[name].sum())
+            self.rows += len(df)
+            if time.time() - self.window_start >= self.interval and self.rows >= self.min_rows:
+                self._close_window()
+
+    def scores(self) -> Dict:
+        """Wyniki dla bieżącego okna (bez jego zamykania)."""
+        with self._lock:
+            return self._scores()
+
+    def _scores(self) -> Dict:
+        ref = self.reference
+        report = {"window_start": self.window_start, "window_end": time.time(),
+                  "rows": self.rows, "numeric": {}, "categorical": {}, "rates": {}}
+        for column, sketch in self.numeric.items():
+            report["numeric"][column] = {
+                "psi": psi(ref.numeric[column].counts, sketch.counts),
+                "median": sketch.quantile(0.5),
+                "reference_median": ref.numeric[column].quantile(0.5),
+                "missing": sketch.missing,
+            }
+        for column, sketch in self.categorical.items():
+            known = np.array(list(ref.categorical[column].counts.values()))
+            expected = np.append(known[:PSI_CATEGORIES],
+                                 ref.categorical[column].total - known[:PSI_CATEGORIES].sum())
+            counts = self.known[column]
+            actual = np.append(counts[:PSI_CATEGORIES], counts[PSI_CATEGORIES:].sum())
+            report["categorical"][column] = {
+                "psi": psi(expected, actual),
+                "unseen_share": float(counts[-1] / self.rows) if self.rows else 0.0,
+                "top": sketch.top(5),
+            }
+        for name in RATE_NAMES:
+            report["rates"][name] = {
+                "rate": self.flag_counts[name] / self.rows if self.rows else 0.0,
+                "reference_rate": ref.rates[name],
+            }
+        report["drifted"] = sorted(
+            c for group in ("numeric", "categorical")
+            for c, v in report[group].items() if v["psi"] > PSI_ALERT)
+        return report
+
+    def _close_window(self) -> None:
+        report = self._scores()
+        self.last_report = report
+        if report["drifted"]:
+            logger.warning("Input drift in %s (window of %d rows)",
+                           ", ".join(report["drifted"]), report["rows"])
+        if self.log_path is not None:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.log_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(report, ensure_ascii=False) + "\n")
+        self._reset()
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {"last": self.last_report, "current": self._scores()}
+
+
+def monitored(predict_fn, monitor: DriftMonitor):
+    """``PredictFn``, który przed predykcją aktualizuje szkice monitora."""
+    def predict(df: pd.DataFrame):
+        monitor.update(df)
+        return predict_fn(df)
+    return predict
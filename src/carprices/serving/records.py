@@ -0,0 +1,61 @@
+"""Walidacja i normalizacja rekordów wejściowych usługi predykcji.
+
+Rekord to słownik cech jednego auta, jak w formularzu ``app.py``. Wszystkie
+kolumny poza ``generation_name`` są wymagane: brak roku albo przebiegu
+dałby cechy NaN i cenę, której nie da się zinterpretować. Napisy są
+przycinane raz, tutaj, więc klucz cache i predykcja widzą te same wartości.
+"""
+import math
+from numbers import Real
+from typing import Dict
+
+import pandas as pd
+
+TEXT_COLUMNS = ["mark", "model", "generation_name", "fuel", "city"]
+NUMBER_COLUMNS = ["year", "mileage", "vol_engine"]
+INPUT_COLUMNS = ["mark", "model", "generation_name", "year", "mileage",
+                 "vol_engine", "fuel", "city"]
+OPTIONAL_COLUMNS = {"generation_name"}
+
+
+class InvalidRecord(ValueError):
+    """Rekord bez wymaganej cechy albo z wartością złego typu."""
+
+
+def normalize_record(record: Dict) -> Dict:
+    """
+    Zwraca rekord z kolumnami ``INPUT_COLUMNS``: napisy przycięte, liczby
+    jako float, brak ``generation_name`` jako ``None``. Zgłasza
+    ``InvalidRecord``, gdy rekord nie jest słownikiem, brakuje wymaganej
+    cechy albo wartość ma zły typ.
+    """
+    if not isinstance(record, dict):
+        raise InvalidRecord("record must be a JSON object")
+    normalized = {}
+    for column in INPUT_COLUMNS:
+        value = record.get(column)
+        if value is None:
+            if column not in OPTIONAL_COLUMNS:
+                raise InvalidRecord(f"missing required field {column!r}")
+            normalized[column] = None
+        elif column in NUMBER_COLUMNS:
+            if isinstance(value, bool) or not isinstance(value, Real) \
+                    or not math.isfinite(value):
+                raise InvalidRecord(f"field {column!r} must be a finite number, "
+                                    f"got {value!r}")
+            normalized[column] = float(value)
+        else:
+            if not isinstance(value, str):
+                raise InvalidRecord(f"field {column!r} must be a string, got {value!r}")
+            normalized[column] = value.strip()
+    return normalized
+
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Przycina napisy w kolumnach tekstowych ramki (np. z ``app.py``) tak jak
+    ``normalize_record``; pozostałe kolumny zostają bez zmian.
+    """
+    columns = {c: df[c].map(lambda v: v.strip() if isinstance(v, str) else v)
+               for c in TEXT_COLUMNS if c in df and pd.api.types.is_object_dtype(df[c])}
+    return df.assign(**columns) if columns else df
@@ -0,0 +1,251 @@
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import joblib
+import pandas as pd
+
+from .batcher import MicroBatcher, PredictFn
+from .cache import CachedPredictor
+from .comparables import ComparablesIndex
+from .compiled import CompiledEnsemble
+from .drift import DriftMonitor, monitored
+from .records import InvalidRecord, normalize_record
+
+logger = logging.getLogger(__name__)
+
+PREDICTOR_PATH = "data/07_model_output/car_price_predictor_final"
+PREPROCESSORS_PATH = "data/06_models/preprocessors.pkl"
+COMPILED_PATH = "data/07_model_output/compiled_ensemble.pkl"
+# tylko modele potrzebne modelowi z refitu (final_pipeline, package_for_deployment)
+DEPLOY_PATH = "data/07_model_output/car_price_predictor_deploy"
+DRIFT_REFERENCE_PATH = "data/06_models/drift_reference.pkl"
+COMPARABLES_PATH = "data/06_models/comparables"
+
+
+def default_predictor_path() -> str:
+    """Predictor spakowany do wdrożenia, a jeśli go nie ma, pełny z treningu."""
+    return DEPLOY_PATH if Path(DEPLOY_PATH).exists() else PREDICTOR_PATH
+
+
+def load_autogluon(predictor_path: str):
+    """
+    ``TabularPredictor`` z modelami wczytanymi od razu do pamięci
+    (``persist``), żeby pierwsze zapytanie nie czekało na leniwe
+    wczytywanie modeli z dysku.
+    """
+    from autogluon.tabular import TabularPredictor
+
+    predictor = TabularPredictor.load(predictor_path)
+    persisted = predictor.persist()
+    logger.info("Loaded %s, models in memory: %s", predictor_path, persisted)
+    return predictor
+
+
+def load_predict_fn(predictor_path: str = None,
+                    preprocessors_path: str = PREPROCESSORS_PATH,
+                    compiled_path: str = COMPILED_PATH) -> PredictFn:
+    """
+    Wczytuje model i transformer cech jeden raz i zwraca funkcję
+    ``DataFrame -> ceny`` z tą samą ścieżką cech co ``app.py``. Jeśli
+    istnieje skompilowany ensemble zgodny z cechami preprocessorów,
+    AutoGluon nie jest w ogóle importowany. Domyślny predictor to
+    ``default_predictor_path()``.
+    """
+    transformer = joblib.load(preprocessors_path)["transformer"]
+
+    compiled = joblib.load(compiled_path) \
+        if compiled_path and Path(compiled_path).exists() else None
+    if compiled is not None and not _matches(compiled, transformer):
+        logger.info("Compiled ensemble %s not usable (%s), loading AutoGluon",
+                    compiled.model_name, getattr(compiled, "reason", "feature mismatch"))
+        compiled = None
+    if compiled is not None:
+        logger.info("Using compiled ensemble %s", compiled.model_name)
+
+        def predict_fn(df: pd.DataFrame):
+            return compiled.predict(transformer.transform(df))
+
+        return predict_fn
+
+    predictor = load_autogluon(predictor_path or default_predictor_path())
+
+    def predict_fn(df: pd.DataFrame):
+        return predictor.predict(transformer.transform(df)).to_numpy()
+
+    return predict_fn
+
+
+def _matches(compiled, transformer) -> bool:
+    """Skompilowany ensemble pasuje do cech z bieżących preprocessorów."""
+    return isinstance(compiled, CompiledEnsemble) and \
+        compiled.input_columns == list(transformer.feature_names_)
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """
+    ``POST /predict`` przyjmuje obiekt JSON z cechami auta albo listę takich
+    obiektów; rekordy są walidowane (``normalize_record``) przed kolejką
+    micro-batchera, więc błędny rekord zawsze daje 400. ``GET /health`` służy do sprawdzania gotowości, ``GET /stats``
+    zwraca liczniki cache predykcji, a ``GET /drift`` wyniki monitora dryfu.
+    Z indeksem porównywalnych ogłoszeń odpowiedź ``/predict`` zawiera też
+    ``comparables``: ``comparables_k`` najbliższych ogłoszeń dla każdego auta.
+    """
+
+    batcher: MicroBatcher = None
+    cache: CachedPredictor = None
+    monitor: DriftMonitor = None
+    comparables: ComparablesIndex = None
+    comparables_k: int = 5
+    # maksymalny czas oczekiwania żądania na wynik micro-batcha [s]
+    request_timeout: float = 30.0
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send(200, {"cache": self.cache.stats() if self.cache else None})
+        elif self.path == "/drift":
+            self._send(200, self.monitor.report() if self.monitor else {"drift": None})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+        except ValueError as exc:
+            self._send(400, {"error": f"invalid JSON: {exc}"})
+            return
+        single = isinstance(payload, dict)
+        records = [payload] if single else payload
+        if not isinstance(records, list) or not records \
+                or not all(isinstance(r, dict) for r in records):
+            self._send(400, {"error": "expected a JSON object or a non-empty list of objects"})
+            return
+        try:
+            records = [normalize_record(r) for r in records]
+        except InvalidRecord as exc:
+            self._send(400, {"error": str(exc)})
+            return
+        try:
+            prices = self.batcher.predict(records, timeout=self.request_timeout)
+        except TimeoutError:
+            self._send(504, {"error": "prediction timed out"})
+            return
+        except Exception as exc:
+            self._send(500, {"error": str(exc)})
+            return
+        prices = [float(p) for p in prices]
+        body = {"price": prices[0]} if single else {"prices": prices}
+        if self.comparables is not None:
+            try:
+                similar = [self.comparables.query(r, self.comparables_k).to_dict("records")
+                           for r in records]
+            except Exception as exc:
+                self._send(500, {"error": str(exc)})
+                return
+            body["comparables"] = similar[0] if single else similar
+        self._send(200, body)
+
+    def _send(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def serve(predict_fn: PredictFn,
+          host: str = "0.0.0.0",
+          port: int = 8000,
+          max_batch_size: int = 64,
+          max_wait_ms: float = 5.0,
+          monitor: DriftMonitor = None,
+          comparables: ComparablesIndex = None,
+          comparables_k: int = 5) -> None:
+    cache = predict_fn if isinstance(predict_fn, CachedPredictor) else None
+    if monitor is not None:
+        # przed cache: monitor widzi też zapytania obsłużone z cache
+        predict_fn = monitored(predict_fn, monitor)
+    batcher = MicroBatcher(predict_fn, max_batch_size=max_batch_size,
+                           max_wait_ms=max_wait_ms)
+    handler = type("Handler", (PredictionHandler,),
+                   {"batcher": batcher, "cache": cache, "monitor": monitor,
+                    "comparables": comparables, "comparables_k": comparables_k})
+    server = PredictionServer((host, port), handler)
+    logger.info("Serving predictions on http://%s:%d (max_batch_size=%d, "
+                "max_wait_ms=%.1f)", host, port, max_batch_size, max_wait_ms)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        batcher.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Car price prediction service")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--predictor-path", default=default_predictor_path())
+    parser.add_argument("--preprocessors-path", default=PREPROCESSORS_PATH)
+    parser.add_argument("--compiled-path", default=COMPILED_PATH,
+                        help="skompilowany ensemble; pusty napis wymusza AutoGluon")
+    parser.add_argument("--cache-size", type=int, default=10000,
+                        help="wpisy cache LRU w pamięci; 0 wyłącza cache")
+    parser.add_argument("--cache-db", default=None,
+                        help="plik SQLite z cache współdzielonym przez procesy")
+    parser.add_argument("--mileage-bucket", type=int, default=0,
+                        help="zaokrąglenie przebiegu [km] w kluczu i predykcji; 0 = dokładnie")
+    parser.add_argument("--drift-reference", default=DRIFT_REFERENCE_PATH,
+                        help="szkice referencyjne z data_preparation; pusty napis wyłącza monitor")
+    parser.add_argument("--drift-interval", type=float, default=60.0,
+                        help="co ile sekund porównywać okno zapytań z referencją")
+    parser.add_argument("--drift-log", default=None,
+                        help="plik JSONL z wynikami kolejnych okien")
+    parser.add_argument("--comparables-path", default=COMPARABLES_PATH,
+                        help="indeks porównywalnych ogłoszeń; pusty napis je wyłącza")
+    parser.add_argument("--comparables-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    def load():
+        return load_predict_fn(args.predictor_path, args.preprocessors_path,
+                               args.compiled_path)
+
+    if args.cache_size > 0:
+        predict_fn = CachedPredictor(
+            load, [args.predictor_path, args.preprocessors_path, args.compiled_path],
+            max_entries=args.cache_size, disk_path=args.cache_db,
+            mileage_bucket=args.mileage_bucket)
+    else:
+        predict_fn = load()
+
+    transformer = joblib.load(args.preprocessors_path)["transformer"]
+    monitor = None
+    if args.drift_reference and Path(args.drift_reference).exists():
+        monitor = DriftMonitor(joblib.load(args.drift_reference), transformer,
+                               interval=args.drift_interval, log_path=args.drift_log)
+    comparables = None
+    if args.comparables_path and Path(args.comparables_path).exists():
+        comparables = ComparablesIndex.load(args.comparables_path, transformer)
+    serve(predict_fn, args.host, args.port, args.max_batch_size, args.max_wait_ms, monitor,
+          comparables, args.comparables_k)
@@ -0,0 +1,55 @@
+"""Krzywe "co jeśli": cena auta przy zmianie przebiegu, rocznika albo miasta.
+
+Każdy przegląd (``sweep``) to słownik ``kolumna -> wartości``; siatka jest
+iloczynem kartezjańskim wartości (np. 50 przebiegów × 10 roczników), a
+pozostałe cechy są kopiowane z rekordu auta. Wszystkie siatki są sklejane
+w jedną ramkę, więc budowa cech i ``predict`` wykonują się raz dla całego
+zestawu wariantów zamiast raz na punkt.
+"""
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .batcher import PredictFn
+
+Sweep = Dict[str, Sequence]
+
+
+def variant_grid(record: Dict, sweep: Sweep) -> pd.DataFrame:
+    """Ramka wszystkich kombinacji wartości ``sweep`` dla jednego auta."""
+    columns = list(sweep)
+    values = [np.asarray(sweep[c]) for c in columns]
+    sizes = [len(v) for v in values]
+    rows = int(np.prod(sizes)) if sizes else 1
+    grid = {}
+    for i, (column, v) in enumerate(zip(columns, values)):
+        inner = int(np.prod(sizes[i + 1:]))
+        if not rows:  # pusta lista wartości: siatka bez wariantów
+            grid[column] = v[:0]
+            continue
+        grid[column] = np.tile(np.repeat(v, inner), rows // (len(v) * inner))
+    for column, value in record.items():
+        if column not in grid:
+            grid[column] = np.full(rows, value, dtype=object if isinstance(value, str) else None)
+    return pd.DataFrame(grid, columns=list(record) + [c for c in columns if c not in record])
+
+
+def price_curves(predict_fn: PredictFn, record: Dict,
+                 sweeps: Sequence[Sweep]) -> List[pd.DataFrame]:
+    """
+    Ceny dla każdej siatki z ``sweeps`` (kolumny przeglądu + ``price``),
+    policzone jednym wywołaniem ``predict_fn``. Przegląd bez wariantów daje
+    pustą krzywą; gdy wszystkie są puste, ``predict_fn`` nie jest wołane.
+    """
+    grids = [variant_grid(record, sweep) for sweep in sweeps]
+    variants = sum(len(grid) for grid in grids)
+    prices = np.empty(0) if not variants else np.asarray(
+        predict_fn(pd.concat(grids, ignore_index=True)), dtype=np.float64)
+    curves, start = [], 0
+    for sweep, grid in zip(sweeps, grids):
+        curve = grid[list(sweep)].copy()
+        curve["price"] = prices[start:start + len(grid)]
+        curves.append(curve)
+        start += len(grid)
+    return curves
@@ -3,10 +3,16 @@ from the Kedro defaults. For further information, including these default values
 https://docs.kedro.org/en/stable/kedro_project_setup/settings.html."""
 
 # Instantiated project hooks.
-from carprices.hooks import SparkHooks  # noqa: E402
+from carprices.hooks import ArtifactCacheHooks, NodeProfilingHooks, SparkHooks  # noqa: E402
 
 # Hooks are executed in a Last-In-First-Out (LIFO) order.
-HOOKS = (SparkHooks(),)
+# Only these pipelines may start a Spark session; get_spark() anywhere else raises instead of starting a JVM.
+# With data_preparation.engine: spark, data_preparation/__default__/all may start it as well.
+HOOKS = (
+    SparkHooks(spark_pipelines=("data_preparation_spark",)),
+    NodeProfilingHooks(),
+    ArtifactCacheHooks(),
+)
 
 # Installed plugins for which to disable hook auto-registration.
 # DISABLE_HOOKS_FOR_PLUGINS = ("kedro-viz",)
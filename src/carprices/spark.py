@@ -0,0 +1,80 @@
+"""Leniwe tworzenie SparkSession.
+
+Hook ``SparkHooks`` tylko rejestruje tu konfigurację z ``conf/base/spark.yml``.
+JVM startuje dopiero przy pierwszym ``get_spark()``, czyli wtedy, gdy węzeł
+lub dataset faktycznie potrzebuje Sparka. Pipeline'y pandas/AutoGluon nie
+płacą więc za start sesji.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_app_name: Optional[str] = None
+_conf: Dict[str, str] = {}
+_disabled_reason: Optional[str] = None
+_session = None
+
+
+def configure(app_name: str, conf: Dict[str, str]) -> None:
+    """
+    Zapamiętuje nazwę aplikacji i ustawienia Sparka bez uruchamiania sesji.
+    """
+    global _app_name, _conf
+    with _lock:
+        _app_name = app_name
+        _conf = dict(conf)
+
+
+def disable(reason: str) -> None:
+    """
+    Blokuje tworzenie sesji (np. dla pipeline'u, który nie używa Sparka);
+    ``get_spark()`` zgłosi wtedy ``RuntimeError`` zamiast startować JVM.
+    """
+    global _disabled_reason
+    _disabled_reason = reason
+
+
+def enable() -> None:
+    global _disabled_reason
+    _disabled_reason = None
+
+
+def is_active() -> bool:
+    return _session is not None
+
+
+def get_spark():
+    """
+    Zwraca SparkSession, tworząc ją przy pierwszym wywołaniu.
+    """
+    global _session
+    if _disabled_reason is not None:
+        raise RuntimeError(f"SparkSession is disabled: {_disabled_reason}")
+    if _session is not None:
+        return _session
+    with _lock:
+        if _session is None:
+            from pyspark import SparkConf
+            from pyspark.sql import SparkSession
+
+            start = time.perf_counter()
+            builder = SparkSession.builder
+            if _app_name is not None:
+                builder = builder.appName(_app_name).enableHiveSupport() \
+                    .config(conf=SparkConf().setAll(_conf.items()))
+            _session = builder.getOrCreate()
+            _session.sparkContext.setLogLevel("WARN")
+            logger.info("Started SparkSession in %.1f s", time.perf_counter() - start)
+    return _session
+
+
+def stop() -> None:
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.stop()
+            _session = None
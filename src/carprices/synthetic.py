@@ -0,0 +1,88 @@
+"""Syntetyczne ogłoszenia w schemacie ``Car_Prices_Poland_Kaggle.csv``.
+
+Rozkłady przypominają dane z Kaggle: kilka marek dominuje, modele należą
+do marek, a generacje do modeli. Część generacji jest pusta, a paliwa
+spoza Gasoline/Diesel i wartości spoza zakresów trafiają do filtrów w
+``clean_data``. Cena zależy od marki, wieku, przebiegu i pojemności.
+Służy do benchmarków i testów na dowolnej liczbie wierszy.
+"""
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["Unnamed: 0", "mark", "model", "generation_name", "year", "mileage",
+           "vol_engine", "fuel", "city", "province", "price"]
+FUELS = ["Gasoline", "Diesel", "LPG", "Hybrid", "Electric", "CNG"]
+FUEL_P = [0.50, 0.41, 0.05, 0.03, 0.007, 0.003]
+PROVINCES = ["Mazowieckie", "Śląskie", "Wielkopolskie", "Małopolskie",
+             "Dolnośląskie", "Łódzkie", "Pomorskie", "Lubelskie"]
+
+N_MARKS, MODELS_PER_MARK, GENS_PER_MODEL, N_CITIES = 60, 25, 4, 4000
+
+
+def _zipf_index(rng: np.random.Generator, a: float, n: int, size: int) -> np.ndarray:
+    return (rng.zipf(a, size) - 1) % n
+
+
+def synthetic_listings(rows: int, seed: int = 0, start: int = 0) -> pd.DataFrame:
+    """
+    ``rows`` ogłoszeń; ``start`` przesuwa kolumnę indeksu ``Unnamed: 0``
+    (kolejne porcje dużego pliku). Katalog marek, modeli i miast zależy
+    tylko od stałych modułu, więc porcje z różnym ``seed`` są zgodne.
+    """
+    rng = np.random.default_rng(seed)
+    mark = _zipf_index(rng, 1.6, N_MARKS, rows)
+    model = mark * MODELS_PER_MARK + _zipf_index(rng, 1.4, MODELS_PER_MARK, rows)
+    gen = model * GENS_PER_MODEL + rng.integers(0, GENS_PER_MODEL, rows)
+    city = _zipf_index(rng, 1.3, N_CITIES, rows)
+
+    age = np.clip(rng.gamma(3.0, 3.5, rows), 0, 40).astype(int)
+    year = 2024 - age
+    mileage = np.clip(age * rng.normal(15000, 6000, rows) + rng.normal(5000, 3000, rows),
+                      0, 500000).round(-2).astype(int)
+    vol_engine = np.clip(rng.lognormal(np.log(1700), 0.3, rows), 800, 6500).round().astype(int)
+    fuel = np.array(FUELS)[rng.choice(len(FUELS), rows, p=FUEL_P)]
+
+    # cena bazowa marki niezależna od jej popularności
+    base = 100000 + (np.arange(N_MARKS) * 7919 % 97) * 3500.0
+    price = (base[mark] * np.exp(-0.11 * age) * (vol_engine / 1700) ** 0.6
+             * np.exp(-mileage / 600000) * rng.lognormal(0, 0.25, rows))
+    price = np.clip(price, 1500, 2_500_000).round(-2).astype(int)
+
+    generation = pd.Series(
+        np.char.add("gen-g", gen.astype(str)), dtype=object)
+    generation[rng.random(rows) < 0.25] = np.nan
+
+    return pd.DataFrame({
+        "Unnamed: 0": np.arange(start, start + rows),
+        "mark": np.char.add("mark", mark.astype(str)),
+        "model": np.char.add("model", model.astype(str)),
+        "generation_name": generation,
+        "year": year,
+        "mileage": mileage,
+        "vol_engine": vol_engine,
+        "fuel": fuel,
+        "city": np.char.add("city", city.astype(str)),
+        "province": np.array(PROVINCES)[_zipf_index(rng, 1.5, len(PROVINCES), rows)],
+        "price": price,
+    }, columns=COLUMNS)
+
+
+def iter_synthetic_listings(rows: int, chunk_rows: int = 1_000_000,
+                            seed: int = 0) -> Iterator[pd.DataFrame]:
+    """Porcje po ``chunk_rows`` wierszy, łącznie ``rows``."""
+    for i, start in enumerate(range(0, rows, chunk_rows)):
+        yield synthetic_listings(min(chunk_rows, rows - start), seed=seed + i, start=start)
+
+
+def write_synthetic_csv(path: str, rows: int, chunk_rows: int = 1_000_000,
+                        seed: int = 0) -> Path:
+    """Zapisuje plik CSV porcjami, bez trzymania całości w pamięci."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for i, chunk in enumerate(iter_synthetic_listings(rows, chunk_rows, seed)):
+        chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0,
+                     index=False, encoding="utf-8")
+    return path
@@ -0,0 +1,40 @@
+import pandas as pd
+import pyarrow.parquet as pq
+
+from carprices.pipelines.batch_scoring import nodes
+from carprices.pipelines.data_preparation.nodes import RAW_DTYPES
+
+
+class _Transformer:
+    def transform(self, df):
+        return df[["year", "mileage"]]
+
+
+class _Predictor:
+    def predict(self, X):
+        return X["mileage"] * 0.1
+
+
+def test_score_listings_reads_the_load_data_projection(tmp_path, monkeypatch):
+    monkeypatch.setattr(nodes.joblib, "load", lambda path: {"transformer": _Transformer()})
+    monkeypatch.setattr(nodes.TabularPredictor, "load", lambda path: _Predictor())
+    raw = pd.DataFrame({
+        "mark": ["audi", "bmw", "opel"], "model": ["a4", "x3", "astra"],
+        # pierwsza porcja bez generacji i z całkowitym rokiem
+        "generation_name": [None, "gen-g01", "gen-k"],
+        "year": [2015, 2018.0, 2012], "mileage": [120000, 50000, 200000],
+        "vol_engine": [1968, 1995, 1598], "fuel": ["Diesel", "Diesel", "Gasoline"],
+        "city": ["Poznań", "Kraków", "Łódź"], "province": ["Wielkopolskie"] * 3,
+        "price": [60000, 150000, 20000],
+    })
+    raw.to_csv(tmp_path / "listings.csv")  # z kolumną indeksu "Unnamed: 0"
+    output = tmp_path / "scored.parquet"
+
+    nodes.score_listings(str(tmp_path / "listings.csv"), str(output),
+                         "preprocessors.pkl", "predictor", chunksize=1)
+
+    table = pq.read_table(output)
+    assert table.column_names == [*RAW_DTYPES, "predicted_price"]
+    assert str(table.schema.field("generation_name").type) == "string"
+    assert str(table.schema.field("year").type) == "double"
+    assert table.column("predicted_price").to_pylist() == [12000.0, 5000.0, 20000.0]
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from carprices.pipelines.data_preparation.nodes import (
+    clean_data,
+    compute_feature_stats,
+    build_feature_transformer,
+    extract_target,
+    build_app_lookups,
+    load_data,
+)
+
+
+@pytest.fixture
+def raw_df():
+    rng = np.random.default_rng(0)
+    n = 400
+    return pd.DataFrame({
+        "mark": rng.choice(["audi", "bmw", "opel", "skoda"], n),
+        "model": rng.choice(["a4", "x5", "astra", "octavia", "fabia"], n),
+        "generation_name": rng.choice(["gen-b8", "gen-e70", "gen-j", None], n),
+        "year": rng.integers(1995, 2025, n),
+        "mileage": rng.integers(2000, 300000, n),
+        "vol_engine": rng.integers(1000, 3000, n),
+        "fuel": rng.choice(["Gasoline", "Diesel"], n),
+        "city": rng.choice(["Warszawa", "Kraków", "Gdańsk"], n),
+        "province": "x",
+        "price": rng.integers(10000, 300000, n),
+    })
+
+
+@pytest.fixture
+def transformer(raw_df):
+    stats = compute_feature_stats(clean_data(raw_df), 2025)
+    return build_feature_transformer(stats, 2, 2)
+
+
+def test_single_row_matches_batch(raw_df, transformer):
+    clean_df = clean_data(raw_df)
+    batch = transformer.transform(clean_df)
+    row = transformer.transform(clean_df.iloc[[7]])
+    assert list(batch.columns) == transformer.feature_names_
+    np.testing.assert_allclose(row.to_numpy(), batch.iloc[[7]].to_numpy())
+
+
+def test_one_hot_groups_sum_to_one(raw_df, transformer):
+    clean_df = clean_data(raw_df)
+    features, target = extract_target(clean_df, transformer)
+    assert len(features) == len(target)
+    marks = features.filter(like="mark_").sum(axis=1)
+    cities = features.filter(like="city_").sum(axis=1)
+    assert (marks == 1).all() and (cities == 1).all()
+
+
+def test_unknown_levels_fall_back(transformer):
+    df = pd.DataFrame([{
+        "mark": "tesla", "model": "model-s", "year": 2020, "mileage": 10000,
+        "vol_engine": 1000, "fuel": "Diesel", "generation_name": None,
+        "city": "Berlin",
+    }])
+    X = transformer.transform(df).iloc[0]
+    assert X["mark_other_mark"] == 1
+    assert X["city_other_city"] == 1
+    assert X["model_te"] == pytest.approx(transformer.model_te_default_)
+
+
+def test_app_lookups(raw_df, transformer):
+    lookups = build_app_lookups(raw_df, transformer)
+    assert lookups["marks"] == ["audi", "bmw", "opel", "skoda"]
+    assert lookups["model_map"]["audi"] == sorted(
+        raw_df.loc[raw_df["mark"] == "audi", "model"].unique())
+    assert all(not g.startswith("gen-") for gens in lookups["gen_map"].values()
+               for g in gens)
+    assert lookups["template_columns"] == transformer.feature_names_
+
+
+def test_typed_output_matches_for_categorical_and_object_input(raw_df, transformer):
+    clean_df = clean_data(raw_df)
+    assert clean_df["mark"].dtype == "category"
+    as_object = clean_df.astype({c: object for c in ["mark", "model", "city",
+                                                     "generation_name", "fuel"]})
+    typed = transformer.transform(clean_df)
+    pd.testing.assert_frame_equal(typed, transformer.transform(as_object))
+    assert typed.dtypes.astype(str).to_dict() == transformer.feature_dtypes_
+
+
+def test_categorical_load_gives_same_clean_data_as_object_strings(raw_df, tmp_path):
+    raw_df.loc[::7, "generation_name"] = "b8"  # scala się z "gen-b8"
+    path = tmp_path / "cars.csv"
+    raw_df.to_csv(path, index=True)
+    loaded = load_data(str(path))
+    assert "province" not in loaded and "Unnamed: 0" not in loaded
+    assert loaded["model"].dtype == "category"
+
+    categorical = clean_data(loaded)
+    strings = clean_data(raw_df)
+    assert set(categorical["generation_name"].cat.categories) == \
+        set(categorical["generation_name"])
+    pd.testing.assert_frame_equal(
+        categorical.astype(object).reset_index(drop=True),
+        strings.astype(object).reset_index(drop=True))
+
+
+def test_categorical_mode_matches_onehot_levels(raw_df):
+    stats = compute_feature_stats(clean_data(raw_df), 2025)
+    onehot = build_feature_transformer(stats, 2, 2, "onehot")
+    categorical = build_feature_transformer(stats, 2, 2, "categorical")
+    clean_df = clean_data(raw_df)
+
+    wide, compact = onehot.transform(clean_df), categorical.transform(clean_df)
+    assert compact.columns[-3:].tolist() == ["mark", "city", "generation"]
+    assert compact.dtypes.astype(str).to_dict() == categorical.feature_dtypes_
+    pd.testing.assert_frame_equal(compact.iloc[:, :7], wide.iloc[:, :7])
+    marks = wide.filter(like="mark_").to_numpy().argmax(axis=1)
+    np.testing.assert_array_equal(compact["mark"].cat.codes.to_numpy(), marks)
+    # stałe kategorie: pojedynczy wiersz ma te same słowniki co batch
+    row = categorical.transform(clean_df.iloc[[0]])
+    assert row["city"].cat.categories.tolist() == categorical.categories_["city"]
@@ -0,0 +1,78 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pyspark = pytest.importorskip("pyspark")
+
+# pyspark startuje JVM z JAVA_HOME albo z ``java`` w PATH
+pytestmark = pytest.mark.skipif(
+    not (os.environ.get("JAVA_HOME") or shutil.which("java")),
+    reason="Spark tests need Java (JAVA_HOME or java on PATH)")
+
+from pyspark.sql import SparkSession  # noqa: E402
+
+import carprices.spark  # noqa: E402
+
+from carprices.pipelines.data_preparation.nodes import (  # noqa: E402
+    build_feature_transformer,
+    clean_data,
+    compute_feature_stats,
+    extract_target,
+    load_data,
+)
+from carprices.pipelines.data_preparation.spark_nodes import (  # noqa: E402
+    clean_data_spark,
+    compute_feature_stats_spark,
+    encode_features_spark,
+)
+
+from .test_stats import _assert_same_transformer, raw_df  # noqa: E402,F401
+
+
+@pytest.fixture(scope="module")
+def spark():
+    session = SparkSession.builder.master("local[1]") \
+        .config("spark.sql.shuffle.partitions", "2").getOrCreate()
+    yield session
+    carprices.spark.stop()
+
+
+def _sorted(df):
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("feature_mode", ["onehot", "categorical"])
+def test_spark_path_matches_pandas(spark, raw_df, tmp_path, feature_mode):  # noqa: F811
+    csv_path = tmp_path / "raw.csv"
+    pd.concat([raw_df, raw_df.iloc[:50]]).to_csv(csv_path)  # z kolumną indeksu
+
+    clean_sdf, lookup_source = clean_data_spark(str(csv_path))
+    stats = compute_feature_stats_spark(clean_sdf, 2025)
+    transformer = build_feature_transformer(stats, 3, 2, feature_mode)
+    features, target, clean_df = encode_features_spark(clean_sdf, transformer)
+
+    expected_clean = clean_data(load_data(str(csv_path)))
+    expected_stats = compute_feature_stats(expected_clean, 2025)
+    expected = build_feature_transformer(expected_stats, 3, 2, feature_mode)
+    _assert_same_transformer(transformer, expected)
+    np.testing.assert_array_equal(stats.seen_hashes.to_array(),
+                                  expected_stats.seen_hashes.to_array())
+    assert stats.gen_classes() == expected_stats.gen_classes()
+
+    expected_features, expected_target = extract_target(expected_clean, expected)
+    # segmenty (marka, rok) w tych samych wierszach co cechy i cena
+    pd.testing.assert_frame_equal(
+        _sorted(features.assign(price=target["price"], segment_mark=target["mark"],
+                                segment_year=target["year"])),
+        _sorted(expected_features.assign(price=expected_target["price"],
+                                         segment_mark=expected_target["mark"],
+                                         segment_year=expected_target["year"])))
+    assert len(clean_df) == len(expected_clean)
+    # clean_df zebrany osobną akcją, a wiersze nadal zgodne z cechami i ceną
+    clean_features, clean_target = extract_target(clean_df, transformer)
+    pd.testing.assert_frame_equal(clean_features, features, check_dtype=False)
+    pd.testing.assert_frame_equal(clean_target, target)
+    assert set(lookup_source["mark"]) == set(raw_df["mark"])
@@ -0,0 +1,190 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from carprices.pipelines.data_preparation.features import NUM_COLS, numerical_features
+from carprices.pipelines.data_preparation.nodes import (
+    build_feature_transformer,
+    clean_data,
+    compute_feature_stats,
+    compute_feature_stats_chunked,
+    extract_target,
+    transform_chunked,
+    update_feature_stats,
+)
+from carprices.pipelines.data_preparation.stats import SeenHashes
+
+
+@pytest.fixture
+def raw_df():
+    rng = np.random.default_rng(1)
+    n = 1000
+    return pd.DataFrame({
+        "mark": rng.choice(["audi", "bmw", "opel", "skoda", "fiat"], n),
+        "model": rng.choice(["a4", "x5", "astra", "octavia", "panda"], n),
+        "generation_name": rng.choice(["gen-b8", "gen-e70", "gen-j", None], n),
+        "year": rng.integers(1995, 2026, n),
+        "mileage": rng.integers(2000, 300000, n),
+        "vol_engine": rng.integers(1000, 3000, n),
+        "fuel": rng.choice(["Gasoline", "Diesel", "LPG"], n),
+        "city": rng.choice(["Warszawa", "Kraków", "Gdańsk", "Łódź"], n),
+        "price": rng.integers(5000, 320000, n),
+    })
+
+
+def _assert_same_transformer(a, b):
+    np.testing.assert_allclose(a.scale_mean_, b.scale_mean_)
+    np.testing.assert_allclose(a.scale_std_, b.scale_std_)
+    assert a.feature_names_ == b.feature_names_
+    te_a = dict(zip(a.model_index_, a.model_te_values_))
+    te_b = dict(zip(b.model_index_, b.model_te_values_))
+    assert te_a.keys() == te_b.keys()
+    np.testing.assert_allclose([te_a[k] for k in te_a], [te_b[k] for k in te_a])
+
+
+def test_seen_hashes_matches_a_set_with_few_runs():
+    rng = np.random.default_rng(0)
+    seen, expected = SeenHashes(), set()
+    for _ in range(200):
+        chunk = rng.integers(0, 5000, 64).astype(np.uint64)
+        new = ~seen.contains(chunk)
+        assert (new == np.array([h not in expected for h in chunk])).all()
+        seen.add(chunk)
+        expected.update(chunk.tolist())
+    assert len(seen) == len(expected)
+    np.testing.assert_array_equal(seen.to_array(), sorted(expected))
+    # przebiegi maleją geometrycznie, więc jest ich O(log n)
+    assert len(seen._runs) <= 2 * np.log2(len(expected))
+
+
+def test_stats_match_batch_estimators(raw_df):
+    clean_df = clean_data(raw_df)
+    transformer = compute_feature_stats(clean_df, 2025).to_transformer(3, 2)
+    scaler = StandardScaler().fit(pd.DataFrame(numerical_features(clean_df, 2025),
+                                               columns=NUM_COLS))
+    np.testing.assert_allclose(transformer.scale_mean_, scaler.mean_)
+    np.testing.assert_allclose(transformer.scale_std_, scaler.scale_)
+    te = clean_df["price"].astype("float64").groupby(clean_df["model"],
+                                                      observed=True).mean()
+    np.testing.assert_allclose(
+        transformer.model_te_values_[transformer.model_index_.get_indexer(te.index)],
+        te.to_numpy())
+
+
+def test_incremental_update_matches_full_run(raw_df):
+    base, delta = raw_df.iloc[:600], raw_df.iloc[600:]
+    # delta zawiera też powtórzone ogłoszenia z historii
+    delta = pd.concat([delta, base.iloc[:50]], ignore_index=True)
+
+    stats = compute_feature_stats(clean_data(base), 2025)
+    clean_delta, updated = update_feature_stats(
+        {"day1": delta.iloc[:200], "day2": delta.iloc[200:]}, stats)
+
+    full = compute_feature_stats(clean_data(raw_df), 2025)
+    assert len(clean_delta) == len(clean_data(raw_df)) - len(clean_data(base))
+    assert updated.n_rows == full.n_rows
+    _assert_same_transformer(updated.to_transformer(3, 2), full.to_transformer(3, 2))
+    # stan wejściowy nie jest modyfikowany
+    assert stats.n_rows == len(clean_data(base))
+
+
+def test_duplicates_are_detected_after_generation_normalization(raw_df, tmp_path):
+    row = raw_df[raw_df["fuel"].isin(["Gasoline", "Diesel"])
+                 & raw_df["price"].between(10000, 300000)].iloc[[0]]
+    variants = pd.concat([row.assign(generation_name="gen-b8"),
+                          row.assign(generation_name="b8"),
+                          row.assign(generation_name=None),
+                          row.assign(generation_name="unknown")], ignore_index=True)
+
+    assert clean_data(variants)["generation_name"].tolist() == ["b8", "unknown"]
+    # przyrost: te same wiersze są duplikatami historii z clean_df
+    stats = compute_feature_stats(clean_data(variants.iloc[[0, 2]]), 2025)
+    clean_delta, _ = update_feature_stats({"day1": variants.iloc[[1, 3]]}, stats)
+    assert clean_delta.empty
+    # tryb porcjowy, także gdy warianty trafiają do różnych porcji
+    variants.to_csv(tmp_path / "raw.csv", index=False)
+    stats, _ = compute_feature_stats_chunked(str(tmp_path / "raw.csv"), 1, 2025)
+    assert stats.n_rows == 2
+
+
+def test_chunked_preparation_matches_in_memory(raw_df, tmp_path):
+    raw_df = pd.concat([raw_df, raw_df.iloc[:100]], ignore_index=True)
+    csv_path = tmp_path / "raw.csv"
+    raw_df.to_csv(csv_path, index=False)
+
+    stats, lookup_source = compute_feature_stats_chunked(str(csv_path), 128, 2025)
+    transformer = build_feature_transformer(stats, 3, 2)
+    summary = transform_chunked(str(csv_path), transformer, 128,
+                                str(tmp_path / "clean.parquet"),
+                                str(tmp_path / "features.parquet"),
+                                str(tmp_path / "target.parquet"))
+
+    clean_df = clean_data(raw_df)
+    expected = build_feature_transformer(compute_feature_stats(clean_df, 2025), 3, 2)
+    _assert_same_transformer(transformer, expected)
+    features, target = extract_target(clean_df, expected)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "features.parquet"),
+                                  features.reset_index(drop=True))
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "target.parquet"),
+                                  target.reset_index(drop=True))
+    assert summary.set_index("metric").loc["rows_out", "value"] == len(clean_df)
+    assert set(lookup_source["mark"]) == set(raw_df["mark"])
+
+
+def test_incremental_pipeline_appends_each_delta_once(raw_df, tmp_path):
+    from kedro.io import DataCatalog
+    from kedro.runner import SequentialRunner
+
+    from carprices.pipelines.data_preparation.pipeline import create_incremental_pipeline
+    from carprices.pipelines.model_input.nodes import append_increments
+
+    base = clean_data(raw_df.iloc[:600])
+    stats = compute_feature_stats(base, 2025)
+    transformer = build_feature_transformer(stats, 3, 2)
+    state_path = tmp_path / "state.pkl"
+    config = {
+        "car_prices_deltas": {
+            "type": "partitions.IncrementalDataset", "path": str(tmp_path / "deltas"),
+            "dataset": "pandas.CSVDataset", "filename_suffix": ".csv"},
+        **{name: {"type": "partitions.IncrementalDataset", "path": str(tmp_path / name),
+                  "dataset": "pandas.ParquetDataset", "filename_suffix": ".parquet"}
+           for name in ["features_increments", "target_increments"]},
+    }
+
+    (tmp_path / "deltas").mkdir()
+    for day, delta in [("day1", raw_df.iloc[600:800]), ("day2", raw_df.iloc[800:])]:
+        delta.to_csv(tmp_path / "deltas" / f"{day}.csv", index=False)
+        # każdy przebieg z nowym katalogiem, jak osobne `kedro run`
+        catalog = DataCatalog.from_config(config)
+        catalog.add_feed_dict({
+            "feature_stats": stats, "saved_feature_transformer": transformer,
+            "params:data_preparation.incremental_stats_path": str(state_path)})
+        SequentialRunner().run(create_incremental_pipeline().from_nodes(
+            "ingest_deltas_node"), catalog)
+
+    features_increments = catalog.load("features_increments")
+    assert len(features_increments) == 2
+    base_features, base_target = extract_target(base, transformer)
+    features, target = append_increments(base_features, base_target, features_increments,
+                                         catalog.load("target_increments"))
+    # historia = baza + każdy przyrost dokładnie raz, cechy z niezmienionego
+    # transformera, a stan statystyk jak w pełnym przebiegu
+    full = clean_data(raw_df)
+    assert len(features) == len(target) == len(full)
+    expected, _ = extract_target(full, transformer)
+    pd.testing.assert_frame_equal(features.sort_values(list(features)).reset_index(drop=True),
+                                  expected.sort_values(list(expected)).reset_index(drop=True))
+    assert joblib.load(state_path).n_rows == len(full)
+
+
+def test_full_run_resets_increments(tmp_path):
+    from carprices.pipelines.data_preparation.nodes import reset_increments
+
+    (tmp_path / "features_increments").mkdir()
+    (tmp_path / "features_increments" / "day1.parquet").touch()
+    (tmp_path / "state.pkl").touch()
+    reset_increments(None, [str(tmp_path / "features_increments"),
+                            str(tmp_path / "state.pkl"), str(tmp_path / "CHECKPOINT")])
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from carprices.pipelines.final_pipeline.compile import (
+    _catboost_forest,
+    _lightgbm_forest,
+    _xgboost_forest,
+    compile_predictor,
+)
+from carprices.pipelines.final_pipeline.nodes import compile_final_ensemble
+from carprices.serving.compiled import CompileError, NotCompiled
+
+ENSEMBLE_HYPERPARAMETERS = {
+    "GBM": {"num_boost_round": 20},
+    "XGB": {"n_estimators": 20},
+    "CAT": {"iterations": 20},
+}
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    n = 2000
+    X = pd.DataFrame({
+        "x0": rng.normal(size=n),
+        "x1": rng.integers(0, 2, n).astype(np.float32),  # one-hot: dużo zer
+        "x2": rng.normal(size=n),
+    }, dtype=np.float32)
+    X.loc[rng.random(n) < 0.1, "x2"] = np.nan
+    y = 3 * X["x0"] + 2 * X["x1"] + np.nan_to_num(X["x2"], nan=-1.0) + rng.normal(size=n)
+    return X, y
+
+
+def _as_input(X):
+    return X.to_numpy(dtype=np.float32).astype(np.float64)
+
+
+def test_lightgbm_forest_matches_booster(data):
+    lightgbm = pytest.importorskip("lightgbm")
+    X, y = data
+    booster = lightgbm.train({"objective": "regression", "num_leaves": 15, "verbose": -1},
+                             lightgbm.Dataset(X, y), num_boost_round=30)
+    np.testing.assert_allclose(_lightgbm_forest(booster).predict(_as_input(X)),
+                               booster.predict(X), rtol=1e-9)
+
+
+def test_xgboost_forest_matches_sparse_input(data):
+    xgboost = pytest.importorskip("xgboost")
+    from scipy.sparse import csr_matrix
+    X, y = data
+    # AutoGluon podaje XGBoost macierz rzadką, w której zera są brakami
+    model = xgboost.XGBRegressor(n_estimators=30, max_depth=4).fit(csr_matrix(X.to_numpy()), y)
+    expected = model.predict(csr_matrix(X.to_numpy()))
+    np.testing.assert_allclose(_xgboost_forest(model.get_booster()).predict(_as_input(X)),
+                               expected, rtol=1e-5, atol=1e-4)  # suma float32 w XGBoost
+
+
+def test_catboost_forest_matches_regressor(data):
+    catboost = pytest.importorskip("catboost")
+    X, y = data
+    model = catboost.CatBoostRegressor(iterations=30, depth=4, verbose=False).fit(X, y)
+    np.testing.assert_allclose(_catboost_forest(model).predict(_as_input(X)),
+                               model.predict(X), rtol=1e-9)
+
+
+def _listings(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        "age": rng.normal(size=n).astype(np.float32),
+        "mileage": rng.normal(size=n).astype(np.float32),
+        "mark_audi": rng.integers(0, 2, n).astype(np.uint8),
+    })
+    X.loc[X.index[::17], "mileage"] = np.nan
+    y = pd.Series(50000 - 8000 * X["age"] - 3000 * X["mileage"].fillna(0)
+                  + 5000.0 * X["mark_audi"].astype(np.float64) + rng.normal(0, 1000, n),
+                  name="price")
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def predictor(tmp_path_factory):
+    tabular = pytest.importorskip("autogluon.tabular")
+    X, y = _listings()
+    return tabular.TabularPredictor(label="price", path=str(tmp_path_factory.mktemp("ag")),
+                                    verbosity=0).fit(
+        X.assign(price=y), hyperparameters=ENSEMBLE_HYPERPARAMETERS,
+        num_bag_folds=2, num_stack_levels=1, refit_full=True)
+
+
+def test_compiled_ensemble_matches_autogluon(predictor):
+    X, _ = _listings(200, seed=1)
+    refit = predictor.model_refit_map()[predictor.model_best]
+    # pełny ensemble ze stackingiem (foldy baggingu) i jego wersja z refitu
+    for model in [predictor.model_best, refit]:
+        compiled = compile_predictor(predictor, model)
+        np.testing.assert_allclose(compiled.predict(X),
+                                   predictor.predict(X, model=model).to_numpy(),
+                                   rtol=1e-5)
+
+    compiled, parity = compile_final_ensemble(predictor, X)
+    assert compiled.model_name == refit
+    assert parity.set_index("metric").loc["max_rel_diff", "value"] < 1e-4
+
+
+@pytest.mark.parametrize("cities", [["Kraków", "Poznań"], ["Kraków", "Poznań", "Gdańsk"]])
+def test_text_features_are_not_compiled(tmp_path, cities):
+    tabular = pytest.importorskip("autogluon.tabular")
+    X, y = _listings()
+    X["city"] = pd.Categorical(np.resize(cities, len(X)))
+    predictor = tabular.TabularPredictor(label="price", path=str(tmp_path),
+                                         verbosity=0).fit(
+        X.assign(price=y), hyperparameters={"GBM": {"num_boost_round": 20}})
+
+    with pytest.raises(CompileError):
+        compile_predictor(predictor)
+    compiled, parity = compile_final_ensemble(predictor, X)
+    assert isinstance(compiled, NotCompiled) and compiled.reason
+    assert parity.set_index("metric")["value"].isna().any()
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from carprices.pipelines.final_pipeline.evaluation import (
+    bands,
+    bootstrap_metrics,
+    segment_errors,
+)
+
+
+@pytest.mark.parametrize("rows", [500, 50000])  # wiersze i bloki wierszy
+def test_bootstrap_matches_sklearn_and_brackets_value(rows):
+    rng = np.random.default_rng(0)
+    y_true = rng.lognormal(10.5, 0.6, rows)
+    y_pred = y_true * rng.lognormal(0, 0.2, rows)
+
+    result = bootstrap_metrics(y_true, y_pred, n_resamples=500, max_units=5000,
+                               chunk_elements=2 ** 20).set_index("metric")
+
+    expected = [mean_absolute_error(y_true, y_pred),
+                mean_squared_error(y_true, y_pred) ** 0.5,
+                r2_score(y_true, y_pred)]
+    np.testing.assert_allclose(result["value"], expected, rtol=1e-9)
+    assert (result["ci_low"] < result["value"]).all()
+    assert (result["value"] < result["ci_high"]).all()
+    # przedział MAE ~ ±2 błędy standardowe średniej
+    se = np.abs(y_pred - y_true).std() / np.sqrt(rows)
+    width = result.loc["MAE", "ci_high"] - result.loc["MAE", "ci_low"]
+    assert 3 * se < width < 5 * se
+
+
+def test_segment_errors_per_dimension():
+    segments = pd.DataFrame({
+        "mark": ["audi", "audi", "bmw", "bmw"],
+        "age_bucket": bands(pd.Series([1, 8, 2, 30]), [0, 3, 10]),
+    })
+    y_true = np.array([100.0, 200.0, 100.0, 50.0])
+    y_pred = np.array([110.0, 180.0, 100.0, 60.0])
+
+    table = segment_errors(segments, y_true, y_pred).set_index(["segment", "value"])
+
+    audi = table.loc[("mark", "audi")]
+    assert audi["count"] == 2
+    assert audi["MAE"] == pytest.approx(15.0)
+    assert audi["bias"] == pytest.approx(-5.0)
+    assert audi["MAPE"] == pytest.approx(0.1)
+    assert table.loc[("age_bucket", "0-3"), "RMSE"] == pytest.approx(np.sqrt(50.0))
+    assert table.loc[("age_bucket", "10+"), "count"] == 1
+    assert "3-10" in table.loc["age_bucket"].index
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from carprices.pipelines.final_pipeline.nodes import package_for_deployment, select_model
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"x0": rng.normal(size=400), "x1": rng.normal(size=400)})
+    y = pd.Series(3 * X["x0"] - X["x1"] + rng.normal(size=400), name="price")
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def predictor(data, tmp_path_factory):
+    tabular = pytest.importorskip("autogluon.tabular")
+    X, y = data
+    return tabular.TabularPredictor(label="price", path=str(tmp_path_factory.mktemp("full")),
+                                    verbosity=0).fit(
+        X.assign(price=y), hyperparameters={"GBM": {"num_boost_round": 20}},
+        num_bag_folds=2, refit_full=True)
+
+
+def test_package_for_deployment_keeps_only_refit_models(predictor, data, tmp_path):
+    from autogluon.tabular import TabularPredictor
+
+    X, _ = data
+    report = package_for_deployment(predictor, X, str(tmp_path / "deploy")) \
+        .set_index("predictor")
+
+    deployed = TabularPredictor.load(str(tmp_path / "deploy"))
+    refit = predictor.model_refit_map()[predictor.model_best]
+    assert deployed.model_best == refit
+    assert all(name.endswith("_FULL") for name in deployed.model_names())
+    np.testing.assert_allclose(deployed.predict(X), predictor.predict(X, model=refit))
+    assert report.loc["deploy", "size_mb"] < report.loc["full", "size_mb"]
+    assert report.loc["deploy", "models"] < report.loc["full", "models"]
+
+
+def test_select_model_respects_latency_budget(predictor, data):
+    X, y = data
+    generous = {"batch_1_ms": 1e6, "batch_1000_ms": 1e6, "repeat": 2}
+    model_name, board = select_model(predictor, X, y, generous)
+
+    assert set(board["model"]) == set(predictor.model_names())
+    assert board["score_val"].notna().all()  # modele z refitu dziedziczą score_val
+    assert board.loc[board["selected"], "model"].tolist() == [model_name]
+    assert board.loc[board["model"] == model_name, "score_val"].item() == board["score_val"].max()
+
+    # budżetu nie spełnia żaden model: wybierany jest najszybszy
+    model_name, board = select_model(predictor, X, y, {"batch_1_ms": 0.0, "repeat": 2})
+    assert not board["within_budget"].any()
+    assert model_name == board.loc[board["latency_batch_1_ms"].idxmin(), "model"]
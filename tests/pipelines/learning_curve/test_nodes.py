@@ -0,0 +1,27 @@
+import pandas as pd
+
+from carprices.pipelines.learning_curve.nodes import select_fraction
+
+
+def _report():
+    return pd.DataFrame({"fraction": [0.1, 0.5, 1.0], "fit_s": [5.0, 20.0, 40.0],
+                         "RMSE": [12000.0, 10050.0, 10000.0]})
+
+
+def test_select_fraction_picks_cheapest_within_tolerance():
+    report = _report()
+    target = select_fraction(report, tolerance=0.01)
+
+    assert target == 10100.0
+    assert report["meets_target"].tolist() == [False, True, True]
+    assert report.loc[report["selected"], "fraction"].tolist() == [0.5]
+
+
+def test_select_fraction_falls_back_to_best_rmse_when_target_unreachable(caplog):
+    report = _report()
+    target = select_fraction(report, target_rmse=5000.0)
+
+    assert target == 5000.0
+    assert not report["meets_target"].any()
+    assert report.loc[report["selected"], "fraction"].tolist() == [1.0]
+    assert "No sample reaches target RMSE" in caplog.text
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from carprices.pipelines.model_input.nodes import (
+    select_test_segments,
+    split_data,
+    subsample_data,
+)
+
+
+@pytest.fixture
+def features_and_target():
+    features = pd.DataFrame({"age": range(10), "mileage": range(0, 100, 10)})
+    return features, pd.DataFrame({"price": range(1000, 1010)})
+
+
+def test_split_data_is_reproducible(features_and_target):
+    X_train, X_test, y_train, y_test = split_data(*features_and_target, 0.2, 3)
+    assert (len(X_train), len(X_test), len(y_train), len(y_test)) == (8, 2, 8, 2)
+    assert X_test.index.equals(y_test.index)
+    assert split_data(*features_and_target, 0.2, 3)[1].index.equals(X_test.index)
+
+
+def test_test_segments_follow_the_split(features_and_target):
+    features, target = features_and_target
+    target = target.assign(mark=[f"mark{i}" for i in range(10)], year=range(2000, 2010))
+    _, X_test, _, y_test = split_data(features, target, 0.2, 3)
+
+    segments = select_test_segments(target, X_test)
+    assert segments.index.equals(X_test.index)
+    # wiersz segmentu to ten sam wiersz danych co cena i cechy
+    np.testing.assert_array_equal(segments["year"] - 2000, X_test["age"])
+    np.testing.assert_array_equal(y_test - 1000, X_test["age"])
+
+
+def test_split_data_missing_price(features_and_target):
+    features, target = features_and_target
+    with pytest.raises(KeyError, match="price"):
+        split_data(features, target.rename(columns={"price": "cena"}))
+
+
+def test_subsample_data_keeps_price_distribution():
+    rng = np.random.default_rng(0)
+    price = pd.DataFrame({"price": rng.lognormal(11, 0.6, 20_000)})
+    features = pd.DataFrame({"x": np.arange(20_000)})
+
+    X, y = subsample_data(features, price, 0.1, 3)
+    assert len(X) == pytest.approx(2000, abs=10)
+    assert X.index.equals(y.index) and X.index.is_monotonic_increasing
+    # decyle próbki pokrywają się z decylami pełnych danych
+    edges = price["price"].quantile(np.linspace(0.1, 0.9, 9)).to_numpy()
+    shares = np.bincount(np.searchsorted(edges, y["price"]), minlength=10) / len(y)
+    np.testing.assert_allclose(shares, 0.1, atol=0.002)
+    assert subsample_data(features, price, 1.0)[0] is features
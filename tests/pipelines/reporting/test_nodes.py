@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from carprices.pipelines.data_preparation.nodes import RAW_DTYPES, clean_data
+from carprices.pipelines.reporting.nodes import build_eda_figures, compute_eda_aggregates
+from carprices.synthetic import synthetic_listings
+
+
+@pytest.fixture(scope="module")
+def clean_df():
+    raw = synthetic_listings(20_000, seed=0)[list(RAW_DTYPES)].astype(RAW_DTYPES)
+    return clean_data(raw)
+
+
+def test_aggregates_match_direct_computation(clean_df):
+    cube, quantiles, histograms, correlations, summary = compute_eda_aggregates(
+        clean_df, 2025, {"top_n": 5, "bins": 20})
+
+    # średnia ceny marki z kostki = średnia liczona wprost
+    by_mark = cube.groupby("mark", observed=True)[["count", "price_sum"]].sum()
+    expected = clean_df.groupby("mark", observed=True)["price"].mean()
+    np.testing.assert_allclose(by_mark["price_sum"] / by_mark["count"],
+                               expected.loc[by_mark.index], rtol=1e-6)
+    assert cube["count"].sum() == len(clean_df)
+
+    marks = quantiles[quantiles["dimension"] == "mark"].set_index("value")
+    assert len(marks) == 5
+    top = clean_df["mark"].value_counts().head(5).index.astype(str)
+    assert set(marks.index) == set(top)
+    prices = clean_df["price"].astype("float64")
+    for mark in top:
+        values = prices[clean_df["mark"].astype(str) == mark]
+        np.testing.assert_allclose(marks.loc[mark, ["p05", "p50", "p95"]].to_numpy(dtype=float),
+                                   values.quantile([0.05, 0.5, 0.95]).to_numpy())
+
+    assert (histograms.groupby("variable")["count"].sum() == len(clean_df)).all()
+    assert correlations.set_index("variable").loc["price", "price"] == pytest.approx(1.0)
+    assert summary.set_index("column").loc["price", "missing"] == 0
+
+    figures = build_eda_figures(cube, quantiles, histograms, correlations)
+    assert all(len(figure.to_json()) > 0 for figure in figures)
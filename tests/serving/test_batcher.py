@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from carprices.serving.batcher import MicroBatcher
+
+
+def test_concurrent_requests_are_batched_in_order():
+    batch_sizes = []
+
+    def predict_fn(df):
+        batch_sizes.append(len(df))
+        return df["mileage"].to_numpy() * 2.0
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=16, max_wait_ms=50)
+    try:
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            results = list(pool.map(
+                lambda i: batcher.predict([{"mileage": i}, {"mileage": i + 1}]),
+                range(32)))
+    finally:
+        batcher.close()
+
+    assert results == [[2.0 * i, 2.0 * (i + 1)] for i in range(32)]
+    assert sum(batch_sizes) == 64
+    assert len(batch_sizes) < 32
+
+
+def test_batch_error_is_propagated():
+    def predict_fn(df):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(predict_fn, max_wait_ms=1)
+    try:
+        future = batcher.submit([{"mileage": 1}])
+        assert isinstance(future.exception(timeout=5), ValueError)
+    finally:
+        batcher.close()
+
+
+def test_bad_request_fails_only_its_own_future():
+    def predict_fn(df):
+        return df["mileage"].astype(float).to_numpy()
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=16, max_wait_ms=50)
+    try:
+        assert isinstance(batcher.submit(5).exception(timeout=5), TypeError)
+        good = batcher.submit([{"mileage": 1}])
+        bad = batcher.submit([{"mileage": "abc"}])
+        assert good.result(timeout=5) == [1.0]
+        assert isinstance(bad.exception(timeout=5), ValueError)
+        # worker przeżył błędny batch i dalej obsługuje żądania
+        assert batcher.predict([{"mileage": 2}], timeout=5) == [2.0]
+    finally:
+        batcher.close()
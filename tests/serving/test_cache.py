@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from carprices.serving import cache as cache_module
+from carprices.serving.cache import CachedPredictor
+
+
+def _records(mileages):
+    return pd.DataFrame([{"mark": "audi", "model": "a4", "generation_name": "gen-b8",
+                          "year": 2015, "mileage": m, "vol_engine": 1968,
+                          "fuel": "Diesel", "city": "Warszawa"} for m in mileages])
+
+
+def _loader(calls, scale=2.0):
+    def load():
+        def predict_fn(df):
+            calls.append(len(df))
+            return df["mileage"].to_numpy() * scale
+        return predict_fn
+    return load
+
+
+def test_memory_tier_hits_and_evictions(tmp_path):
+    artifact = tmp_path / "model.pkl"
+    artifact.write_text("v1")
+    calls = []
+    cached = CachedPredictor(_loader(calls), [str(artifact)], max_entries=2)
+
+    assert list(cached(_records([1, 2, 1]))) == [2.0, 4.0, 2.0]
+    assert calls == [2]  # duplikaty liczone raz
+    assert list(cached(_records([2]))) == [4.0]
+    cached(_records([3]))
+
+    stats = cached.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 4, 1)
+    assert stats["entries"] == 2
+
+
+def test_disk_tier_is_shared_between_instances(tmp_path):
+    artifact = tmp_path / "model.pkl"
+    artifact.write_text("v1")
+    db = str(tmp_path / "cache.sqlite")
+    first_calls, second_calls = [], []
+    first = CachedPredictor(_loader(first_calls), [str(artifact)], disk_path=db)
+    second = CachedPredictor(_loader(second_calls), [str(artifact)], disk_path=db)
+
+    first(_records([10, 20]))
+    assert list(second(_records([10, 20, 30]))) == [20.0, 40.0, 60.0]
+    assert second_calls == [1]
+    assert second.stats()["disk_hits"] == 2
+
+
+def test_artifact_change_reloads_model_and_invalidates(tmp_path):
+    artifact = tmp_path / "model.pkl"
+    artifact.write_text("v1")
+    scales = iter([2.0, 3.0])
+    calls = []
+    cached = CachedPredictor(lambda: _loader(calls, next(scales))(), [str(artifact)],
+                             disk_path=str(tmp_path / "cache.sqlite"), check_interval=0)
+
+    assert list(cached(_records([1]))) == [2.0]
+    stat = artifact.stat()
+    os.utime(artifact, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert list(cached(_records([1]))) == [3.0]
+    assert cached.stats()["invalidations"] == 1
+    assert calls == [1, 1]
+
+
+def test_counters_are_consistent_under_concurrent_calls(tmp_path):
+    artifact = tmp_path / "model.pkl"
+    artifact.write_text("v1")
+    cached = CachedPredictor(_loader([]), [str(artifact)], max_entries=100)
+
+    batch = _records(range(20))
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda _: cached(batch), range(200)))
+
+    stats = cached.stats()
+    assert stats["hits"] + stats["misses"] == 200 * len(batch)
+
+
+def test_request_path_stats_manifest_instead_of_walking_predictor(tmp_path, monkeypatch):
+    predictor = tmp_path / "car_price_predictor"
+    (predictor / "models").mkdir(parents=True)
+    (predictor / "models" / "model.pkl").write_text("m1")
+    (predictor / "predictor.pkl").write_text("p1")
+    walks = []
+    version = cache_module.artifact_version
+    monkeypatch.setattr(cache_module, "artifact_version",
+                        lambda paths: walks.append(1) or version(paths))
+    cached = CachedPredictor(_loader([]), [str(predictor)], check_interval=0)
+
+    for _ in range(5):
+        cached(_records([1]))
+    assert len(walks) == 1  # tylko przy wczytaniu
+
+    (predictor / "models" / "model.pkl").write_text("m2")
+    (predictor / "predictor.pkl").write_text("p22")  # zapis predictora
+    cached(_records([1]))
+    assert len(walks) == 2 and cached.stats()["invalidations"] == 1
+
+
+def test_mileage_bucket_prices_the_rounded_mileage(tmp_path):
+    artifact = tmp_path / "model.pkl"
+    artifact.write_text("v1")
+    calls = []
+    exact = CachedPredictor(_loader(calls), [str(artifact)])
+    bucketed = CachedPredictor(_loader(calls), [str(artifact)], mileage_bucket=1000)
+
+    assert list(exact(_records([120400, 119600]))) == [240800.0, 239200.0]
+    # przybliżenie: oba przebiegi dostają cenę dla 120000 km, z jednego wywołania
+    assert list(bucketed(_records([120400, 119600]))) == [240000.0, 240000.0]
+    assert calls == [2, 1]
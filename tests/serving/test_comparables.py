@@ -0,0 +1,39 @@
+import numpy as np
+
+from carprices.pipelines.data_preparation.nodes import (
+    RAW_DTYPES,
+    build_feature_transformer,
+    clean_data,
+    compute_feature_stats,
+)
+from carprices.serving.comparables import ComparablesIndex, _vectors, build_index
+from carprices.synthetic import synthetic_listings
+
+
+def test_query_returns_nearest_listings_of_the_same_model(tmp_path):
+    raw = synthetic_listings(20_000, seed=0)[list(RAW_DTYPES)].astype(RAW_DTYPES)
+    clean_df = clean_data(raw)
+    transformer = build_feature_transformer(compute_feature_stats(clean_df, 2025), 2, 2)
+    build_index(clean_df, transformer, str(tmp_path / "index"), chunk_rows=3000)
+    index = ComparablesIndex.load(str(tmp_path / "index"), transformer)
+
+    assert len(index) == len(clean_df)
+    assert isinstance(index.arrays["vectors"], np.memmap)
+
+    record = clean_df.iloc[0].to_dict()
+    result = index.query(record, k=5)
+    assert len(result) == 5
+    assert (result["model"] == record["model"]).all()
+    assert (result["year"] - record["year"]).abs().max() <= 2
+    assert result["distance"].is_monotonic_increasing
+
+    # to samo co pełne przeszukanie grupy
+    same = clean_df[(clean_df["mark"] == record["mark"])
+                    & (clean_df["model"] == record["model"])
+                    & ((clean_df["year"] - record["year"]).abs() <= 2)]
+    vector = _vectors(transformer, clean_df.iloc[[0]])[0]
+    expected = np.sort(np.linalg.norm(_vectors(transformer, same) - vector, axis=1))[:5]
+    np.testing.assert_allclose(result["distance"], expected, rtol=1e-5, atol=1e-6)
+
+    unknown = index.query(dict(record, mark="nope", model="nope"), k=3)
+    assert len(unknown) == 3
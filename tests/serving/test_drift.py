@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from carprices.serving.drift import (
+    DriftMonitor,
+    FrequencySketch,
+    QuantileSketch,
+    build_reference,
+)
+from carprices.synthetic import synthetic_listings
+
+
+class _Transformer:
+    """Minimalny zamiennik ``CarFeatureTransformer.unknown_flags``."""
+
+    def unknown_flags(self, df):
+        return {"unknown_model": df["model"].astype(str).str.endswith("9").to_numpy(),
+                "other_generation": df["generation_name"].isna().to_numpy()}
+
+
+def test_sketches_have_bounded_size():
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(11, 0.5, 100_000)
+    sketch = QuantileSketch.from_values(values, bins=64)
+    for _ in range(20):
+        sketch.update(rng.lognormal(11, 0.5, 10_000))
+
+    assert len(sketch.counts) <= 64
+    assert abs(sketch.quantile(0.5) / np.exp(11) - 1) < 0.02
+
+    freq = FrequencySketch(capacity=50)
+    for i in range(100):
+        # "hot" w każdym batchu, reszta to długi ogon unikalnych wartości
+        freq.update(pd.Series(["hot"] * 20 + [f"v{i}_{j}" for j in range(30)]))
+    assert len(freq.counts) == 50
+    assert freq.top(1)[0][0] == "hot"
+    assert freq.total == 5000
+
+
+def test_monitor_flags_shifted_inputs_and_rotates_window(tmp_path):
+    reference = build_reference(synthetic_listings(50_000, seed=0), _Transformer())
+    log = tmp_path / "drift.jsonl"
+    monitor = DriftMonitor(reference, _Transformer(), interval=0, min_rows=1000,
+                           log_path=str(log))
+
+    same = synthetic_listings(2000, seed=1)
+    monitor.update(same)
+    stable = monitor.last_report
+    assert stable["rows"] == 2000 and stable["drifted"] == []
+    assert monitor.rows == 0  # nowe okno
+
+    shifted = synthetic_listings(2000, seed=2)
+    shifted["mileage"] *= 3
+    monitor.update(shifted)
+    assert monitor.last_report["drifted"] == ["mileage"]
+    assert len(log.read_text().splitlines()) == 2
+    assert stable["rates"]["other_generation"]["rate"] > 0
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from carprices.serving.cache import CachedPredictor
+from carprices.serving.records import InvalidRecord, normalize_record
+
+RECORD = {"mark": " audi ", "model": "a4", "year": 2015, "mileage": 120000,
+          "vol_engine": 1968, "fuel": "Diesel", "city": "Poznań"}
+
+
+def test_normalize_record_strips_text_and_fills_optional_generation():
+    record = normalize_record(RECORD)
+    assert record["mark"] == "audi" and record["generation_name"] is None
+    assert record["year"] == 2015.0 and isinstance(record["mileage"], float)
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"mileage": None}, "mileage"),
+    ({"year": "2015"}, "year"),
+    ({"vol_engine": True}, "vol_engine"),
+    ({"mileage": float("nan")}, "mileage"),
+    ({"model": 4}, "model"),
+])
+def test_invalid_records_are_rejected(change, message):
+    record = {k: v for k, v in {**RECORD, **change}.items() if v is not None}
+    with pytest.raises(InvalidRecord, match=message):
+        normalize_record(record)
+
+
+def test_cache_key_and_prediction_see_the_same_values(tmp_path):
+    artifact = tmp_path / "model.pkl"
+    artifact.write_text("v1")
+    seen = []
+
+    def predict_fn(df):
+        seen.extend(df["mark"])
+        return [1.0] * len(df)
+
+    cached = CachedPredictor(lambda: predict_fn, [str(artifact)])
+    cached(pd.DataFrame([RECORD, {**RECORD, "mark": "audi"}]))
+    # " audi " i "audi" to jeden klucz i jedna, przycięta wartość dla modelu
+    assert seen == ["audi"]
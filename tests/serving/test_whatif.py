@@ -0,0 +1,47 @@
+import numpy as np
+
+from carprices.serving.whatif import price_curves, variant_grid
+
+RECORD = {"mark": "audi", "model": "a4", "generation_name": "gen-b8", "year": 2015,
+          "mileage": 120000, "vol_engine": 1968, "fuel": "Diesel", "city": "Poznań"}
+
+
+def test_variant_grid_is_cartesian_product():
+    grid = variant_grid(RECORD, {"year": [2014, 2015], "mileage": [1000, 2000, 3000]})
+
+    assert len(grid) == 6
+    assert list(grid.columns) == list(RECORD)
+    assert grid[["year", "mileage"]].drop_duplicates().shape[0] == 6
+    assert (grid["mark"] == "audi").all() and (grid["vol_engine"] == 1968).all()
+
+
+def test_price_curves_use_a_single_predict_call():
+    calls = []
+
+    def predict(df):
+        calls.append(len(df))
+        return 100000 - df["mileage"].to_numpy() / 10 + (df["year"].to_numpy() - 2000) * 1000
+
+    by_mileage, by_city = price_curves(predict, RECORD, [
+        {"year": np.arange(2010, 2020), "mileage": np.linspace(0, 300000, 50)},
+        {"city": ["Poznań", "Kraków"]},
+    ])
+
+    assert calls == [502]
+    assert len(by_mileage) == 500 and list(by_city.columns) == ["city", "price"]
+    curve = by_mileage[by_mileage["year"] == 2015]
+    np.testing.assert_allclose(curve["price"], 115000 - curve["mileage"] / 10)
+    np.testing.assert_allclose(by_city["price"], 103000)
+
+
+def test_empty_sweeps_give_empty_curves():
+    def predict(df):
+        raise AssertionError("predict called without variants")
+
+    assert price_curves(predict, RECORD, []) == []
+    (curve,) = price_curves(predict, RECORD, [{"mileage": []}])
+    assert curve.empty and list(curve.columns) == ["mileage", "price"]
+
+    by_year, by_city = price_curves(lambda df: np.full(len(df), 1.0), RECORD,
+                                    [{"year": [2014, 2015], "mileage": []}, {"city": ["Kraków"]}])
+    assert by_year.empty and by_city["price"].tolist() == [1.0]
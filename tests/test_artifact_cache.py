@@ -0,0 +1,77 @@
+import multiprocessing
+import pickle
+
+import pandas as pd
+import pytest
+
+from carprices import artifact_cache
+from carprices.artifact_cache import ArtifactStore, cached
+
+CALLS = []
+
+
+def _train(df: pd.DataFrame, alpha: float, save_path: str):
+    CALLS.append(alpha)
+    with open(save_path, "w") as f:
+        f.write(f"model {alpha}")
+    return {"alpha": alpha, "rows": len(df)}, df.assign(pred=df["x"] * alpha)
+
+
+@pytest.fixture
+def store(tmp_path):
+    CALLS.clear()
+    artifact_cache.configure(str(tmp_path / "cache"), max_size_gb=1)
+    yield artifact_cache.get_store()
+    artifact_cache.configure(enabled=False)
+
+
+def test_hit_restores_outputs_and_artifacts(store, tmp_path):
+    node = pickle.loads(pickle.dumps(cached(_train, artifacts=["save_path"])))
+    df = pd.DataFrame({"x": [1.0, 2.0, 3.0]})
+    model = tmp_path / "model.txt"
+
+    first = node(df, 2.0, str(model))
+    model.unlink()
+    second = node(df.copy(), 2.0, str(model))
+
+    assert CALLS == [2.0]
+    assert model.read_text() == "model 2.0"
+    assert second[0] == first[0]
+    pd.testing.assert_frame_equal(second[1], first[1])
+
+    node(df, 3.0, str(model))  # zmiana parametru
+    node(df.assign(x=[1.0, 2.0, 4.0]), 2.0, str(model))  # zmiana danych
+    assert CALLS == [2.0, 3.0, 2.0]
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=2500)
+
+    def write(tmp):
+        (tmp / "blob").write_bytes(b"x" * 1000)
+
+    store.put("a", write, {})
+    store.put("b", write, {})
+    assert store.get("a") is not None  # "b" staje się najstarszy
+    store.put("c", write, {})
+
+    assert {e["key"] for e in store.entries()} == {"a", "c"}
+
+
+def test_fingerprint_covers_shared_package_modules(tmp_path, monkeypatch):
+    package = tmp_path / "carprices"
+    package.mkdir()
+    (package / "features.py").write_text("A = 1\n")
+    monkeypatch.setattr(artifact_cache, "_PACKAGE_ROOT", package)
+
+    before = artifact_cache.code_fingerprint(_train)
+    (package / "features.py").write_text("A = 2\n")
+
+    assert artifact_cache.code_fingerprint(_train) != before
+
+
+def test_spawned_worker_uses_parent_configuration(store):
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        worker_store = pool.apply(artifact_cache.get_store)
+    assert worker_store is not None and worker_store.root == store.root
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+
+from carprices.chunks import ChunkWriter, arrow_schema, iter_chunks
+
+
+def test_explicit_schema_survives_chunks_with_different_inferred_types(tmp_path):
+    path = tmp_path / "out.parquet"
+    schema = arrow_schema({"generation_name": "str", "year": "float64",
+                           "predicted_price": "float64"})
+    with ChunkWriter(str(path), schema) as writer:
+        # pierwsza porcja: generacja pusta, rok bez braków (int64)
+        writer.write(pd.DataFrame({"generation_name": [None, None], "year": [2015, 2016],
+                                   "predicted_price": np.float32([1.0, 2.0]), "id": [1, 2]}))
+        writer.write(pd.DataFrame({"generation_name": ["gen-b8"], "year": [np.nan],
+                                   "predicted_price": np.float32([3.0]), "id": [3]}))
+
+    result = pd.concat(iter_chunks(str(path), 10), ignore_index=True)
+    assert result["generation_name"].tolist() == [None, None, "gen-b8"]
+    np.testing.assert_array_equal(result["year"], [2015, 2016, np.nan])
+    assert result["predicted_price"].dtype == np.float64
+    assert result["id"].tolist() == [1, 2, 3]
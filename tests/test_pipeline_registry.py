@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from kedro.framework.session import KedroSession
+from kedro.framework.startup import bootstrap_project
+from kedro.runner import ParallelRunner
+
+from carprices.pipeline_registry import register_pipelines
+
+
+def test_default_pipeline_splits_once_and_trains_independently():
+    pipeline = register_pipelines()["__default__"]
+    names = [n.name for n in pipeline.nodes]
+    assert names.count("split_data_node") == 1
+
+    ag = pipeline.only_nodes("train_autogluon_node")
+    final = pipeline.only_nodes("train_final_ensemble_node")
+    ag_upstream = {n.name for n in pipeline.to_nodes("train_autogluon_node").nodes}
+    final_upstream = {n.name for n in pipeline.to_nodes("train_final_ensemble_node").nodes}
+    assert "train_final_ensemble_node" not in ag_upstream
+    assert "train_autogluon_node" not in final_upstream
+    # oba treningi czytają ten sam podział
+    assert ag.inputs() & final.inputs() >= {"X_train", "y_train"}
+
+
+def test_default_pipeline_builds_under_parallel_runner():
+    project_path = Path(__file__).resolve().parents[1]
+    bootstrap_project(project_path)
+    with KedroSession.create(project_path=project_path) as session:
+        catalog = session.load_context().catalog
+    pipeline = register_pipelines()["__default__"]
+
+    # walidacja, którą ParallelRunner wykonuje przed startem workerów
+    ParallelRunner._validate_nodes(pipeline.nodes)
+    ParallelRunner._validate_catalog(catalog, pipeline)
+    # baseline: data_preparation + autogluon_pipeline + final_pipeline, bez raportów
+    assert "compute_eda_aggregates_node" not in {n.name for n in pipeline.nodes}
@@ -0,0 +1,71 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+
+from carprices.hooks import NodeProfilingHooks
+
+
+def _run_node(hooks, name, inputs, outputs, seconds=0.0):
+    node = SimpleNamespace(name=name)
+    for dataset, data in inputs.items():
+        hooks.before_dataset_loaded(dataset, node)
+        hooks.after_dataset_loaded(dataset, data, node)
+    hooks.before_node_run(node)
+    time.sleep(seconds)
+    hooks.after_node_run(node, inputs, outputs)
+    for dataset, data in outputs.items():
+        hooks.before_dataset_saved(dataset, data, node)
+        hooks.after_dataset_saved(dataset, data, node)
+
+
+def test_report_has_node_timings_rows_and_slowest_stacks(tmp_path):
+    hooks = NodeProfilingHooks(report_dir=str(tmp_path))
+    hooks.after_context_created(SimpleNamespace(
+        params={"profiling": {"enabled": True, "sample": True, "interval_ms": 1, "top_nodes": 1}}))
+    hooks.before_pipeline_run({"session_id": "run1"})
+
+    raw = pd.DataFrame({"a": range(100), "b": range(100)})
+    _run_node(hooks, "slow_node", {"raw": raw}, {"clean": raw.head(10)}, seconds=0.05)
+    _run_node(hooks, "fast_node", {"clean": raw.head(10)}, {"n": 10})
+    hooks._pid = None  # kolejny rekord jak z workera ParallelRunner
+    _run_node(hooks, "worker_node", {}, {"out": raw})
+    hooks._pid = os.getpid()
+    hooks.after_pipeline_run()
+
+    nodes = pd.read_csv(tmp_path / "run1" / "nodes.csv").set_index("node")
+    assert nodes.index[0] == "slow_node"
+    assert nodes.loc["slow_node", ["input_rows", "output_rows", "output_cols"]].tolist() \
+        == [100, 10, 2]
+    assert nodes.loc["slow_node", "wall_s"] >= 0.05
+    assert nodes.loc["worker_node", "output_rows"] == 100
+    assert pd.isna(nodes.loc["fast_node", "output_rows"])
+
+    datasets = pd.read_csv(tmp_path / "run1" / "datasets.csv")
+    assert set(datasets["operation"]) == {"load", "save"}
+    assert [p.name for p in (tmp_path / "run1").glob("*.folded")] == ["slow_node.folded"]
+    assert not (tmp_path / "run1" / ".spool").exists()
+
+
+def test_profiling_is_off_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv(NodeProfilingHooks.ENABLE_ENV, raising=False)
+    hooks = NodeProfilingHooks(report_dir=str(tmp_path))
+    hooks.after_context_created(SimpleNamespace(params={"profiling": {"sample": True}}))
+    hooks.before_pipeline_run({"session_id": "run1"})
+    _run_node(hooks, "node", {"raw": pd.DataFrame({"a": [1]})}, {"n": 1})
+    hooks.after_pipeline_run()
+
+    assert list(tmp_path.iterdir()) == []
+    assert NodeProfilingHooks.SPOOL_ENV not in os.environ
+
+
+def test_profiling_env_variable_enables_report(tmp_path, monkeypatch):
+    monkeypatch.setenv(NodeProfilingHooks.ENABLE_ENV, "1")
+    hooks = NodeProfilingHooks(report_dir=str(tmp_path))
+    hooks.after_context_created(SimpleNamespace(params={}))
+    hooks.before_pipeline_run({"session_id": "run1"})
+    _run_node(hooks, "node", {}, {"n": 1})
+    hooks.after_pipeline_run()
+
+    assert (tmp_path / "run1" / "nodes.csv").exists()
@@ -0,0 +1,58 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from carprices import spark
+from carprices.hooks import SparkHooks
+
+
+def _context(engine="pandas"):
+    return SimpleNamespace(project_path=Path("carprices"),
+                           config_loader={"spark": {"spark.master": "local[1]"}},
+                           params={"data_preparation": {"engine": engine}})
+
+
+@pytest.fixture
+def hooks():
+    hooks = SparkHooks(spark_pipelines=["data_preparation_spark"])
+    hooks.after_context_created(_context())
+    yield hooks
+    spark.enable()
+
+
+def test_context_creation_does_not_start_spark(hooks):
+    hooks.before_pipeline_run({"pipeline_name": "data_preparation_spark"})
+    assert not spark.is_active()
+
+
+def test_disabled_pipeline_cannot_start_spark(hooks):
+    hooks.before_pipeline_run({"pipeline_name": "data_preparation"})
+    with pytest.raises(RuntimeError, match="data_preparation"):
+        spark.get_spark()
+    hooks.before_pipeline_run({"pipeline_name": "data_preparation_spark"})
+    assert spark._disabled_reason is None
+
+
+def test_unlisted_pipeline_cannot_start_spark(hooks):
+    hooks.before_pipeline_run({"pipeline_name": "some_new_pandas_pipeline"})
+    with pytest.raises(RuntimeError, match="some_new_pandas_pipeline"):
+        spark.get_spark()
+
+
+def test_spark_engine_allows_data_preparation(hooks):
+    hooks.after_context_created(_context("spark"))
+    hooks.before_pipeline_run({"pipeline_name": "data_preparation"})
+    assert spark._disabled_reason is None
+    hooks.before_pipeline_run({"pipeline_name": "reporting"})
+    assert spark._disabled_reason is not None
+
+
+def test_engine_parameter_selects_data_preparation_variant(monkeypatch):
+    from carprices import pipeline_registry
+
+    assert pipeline_registry.data_preparation_engine() == "pandas"
+    monkeypatch.setattr(pipeline_registry, "data_preparation_engine", lambda: "spark")
+    pipelines = pipeline_registry.register_pipelines()
+    assert "encode_features_spark_node" in {n.name for n in pipelines["data_preparation"].nodes}
+    assert "encode_features_spark_node" in {n.name for n in pipelines["__default__"].nodes}
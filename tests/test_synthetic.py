@@ -0,0 +1,21 @@
+import pandas as pd
+
+from carprices.pipelines.data_preparation.nodes import RAW_DTYPES, clean_data, load_data
+from carprices.synthetic import COLUMNS, synthetic_listings, write_synthetic_csv
+
+
+def test_synthetic_listings_match_kaggle_schema_and_survive_cleaning():
+    df = synthetic_listings(5000, seed=3)
+    assert list(df.columns) == COLUMNS
+    assert df["generation_name"].isna().any()
+    pd.testing.assert_frame_equal(df, synthetic_listings(5000, seed=3))
+
+    clean = clean_data(df.drop(columns=["Unnamed: 0"]))
+    assert 0.5 < len(clean) / len(df) < 1.0
+
+
+def test_write_synthetic_csv_in_chunks(tmp_path):
+    path = write_synthetic_csv(str(tmp_path / "cars.csv"), rows=2500, chunk_rows=1000)
+    df = load_data(str(path))
+    assert len(df) == 2500
+    assert list(df.columns) == [c for c in COLUMNS if c in RAW_DTYPES]